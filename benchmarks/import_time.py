@@ -0,0 +1,110 @@
+"""Import-time guard for cold-start workers.
+
+Every check runs in a fresh interpreter, which imports NumPy and pandas first
+(every worker needs them anyway) and then times the import statement of the
+check, so the measurement is the package's own cost. A check fails when its
+median time exceeds its budget or when it loads one of the heavy dependencies
+it must not need.
+
+Run from the repository root::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 7 --output import_time.json
+
+The exit status is 1 when any check fails.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY = ('h2o', 'matplotlib', 'seaborn', 'sklearn', 'scipy', 'shap', 'torch', 'lightgbm', 'xgboost', 'pyod')
+
+# (import statement, budget in seconds beyond NumPy and pandas, modules it must not load)
+CHECKS = [
+    ('import src', 0.05, HEAVY),
+    ('from src.data_preprocessing.encoding import encode_features', 0.1, HEAVY),
+    ('from src.feature_engineering import encode_features', 0.1, HEAVY),
+    ('from src.data_preprocessing.imputation import GroupImputer', 0.15, HEAVY),
+    ('from src.scoring import ScoringPipeline, TreeEnsemble', 0.25, HEAVY),
+    ('from src.model_utils import load_and_preprocess_data', 0.3, HEAVY),
+    ('from src.data_preprocessing.outlier_transformation import OutlierTransformer', 0.4,
+     ('h2o', 'matplotlib', 'seaborn', 'sklearn', 'scipy.stats', 'torch')),
+]
+
+PROBE = """
+import json, resource, sys, time
+import numpy, pandas
+start = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': sorted(sys.modules),
+}}))
+"""
+
+
+def measure(statement):
+    """Import time, peak RSS and loaded modules of one statement in a fresh interpreter."""
+    env = {**os.environ, 'PYTHONPATH': str(ROOT), 'PYTHONDONTWRITEBYTECODE': '1'}
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statement=statement)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_checks(repeat=5):
+    """Run every check ``repeat`` times.
+
+    Returns:
+        list: One dict per check with the median time, peak RSS, forbidden
+        modules that were loaded and whether the check passed
+    """
+    results = []
+    for statement, budget, forbidden in CHECKS:
+        runs = [measure(statement) for _ in range(repeat)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        loaded = sorted({
+            name for run in runs for name in run['modules']
+            if any(name == module or name.startswith(module + '.') for module in forbidden)
+        })
+        top_level = sorted({name.split('.')[0] for name in loaded})
+        results.append({
+            'statement': statement,
+            'median_seconds': round(seconds, 4),
+            'budget_seconds': budget,
+            'max_rss_mb': round(max(run['max_rss_mb'] for run in runs), 1),
+            'forbidden_loaded': top_level,
+            'passed': seconds <= budget and not loaded,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Guard the import time of the package entry points.')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per check')
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run_checks(args.repeat)
+    for result in results:
+        status = '✅' if result['passed'] else '🚫'
+        extra = f"  loaded {', '.join(result['forbidden_loaded'])}" if result['forbidden_loaded'] else ''
+        print(f"{status} {result['median_seconds'] * 1000:7.1f} ms (budget {result['budget_seconds'] * 1000:.0f} ms), "
+              f"{result['max_rss_mb']:6.1f} MB  {result['statement']}{extra}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    return 0 if all(result['passed'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
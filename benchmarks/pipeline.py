@@ -0,0 +1,220 @@
+"""End-to-end benchmark of the preprocessing pipeline on synthetic BRFSS data.
+
+For every dataset size the raw frame is generated with ``src.synthetic_data``
+and written to Parquet, then each stage runs on the output of the previous one:
+
+    clean_data -> encode_features -> detect_outliers -> transform_outliers
+                                  -> engineer_features
+
+Every stage is timed (best wall and CPU time over ``--repeat`` runs) and run
+once more under ``tracemalloc`` for its peak Python/NumPy allocation. Results
+are written as JSON; with ``--baseline`` each stage is compared with an earlier
+result file and the run fails when a stage got slower or hungrier than the
+tolerance allows.
+
+Run from the repository root::
+
+    python benchmarks/pipeline.py --sizes 10k 400k --output benchmarks/results/pipeline.json
+    python benchmarks/pipeline.py --baseline benchmarks/results/pipeline.json
+
+The exit status is 1 when a regression is found.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.data_io import read_dataset  # noqa: E402
+from src.data_preprocessing.clean_data import clean_data  # noqa: E402
+from src.data_preprocessing.encoding import encode_features  # noqa: E402
+from src.data_preprocessing.local_outlier_methods import detect_outliers  # noqa: E402
+from src.data_preprocessing.outlier_transformation import METHODS, transform_outliers  # noqa: E402
+from src.feature_engineering.feature_engineering import engineer_features  # noqa: E402
+from src.synthetic_data import SIZES, SyntheticBRFSS  # noqa: E402
+
+STAGES = ('clean_data', 'encode_features', 'engineer_features', 'detect_outliers', 'transform_outliers')
+
+# A stage regresses only when it is worse by the relative tolerance and by at least this much
+MIN_SECONDS = 0.05
+MIN_MB = 5.0
+
+
+def _quiet(fn):
+    """Run ``fn`` with the pipeline's progress messages silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def _time(fn, repeat):
+    best_wall, best_cpu, result = np.inf, np.inf, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = _quiet(fn)
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+    return best_wall, best_cpu, result
+
+
+def _peak_mb(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _quiet(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def stage_functions(raw_path, workdir):
+    """The stages as ``(name, make_input, run)``; ``run`` takes the output of ``make_input``."""
+    cleaned_path = str(Path(workdir) / 'cleaned.parquet')
+
+    def run_clean(_):
+        clean_data(raw_path, cleaned_path)
+        return read_dataset(cleaned_path)
+
+    def run_transform(df):
+        for method in METHODS:
+            transform_outliers(df, 'BMI', method)
+
+    return [
+        ('clean_data', lambda previous: None, run_clean),
+        ('encode_features', lambda previous: previous['clean_data'], encode_features),
+        ('engineer_features', lambda previous: previous['encode_features'], engineer_features),
+        ('detect_outliers', lambda previous: previous['encode_features'],
+         lambda df: detect_outliers(df, method='iforest', show_plots=False)),
+        ('transform_outliers', lambda previous: previous['encode_features'], run_transform),
+    ]
+
+
+def run_size(size, missing_rate, repeat, memory, stages, seed=42):
+    """Benchmark every stage on one dataset size."""
+    n_rows = SIZES[size] if size in SIZES else int(size)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_path = str(Path(workdir) / 'raw.parquet')
+        print(f"🔹 Generating {n_rows:,} synthetic rows...")
+        SyntheticBRFSS(missing_rate=missing_rate, seed=seed).write(raw_path, n_rows)
+
+        outputs = {}
+        for name, make_input, run in stage_functions(raw_path, workdir):
+            data = make_input(outputs)
+            wall, cpu, outputs[name] = _time(lambda: run(data), repeat)
+            if name not in stages:
+                continue
+            result = {
+                'size': size, 'rows': n_rows, 'stage': name,
+                'seconds': round(wall, 4), 'cpu_seconds': round(cpu, 4),
+                'rows_per_second': round(n_rows / wall) if wall > 0 else None,
+            }
+            if memory:
+                result['peak_mb'] = round(_peak_mb(lambda: run(data)), 2)
+            results.append(result)
+            peak = f", peak {result['peak_mb']:.1f} MB" if memory else ''
+            print(f"⏱️ {size:>5} {name:<19} {wall:8.3f} s (CPU {cpu:.3f} s){peak}")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Versions and machine details stored with the results."""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Stages worse than ``baseline`` by more than ``tolerance`` in time or peak memory.
+
+    Returns:
+        list: One dict per regression with the metric, both values and the ratio
+    """
+    previous = {(row['size'], row['stage']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        before = previous.get((row['size'], row['stage']))
+        if before is None:
+            continue
+        for metric, floor in (('seconds', MIN_SECONDS), ('peak_mb', MIN_MB)):
+            if metric not in row or metric not in before or not before[metric]:
+                continue
+            ratio = row[metric] / before[metric]
+            if ratio > 1 + tolerance and row[metric] - before[metric] > floor:
+                regressions.append({
+                    'size': row['size'], 'stage': row['stage'], 'metric': metric,
+                    'baseline': before[metric], 'current': row[metric], 'ratio': round(ratio, 2),
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the preprocessing pipeline on synthetic data.')
+    parser.add_argument('--sizes', nargs='+', default=['10k', '400k'], help=f"Keys of {list(SIZES)} or row counts")
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; the best is kept')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', help='Write the results as JSON')
+    parser.add_argument('--baseline', help='Earlier results to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        results += run_size(size, args.missing_rate, args.repeat, not args.no_memory, args.stages)
+    report = {'environment': environment(), 'missing_rate': args.missing_rate, 'results': results}
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        report['regressions'] = compare(results, baseline, args.tolerance)
+        for item in report['regressions']:
+            print(f"🚫 {item['size']} {item['stage']}: {item['metric']} {item['baseline']} -> "
+                  f"{item['current']} ({item['ratio']}x)")
+        if report['regressions']:
+            status = 1
+        else:
+            print(f"✅ No regressions against {args.baseline}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"💾 Results saved to {args.output}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
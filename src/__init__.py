@@ -1,11 +1,20 @@
-"""Heart Attack Prediction Project package."""
+"""Heart Attack Prediction Project package.
+
+The exported names are loaded on first access (PEP 562), so ``import src`` and
+workers that only need a submodule such as the encoders do not pay for H2O,
+matplotlib or seaborn.
+"""
+
+from importlib import import_module
 
 from .config import DATA_PATH, MODEL_CONFIG, FEATURE_CONFIG, TRAIN_CONFIG
-from .feature_engineering.feature_engineering import (
-    create_polynomial_features,
-    engineer_features
-)
-from .model import HeartAttackPredictor
+
+# Exported name -> module that defines it
+_LAZY_EXPORTS = {
+    'create_polynomial_features': '.feature_engineering.feature_engineering',
+    'engineer_features': '.feature_engineering.feature_engineering',
+    'HeartAttackPredictor': '.model',
+}
 
 __all__ = [
     'DATA_PATH',
@@ -16,3 +25,15 @@ __all__ = [
     'engineer_features',
     'HeartAttackPredictor'
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
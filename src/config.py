@@ -3,9 +3,25 @@
 # Data paths
 DATA_PATH = {
     'raw_data': 'data/raw/heart_2022.csv',
-    'cleaned_data': 'data/cleaned/heart_2022_cleaned.csv',
-    'engineered_data': 'data/processed/heart_2022_engineered.csv',
-    'model_output': 'models/'
+    # Columns of the survey in order, with the dtypes they have once encoded (the raw file holds strings)
+    'raw_schema': 'data/raw/dtype.csv',
+    'cleaned_data': 'data/cleaned/heart_2022_cleaned.parquet',
+    'engineered_data': 'data/processed/heart_2022_engineered.parquet',
+    # Column dtypes of the encoded, engineered dataset
+    'engineered_schema': 'data/cleaned/dtype.csv',
+    'imputer': 'models/group_imputer.joblib',
+    'lightgbm_model': 'models/lightgbm_hyperopt_model.txt',
+    'xgboost_model': 'models/xgboost_hyperopt_model.json',
+    'model_output': 'models/',
+    # Revenue of every AutoML model and the cached predictions behind it
+    'leaderboard': 'data/processed/test_leaderboard.csv',
+    'prediction_cache': 'models/prediction_cache/',
+    # Cross-validation folds with their fitted preprocessing
+    'cv_cache': 'data/processed/cv_cache/',
+    # Synthetic minority rows from SMOTENC / GAN, keyed by data and sampler
+    'synthetic_pool': 'data/processed/synthetic_pool/',
+    # Outputs of the pipeline stages, keyed by the fingerprint of their inputs
+    'stage_cache': 'data/processed/stage_cache/'
 }
 
 # Feature engineering settings
@@ -28,9 +44,52 @@ MODEL_CONFIG = {
     'nfolds': 5,  # For cross-validation
 }
 
+# H2O cluster shared by all predictors in a process
+H2O_CONFIG = {
+    'nthreads': -1,  # -1 uses all cores
+    'max_mem_size': None,  # JVM heap limit, e.g. '8G'; None uses the JVM default
+    'url': None,  # Connect to an existing cluster instead of starting one
+}
+
 # Training settings
 TRAIN_CONFIG = {
     'test_size': 0.2,
     'random_state': 42,
     'class_weights': 'balanced'  # Handle class imbalance
-} 
\ No newline at end of file
+}
+
+# Business objective: Revenue = tn_value * TN - fn_cost * FN
+REVENUE_CONFIG = {
+    'tn_value': 271139,
+    'fn_cost': 401832,
+}
+
+# Real-time scoring service
+SERVING_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8080,
+    'max_batch_size': 64,
+    'max_delay_ms': 2.0,  # Latency budget for filling a micro-batch
+}
+
+# HyperOpt tuning of the LightGBM models
+TUNING_CONFIG = {
+    'dataset_dir': 'models/tuning/',
+    'store': 'models/tuning/trials.sqlite',
+    'n_workers': 4,
+    'max_evals': 100,
+    'num_boost_round': 1000,
+    'early_stopping_rounds': 50,
+}
+
+# Class-imbalance resampling
+RESAMPLING_CONFIG = {
+    'ratio': 0.5,  # Minority/majority ratio after adding synthetic rows
+}
+
+# Pipeline runner
+PIPELINE_CONFIG = {
+    'target_column': 'HadHeartAttack',
+    'missing_row_threshold': 0.3,
+    'cache_max_gb': 5.0,  # Least recently used stage outputs are evicted beyond this
+}
@@ -0,0 +1,286 @@
+"""Typed dataset storage shared by the pipeline stages.
+
+Datasets whose path ends in ``.parquet`` are stored column by column with their
+dtypes, so they are read back without parsing text or inferring types. String
+and categorical columns are dictionary-encoded on disk and come back as
+``category``. Any other path is treated as CSV, where dtypes can be supplied from
+a ``dtype.csv`` schema instead of being inferred. A schema describes one file as
+stored: the pipeline stages write ``<stem>.dtype.csv`` next to every dataset
+they produce (see ``schema_path_for``), since the raw survey strings, the cleaned
+data and the encoded data all have different dtypes.
+
+Both readers return category columns with their categories in sorted order,
+whether the whole file or one chunk is read, so order-dependent steps such as
+tie-breaks between equally frequent values give the same result for every file
+format and reading path. ``iter_dataset`` first collects the categories of the
+whole file, so every chunk has the same category dtype as ``read_dataset``
+gives, even when a value only occurs in some chunks.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def is_parquet(path: str) -> bool:
+    """Return True if ``path`` should be stored as Parquet."""
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+
+def read_schema(path: str) -> Dict[str, str]:
+    """
+    Read a column -> dtype schema as written by ``df.dtypes.to_csv(path)``.
+
+    Parameters:
+    - path (str): Path to a ``dtype.csv`` file.
+
+    Returns:
+    - Dict[str, str]: Mapping of column name to dtype name.
+    """
+    schema = pd.read_csv(path, index_col=0).iloc[:, 0]
+    return {str(col): str(dtype) for col, dtype in schema.items()}
+
+
+def write_schema(schema: Dict[str, str], path: str) -> None:
+    """Save a column -> dtype schema in the ``dtype.csv`` format read by ``read_schema``."""
+    pd.Series(schema, dtype=object).to_csv(path)
+
+
+def schema_path_for(path: str) -> str:
+    """Path of the ``dtype.csv`` schema kept next to a dataset, ``<stem>.dtype.csv``."""
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.dtype.csv"))
+
+
+def schema_dtypes(schema: Dict[str, str], columns: Optional[List[str]] = None) -> Dict[str, str]:
+    """Translate a schema into dtypes for ``pd.read_csv``; string columns become ``category``."""
+    dtypes = {}
+    for col, dtype in schema.items():
+        if columns is not None and col not in columns:
+            continue
+        dtypes[col] = 'category' if dtype in ('object', 'str', 'string') else dtype
+    return dtypes
+
+
+def apply_schema(df: pd.DataFrame, schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Cast ``df`` to the dtypes of ``schema``; string columns become ``category``.
+
+    Columns missing from the schema keep their dtype, except strings, which are
+    always converted to ``category`` so they are dictionary-encoded on disk.
+    """
+    dtypes = schema_dtypes(schema or {}, list(df.columns))
+    for col in df.columns:
+        if col not in dtypes and (df[col].dtype == 'object' or pd.api.types.is_string_dtype(df[col].dtype)):
+            dtypes[col] = 'category'
+    changed = {col: dtype for col, dtype in dtypes.items() if str(df[col].dtype) != dtype}
+    return df.astype(changed) if changed else df
+
+
+def sort_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Put the categories of every category column in sorted order."""
+    unsorted = {
+        col: sorted(df[col].cat.categories) for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+        and not df[col].dtype.ordered
+        and not df[col].cat.categories.is_monotonic_increasing
+    }
+    if not unsorted:
+        return df
+    df = df.copy(deep=False)
+    for col, categories in unsorted.items():
+        df[col] = df[col].cat.set_categories(categories)
+    return df
+
+
+def _string_columns(path: str, columns: Optional[List[str]] = None) -> List[str]:
+    """Columns of a Parquet file stored as strings, read back as dictionaries."""
+    file_schema = pq.read_schema(path)
+    wanted = columns if columns is not None else file_schema.names
+    return [
+        name for name in wanted
+        if pa.types.is_string(file_schema.field(name).type)
+        or pa.types.is_large_string(file_schema.field(name).type)
+    ]
+
+
+def _parquet_categories(
+    parquet: pq.ParquetFile,
+    columns: Optional[List[str]] = None
+) -> Dict[str, pd.CategoricalDtype]:
+    """
+    Category dtype of every unordered dictionary column over the whole file.
+
+    Only the dictionary columns are read, batch by batch, and only their
+    dictionaries are kept.
+    """
+    file_schema = parquet.schema_arrow
+    wanted = columns if columns is not None else file_schema.names
+    names = [
+        name for name in wanted
+        if pa.types.is_string(file_schema.field(name).type)
+        or pa.types.is_large_string(file_schema.field(name).type)
+        or (pa.types.is_dictionary(file_schema.field(name).type) and not file_schema.field(name).type.ordered)
+    ]
+    values = {name: set() for name in names}
+    if names:
+        for batch in parquet.iter_batches(columns=names):
+            for name, array in zip(names, batch.columns):
+                values[name].update(array.dictionary.to_pylist())
+    return {name: pd.CategoricalDtype(sorted(found - {None})) for name, found in values.items()}
+
+
+def _csv_categories(
+    path: str,
+    chunksize: int,
+    columns: Optional[List[str]] = None,
+    dtype: Optional[Dict[str, str]] = None
+) -> Dict[str, pd.CategoricalDtype]:
+    """Category dtype of every ``category`` column of a CSV over the whole file."""
+    names = [
+        col for col, kind in (dtype or {}).items()
+        if kind == 'category' and (columns is None or col in columns)
+    ]
+    values = {name: set() for name in names}
+    if names:
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=names, dtype='category'):
+            for name in names:
+                values[name].update(chunk[name].cat.categories)
+    return {name: pd.CategoricalDtype(sorted(found - {None})) for name, found in values.items()}
+
+
+def read_dataset(
+    path: str,
+    columns: Optional[List[str]] = None,
+    schema: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Load a dataset written by ``write_dataset``, or any CSV.
+
+    Parameters:
+    - path (str): Path to a ``.parquet`` or CSV file.
+    - columns (List[str], optional): Only load these columns.
+    - schema (Dict[str, str], optional): Dtypes to parse a CSV with. Parquet files
+      carry their own types and ignore it.
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+    """
+    if is_parquet(path):
+        table = pq.read_table(path, columns=columns, read_dictionary=_string_columns(path, columns))
+        return sort_categories(table.to_pandas())
+
+    dtypes = schema_dtypes(schema, columns) if schema is not None else None
+    return sort_categories(pd.read_csv(path, usecols=columns, dtype=dtypes))
+
+
+def iter_dataset(
+    path: str,
+    chunksize: int,
+    columns: Optional[List[str]] = None,
+    dtype: Optional[Dict[str, str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a dataset in chunks of at most ``chunksize`` rows, with the dtypes
+    ``read_dataset`` gives the whole file.
+
+    Category columns get the categories of the whole file, collected in a first
+    pass over those columns only.
+
+    Parameters:
+    - path (str): Path to a ``.parquet`` or CSV file.
+    - chunksize (int): Rows per chunk.
+    - columns (List[str], optional): Only load these columns.
+    - dtype (Dict[str, str], optional): Dtypes to parse a CSV with.
+    """
+    if is_parquet(path):
+        parquet = pq.ParquetFile(path, read_dictionary=_string_columns(path, columns))
+        categories = _parquet_categories(parquet, columns)
+        chunks = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        categories = _csv_categories(path, chunksize, columns, dtype)
+        chunks = pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtype)
+    for chunk in chunks:
+        yield sort_categories(chunk.astype(categories) if categories else chunk)
+
+
+def dataset_schema(path: str) -> Dict[str, str]:
+    """
+    Column -> dtype schema of a dataset as ``read_dataset`` returns it.
+
+    Parquet files carry their types, so only one row is read; CSV dtypes are
+    inferred from the whole file.
+    """
+    if is_parquet(path):
+        frame = next(iter_dataset(path, 1), None)
+        if frame is None:
+            frame = pq.read_schema(path).empty_table().to_pandas()
+    else:
+        frame = read_dataset(path)
+    return {str(col): str(dtype) for col, dtype in frame.dtypes.items()}
+
+
+def write_dataset(df: pd.DataFrame, path: str, schema: Optional[Dict[str, str]] = None) -> None:
+    """
+    Save a dataset, as Parquet or CSV depending on the extension of ``path``.
+
+    Parameters:
+    - df (pd.DataFrame): Data to save.
+    - path (str): Destination path.
+    - schema (Dict[str, str], optional): Dtypes to cast to before writing Parquet.
+    """
+    if is_parquet(path):
+        apply_schema(df, schema).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+class DatasetWriter:
+    """
+    Append chunks of rows to a single dataset file.
+
+    Every chunk must have the columns of the first one. For Parquet, each chunk
+    becomes a row group and is cast to the column types of the first chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._schema: Optional[pa.Schema] = None
+        self._first = True
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """Append ``chunk`` to the file."""
+        if not is_parquet(self.path):
+            chunk.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+            self._first = False
+            return
+
+        # Strings are written as plain string columns; Parquet dictionary-encodes
+        # them per row group and ``read_dataset`` reads them back as categories.
+        chunk = chunk.astype({
+            col: object for col in chunk.columns if isinstance(chunk[col].dtype, pd.CategoricalDtype)
+        })
+        if self._writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+        self._first = False
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,5 +1,10 @@
 import pandas as pd
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+from ..data_io import DatasetWriter, iter_dataset, read_dataset, write_dataset
+from ..instrumentation import file_size, instrumented, stage
+from .imputation import DEFAULT_GROUP_COLS, GroupImputer
+from .statistics_sketch import GroupStatisticsSketch
 
 
 class DataCleaner:
@@ -8,26 +13,59 @@ class DataCleaner:
     """
 
     def __init__(self, group_cols: Optional[List[str]] = None):
-        self.group_cols = group_cols or ['SmokerStatus', 'RaceEthnicityCategory', 'AgeCategory', 'Sex']
+        self.group_cols = group_cols or list(DEFAULT_GROUP_COLS)
+        self.imputer_: Optional[GroupImputer] = None
 
     def clean_data(
         self,
         input_path: str,
         output_path: str,
         target_column: str = "HadHeartAttack",
-        missing_row_threshold: float = 0.3
+        missing_row_threshold: float = 0.3,
+        imputer_path: Optional[str] = None,
+        chunksize: Optional[int] = None
     ) -> None:
         """
         Load, clean, and save the dataset using group-based imputation.
 
         Parameters:
-        - input_path (str): Path to the raw input CSV file.
-        - output_path (str): Path to save the cleaned CSV file.
+        - input_path (str): Path to the raw input file (CSV or Parquet).
+        - output_path (str): Path to save the cleaned data; a ``.parquet`` path is
+          stored as typed Parquet, anything else as CSV.
         - target_column (str): The name of the target column.
         - missing_row_threshold (float): Maximum allowed fraction of missing values per row.
+        - imputer_path (str, optional): Where to save the fitted imputation statistics
+          for reuse at inference time.
+        - chunksize (int, optional): If given, stream the input in chunks of this many rows
+          instead of loading it at once. Group statistics are accumulated in a first pass
+          (medians become approximate) and each chunk is imputed and appended to the
+          output in a second pass, so peak memory is bounded by the chunk size.
         """
+        with stage('clean_data', bytes_read=file_size(input_path)) as record:
+            if chunksize is not None:
+                record.rows_in, record.rows_out = self._clean_data_streaming(
+                    input_path, output_path, target_column, missing_row_threshold, chunksize
+                )
+            else:
+                record.rows_in, record.rows_out = self._clean_data_in_memory(
+                    input_path, output_path, target_column, missing_row_threshold
+                )
+            record.bytes_written = file_size(output_path)
+
+        if imputer_path is not None:
+            self.imputer_.save(imputer_path)
+            print(f"✅ Imputation statistics saved to '{imputer_path}'.")
+
+    def _clean_data_in_memory(
+        self,
+        input_path: str,
+        output_path: str,
+        target_column: str,
+        missing_row_threshold: float
+    ) -> Tuple[int, int]:
         print("🔹 Loading data...")
-        df = pd.read_csv(input_path)
+        df = read_dataset(input_path)
+        rows_read = len(df)
         print(f"Initial shape: {df.shape}")
 
         print(f"\n🔹 Dropping rows with missing target '{target_column}'...")
@@ -47,64 +85,71 @@ class DataCleaner:
         df_cleaned = self.group_based_imputation(df)
 
         print(f"\n🔹 Saving cleaned data to '{output_path}'...")
-        df_cleaned.to_csv(output_path, index=False)
+        write_dataset(df_cleaned, output_path)
         print("✅ Cleaned data saved.")
+        return rows_read, len(df_cleaned)
+
+    def _clean_data_streaming(
+        self,
+        input_path: str,
+        output_path: str,
+        target_column: str,
+        missing_row_threshold: float,
+        chunksize: int
+    ) -> Tuple[int, int]:
+        print(f"🔹 Pass 1: accumulating group statistics in chunks of {chunksize} rows...")
+        sketch = GroupStatisticsSketch(self.group_cols)
+        rows_read = 0
+        float_cols = set()
+        for chunk in iter_dataset(input_path, chunksize):
+            rows_read += len(chunk)
+            # A numeric column that is float in any chunk is read as float in
+            # every chunk of the second pass, so all chunks share one file schema.
+            float_cols.update(col for col in chunk.columns if pd.api.types.is_float_dtype(chunk[col]))
+            sketch.update(self._filter_rows(chunk, target_column, missing_row_threshold))
+        print(f"Read {rows_read} rows. Remaining after filtering: {sketch.n_rows}")
+        self.imputer_ = sketch.to_imputer()
+        dtypes = {col: 'float64' for col in float_cols if sketch.kinds.get(col) != 'categorical'}
+
+        print(f"\n🔹 Pass 2: imputing and saving cleaned chunks to '{output_path}'...")
+        with DatasetWriter(output_path) as writer:
+            for chunk in iter_dataset(input_path, chunksize, dtype=dtypes):
+                chunk = chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk.columns})
+                writer.write(self.imputer_.transform(self._filter_rows(chunk, target_column, missing_row_threshold)))
+        print("✅ Cleaned data saved.")
+        return rows_read, sketch.n_rows
+
+    @staticmethod
+    def _filter_rows(df: pd.DataFrame, target_column: str, missing_row_threshold: float) -> pd.DataFrame:
+        df = df.dropna(subset=[target_column])
+        return df[df.isnull().mean(axis=1) <= missing_row_threshold]
 
+    @instrumented('group_based_imputation')
     def group_based_imputation(self, df: pd.DataFrame, group_cols: Optional[List[str]] = None) -> pd.DataFrame:
-        group_cols = group_cols or self.group_cols
-        df = df.copy()
+        """
+        Impute ``df`` with group statistics learned from ``df`` itself.
 
-        print("Step 1️⃣: Imputing missing values in grouping columns...")
-        df = self._handle_grouping_columns(df, group_cols)
+        The fitted imputer is kept on ``self.imputer_`` so the same statistics can
+        be saved and applied to new rows without the training data.
+        """
+        group_cols = group_cols or self.group_cols
 
-        print("Step 2️⃣: Imputing missing values in remaining columns...")
-        df = self._handle_other_columns(df, group_cols)
+        self.imputer_ = GroupImputer(group_cols, verbose=True)
+        df = self.imputer_.fit_transform(df)
 
         print("✅ Group-based imputation completed.")
         print("🔎 Remaining missing values per column:\n", df.isnull().sum())
         return df
 
-    def _handle_grouping_columns(self, df: pd.DataFrame, group_cols: List[str]) -> pd.DataFrame:
-        for col in group_cols:
-            if df[col].isnull().sum() == 0:
-                continue
-
-            if df[col].dtype == 'object' or str(df[col].dtype) == 'category':
-                mode_val = df[col].mode().iloc[0]
-                df[col] = df[col].fillna(mode_val)
-                print(f"Filled missing values in '{col}' with mode: {mode_val}")
-            else:
-                median_val = df[col].median()
-                df[col] = df[col].fillna(median_val)
-                print(f"Filled missing values in '{col}' with median: {median_val}")
-        return df
-
-    def _handle_other_columns(self, df: pd.DataFrame, group_cols: List[str]) -> pd.DataFrame:
-        for i, col in enumerate(df.columns):
-            if col in group_cols or df[col].isnull().sum() == 0:
-                continue
-
-            print(f"Imputing column: '{col}' ({i+1}/{len(df.columns)})")
-
-            if df[col].dtype == 'object' or str(df[col].dtype) == 'category':
-                df[col] = df.groupby(group_cols)[col].transform(
-                    lambda x: x.fillna(x.mode().iloc[0]) if not x.mode().empty else x)
-
-                if df[col].isnull().sum() > 0:
-                    fallback = df[col].mode()
-                    if not fallback.empty:
-                        df[col] = df[col].fillna(fallback.iloc[0])
-                        print(f"Fallback: filled remaining nulls in '{col}' with overall mode.")
-            else:
-                df[col] = df.groupby(group_cols)[col].transform(lambda x: x.fillna(x.median()))
-                if df[col].isnull().sum() > 0:
-                    fallback = df[col].median()
-                    df[col] = df[col].fillna(fallback)
-                    print(f"Fallback: filled remaining nulls in '{col}' with overall median.")
-        return df
-
 
-def clean_data(input_path: str, output_path: str, target_column: str = "HadHeartAttack", missing_row_threshold: float = 0.3) -> None:
+def clean_data(
+    input_path: str,
+    output_path: str,
+    target_column: str = "HadHeartAttack",
+    missing_row_threshold: float = 0.3,
+    imputer_path: Optional[str] = None,
+    chunksize: Optional[int] = None
+) -> None:
     """
     Wrapper function to clean data using DataCleaner class.
     """
@@ -113,5 +158,7 @@ def clean_data(input_path: str, output_path: str, target_column: str = "HadHeart
         input_path=input_path,
         output_path=output_path,
         target_column=target_column,
-        missing_row_threshold=missing_row_threshold
+        missing_row_threshold=missing_row_threshold,
+        imputer_path=imputer_path,
+        chunksize=chunksize
     )
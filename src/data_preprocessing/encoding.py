@@ -1,93 +1,175 @@
 import pandas as pd
 import numpy as np
 
+from ..instrumentation import instrumented
+
+# Binary Yes/No encoding
+BINARY_COLS = [
+    'PhysicalActivities', 'HadAngina', 'HadStroke', 'HadAsthma', 'HadSkinCancer',
+    'HadCOPD', 'HadDepressiveDisorder', 'HadKidneyDisease', 'HadArthritis',
+    'DeafOrHardOfHearing', 'BlindOrVisionDifficulty', 'DifficultyConcentrating',
+    'DifficultyWalking', 'DifficultyDressingBathing', 'DifficultyErrands',
+    'AlcoholDrinkers', 'HIVTesting', 'FluVaxLast12', 'PneumoVaxEver',
+    'ChestScan', 'HighRiskLastYear'
+]
+YES_NO_MAP = {'Yes': 1, 'No': 0}
+
+sex_map = {
+    'Female': 0, 'Male': 1
+}
+
+# Ordinal encoding
+general_health_map = {
+    'Poor': 0, 'Fair': 1, 'Good': 2, 'Very good': 3, 'Excellent': 4
+}
+checkup_map = {
+    '5 or more years ago': 0,
+    'Within past 5 years (2 years but less than 5 years ago)': 1,
+    'Within past 2 years (1 year but less than 2 years ago)': 2,
+    'Within past year (anytime less than 12 months ago)': 3
+}
+teeth_map = {
+    'All': 3, '6 or more, but not all': 2, '1 to 5': 1, 'None of them': 0
+}
+age_map = {
+    f'Age {i} to {i+4}': idx + 1 for idx, i in enumerate(range(25, 80, 5))
+}
+age_map['Age 18 to 24'] = 0
+age_map['Age 80 or older'] = 12
+
+# Complex mappings
+diabetes_map = {
+    'No': 0, 'No, pre-diabetes or borderline diabetes': 1,
+    'Yes, but only during pregnancy (female)': 2, 'Yes': 3
+}
+covid_map = {
+    'No': 0,
+    'Tested positive using home test without a health professional': 1,
+    'Yes': 2
+}
+tetanus_map = {
+    'No, did not receive any tetanus shot in the past 10 years': 0,
+    'Yes, received tetanus shot but not sure what type': 1,
+    'Yes, received tetanus shot, but not Tdap': 2,
+    'Yes, received Tdap': 3
+}
+
+# Smoking status
+smoker_map = {
+    'Never smoked': 0,
+    'Former smoker': 1,
+    'Current smoker - now smokes some days': 2,
+    'Current smoker - now smokes every day': 3
+}
+ecig_map = {
+    'Never used e-cigarettes in my entire life': 0,
+    'Not at all (right now)': 1,
+    'Use them some days': 2,
+    'Use them every day': 3
+}
+
+# BMI and Sleep category
+bmi_map = {
+    'Underweight': 0, 'Normal weight': 1,
+    'Overweight': 2, 'Obese': 3, 'Extremly Obese': 4
+}
+sleep_map = {
+    'Normal Sleep': 0, 'Short Sleep': 1, 'Long Sleep': 2,
+    'Very Short Sleep': 3, 'Very Long Sleep': 4
+}
+
+# Column -> {category: code}, in the order encode_features has always applied them
+ENCODING_SPEC = {
+    **{col: YES_NO_MAP for col in BINARY_COLS},
+    'Sex': sex_map,
+    'GeneralHealth': general_health_map,
+    'LastCheckupTime': checkup_map,
+    'RemovedTeeth': teeth_map,
+    'AgeCategory': age_map,
+    'HadDiabetes': diabetes_map,
+    'CovidPos': covid_map,
+    'TetanusLast10Tdap': tetanus_map,
+    'SmokerStatus': smoker_map,
+    'ECigaretteUsage': ecig_map,
+    'BMI_Category': bmi_map,
+    'SleepHours_Category': sleep_map,
+}
+
+
+class CategoricalEncoder:
+    """
+    Encode categorical columns through integer lookup tables compiled from a spec.
+
+    Each ``{category: code}`` mapping of the spec is compiled once into an index of
+    categories and an array of codes. A column is encoded by factorizing it (or,
+    for ``category`` columns, reusing its codes), resolving only the distinct
+    values to positions in that index and taking the codes per row, so strings
+    are hashed once in C instead of one Python dict lookup per row. Encoded
+    columns are ``int8``; a column with values outside its mapping is returned
+    as ``float32`` with NaN for those rows, as ``Series.map`` would.
+    """
+
+    def __init__(self, spec=None, dtype=np.int8):
+        self.spec = spec if spec is not None else ENCODING_SPEC
+        self.dtype = np.dtype(dtype)
+        self._tables = {
+            col: (pd.Index(list(mapping)), np.array(list(mapping.values()), dtype=self.dtype))
+            for col, mapping in self.spec.items()
+        }
+
+    def fit(self, df=None, y=None):
+        """No-op; the lookup tables come from the spec."""
+        return self
+
+    def _encode_column(self, series):
+        categories, codes = self._tables[series.name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            value_codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            value_codes, uniques = pd.factorize(series)
+        # Resolve only the few distinct values, then index by the per-row codes;
+        # the trailing -1 catches missing values (code -1).
+        positions = np.append(categories.get_indexer(uniques), -1)[value_codes]
+
+        known = positions >= 0
+        if known.all():
+            return codes[positions]
+        encoded = np.full(len(series), np.nan, dtype=np.float32)
+        encoded[known] = codes[positions[known]]
+        return encoded
+
+    def transform(self, df):
+        """
+        Encode the spec's columns of ``df``; other columns pass through unchanged.
+
+        Args:
+            df (pd.DataFrame): Input dataframe; it is not modified.
+
+        Returns:
+            pd.DataFrame: New dataframe with the same column order.
+        """
+        columns = {
+            col: self._encode_column(df[col]) if col in self._tables else df[col]
+            for col in df.columns
+        }
+        return pd.DataFrame(columns, index=df.index)
+
+    def fit_transform(self, df, y=None):
+        return self.fit(df).transform(df)
+
+    def transform_record(self, record):
+        """Encode a single row given as a dict; unknown values become NaN."""
+        encoded = dict(record)
+        for col, value in record.items():
+            if col in self.spec:
+                encoded[col] = self.spec[col].get(value, np.nan)
+        return encoded
+
+
+_DEFAULT_ENCODER = CategoricalEncoder()
+
+
+@instrumented('encode_features')
 def encode_features(df):
-    # Binary Yes/No encoding
-    binary_cols = [
-        'PhysicalActivities', 'HadAngina', 'HadStroke', 'HadAsthma', 'HadSkinCancer',
-        'HadCOPD', 'HadDepressiveDisorder', 'HadKidneyDisease', 'HadArthritis',
-        'DeafOrHardOfHearing', 'BlindOrVisionDifficulty', 'DifficultyConcentrating',
-        'DifficultyWalking', 'DifficultyDressingBathing', 'DifficultyErrands',
-        'AlcoholDrinkers', 'HIVTesting', 'FluVaxLast12', 'PneumoVaxEver',
-        'ChestScan', 'HighRiskLastYear'
-    ]
-    for col in binary_cols:
-        df[col] = df[col].map({'Yes': 1, 'No': 0})
-
-    sex_map = {
-        'Female': 0, 'Male': 1
-    }
-    
-    # Ordinal encoding
-    
-    general_health_map = {
-        'Poor': 0, 'Fair': 1, 'Good': 2, 'Very good': 3, 'Excellent': 4
-    }
-    checkup_map = {
-        '5 or more years ago': 0,
-        'Within past 5 years (2 years but less than 5 years ago)': 1,
-        'Within past 2 years (1 year but less than 2 years ago)': 2,
-        'Within past year (anytime less than 12 months ago)': 3
-    }
-    teeth_map = {
-        'All': 3, '6 or more, but not all': 2, '1 to 5': 1, 'None of them': 0
-    }
-    age_map = {
-        f'Age {i} to {i+4}': idx + 1 for idx, i in enumerate(range(25, 80, 5))
-    }
-    age_map['Age 18 to 24'] = 0
-    age_map['Age 80 or older'] = 12
-
-    df['Sex'] = df['Sex'].map(sex_map)
-    df['GeneralHealth'] = df['GeneralHealth'].map(general_health_map)
-    df['LastCheckupTime'] = df['LastCheckupTime'].map(checkup_map)
-    df['RemovedTeeth'] = df['RemovedTeeth'].map(teeth_map)
-    df['AgeCategory'] = df['AgeCategory'].map(age_map)
-
-    # Complex mappings
-    df['HadDiabetes'] = df['HadDiabetes'].map({
-        'No': 0, 'No, pre-diabetes or borderline diabetes': 1,
-        'Yes, but only during pregnancy (female)': 2, 'Yes': 3
-    })
-    
-    df['CovidPos'] = df['CovidPos'].map({
-        'No': 0,
-        'Tested positive using home test without a health professional': 1,
-        'Yes': 2
-    })
-    
-    df['TetanusLast10Tdap'] = df['TetanusLast10Tdap'].map({
-        'No, did not receive any tetanus shot in the past 10 years': 0,
-        'Yes, received tetanus shot but not sure what type': 1,
-        'Yes, received tetanus shot, but not Tdap': 2,
-        'Yes, received Tdap': 3
-    })
-    # Smoking status
-    smoker_map = {
-        'Never smoked': 0,
-        'Former smoker': 1,
-        'Current smoker - now smokes some days': 2,
-        'Current smoker - now smokes every day': 3
-    }
-    ecig_map = {
-        'Never used e-cigarettes in my entire life': 0,
-        'Not at all (right now)': 1,
-        'Use them some days': 2,
-        'Use them every day': 3
-    }
-    df['SmokerStatus'] = df['SmokerStatus'].map(smoker_map)
-    df['ECigaretteUsage'] = df['ECigaretteUsage'].map(ecig_map)
-
-    # BMI and Sleep category
-    bmi_map = {
-        'Underweight': 0, 'Normal weight': 1,
-        'Overweight': 2, 'Obese': 3, 'Extremly Obese': 4
-    }
-    sleep_map = {
-        'Normal Sleep': 0, 'Short Sleep': 1, 'Long Sleep': 2,
-        'Very Short Sleep': 3, 'Very Long Sleep': 4
-    }
-    df['BMI_Category'] = df['BMI_Category'].map(bmi_map)
-    df['SleepHours_Category'] = df['SleepHours_Category'].map(sleep_map)
-
-    return df
+    """Encode the categorical BRFSS columns with ``ENCODING_SPEC``, returning a new dataframe."""
+    return _DEFAULT_ENCODER.transform(df)
@@ -0,0 +1,311 @@
+"""Vectorized group statistics used by the group-based imputation."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_GROUP_COLS = ['SmokerStatus', 'RaceEthnicityCategory', 'AgeCategory', 'Sex']
+
+
+def is_categorical(series: pd.Series) -> bool:
+    """Return True if the column is imputed with a mode rather than a median."""
+    return (
+        series.dtype == 'object'
+        or isinstance(series.dtype, pd.CategoricalDtype)
+        or pd.api.types.is_string_dtype(series.dtype)
+    )
+
+
+def group_codes(df: pd.DataFrame, group_cols: List[str]) -> Tuple[np.ndarray, pd.MultiIndex]:
+    """
+    Assign every row the integer id of its group.
+
+    Parameters:
+    - df (pd.DataFrame): Input data.
+    - group_cols (List[str]): Columns that define the groups.
+
+    Returns:
+    - codes (np.ndarray): Group id per row, in ``[0, len(keys))``.
+    - keys (pd.MultiIndex): Key of every group id, sorted.
+    """
+    grouped = df.groupby(group_cols, sort=True, observed=True, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    keys = grouped.size().index
+    if not isinstance(keys, pd.MultiIndex):
+        keys = pd.MultiIndex.from_arrays([keys], names=group_cols)
+    return codes, keys
+
+
+def group_medians(df: pd.DataFrame, columns: List[str], codes: np.ndarray, n_groups: int) -> pd.DataFrame:
+    """
+    Compute the median of every column within every group in a single grouped pass.
+
+    Groups where a column is entirely missing get NaN, like ``Series.median``.
+    """
+    if not columns:
+        return pd.DataFrame(index=pd.RangeIndex(n_groups))
+    medians = df[columns].groupby(codes).median()
+    return medians.reindex(pd.RangeIndex(n_groups))
+
+
+def group_mode_counts(series: pd.Series, codes: np.ndarray, n_groups: int) -> Tuple[pd.Index, np.ndarray]:
+    """
+    Count every ``(group, value)`` pair of a column with a single ``bincount``.
+
+    Returns:
+    - uniques (pd.Index): Distinct observed values, sorted.
+    - counts (np.ndarray): Array of shape ``(n_groups, len(uniques))``.
+    """
+    value_codes, uniques = pd.factorize(series, sort=True)
+    observed = value_codes >= 0
+    counts = np.bincount(
+        codes[observed] * len(uniques) + value_codes[observed],
+        minlength=n_groups * len(uniques)
+    ).reshape(n_groups, len(uniques))
+    return uniques, counts
+
+
+def modes_from_counts(uniques: pd.Index, counts: np.ndarray) -> pd.Series:
+    """Pick the most frequent value per group (smallest on ties), NaN for groups without values."""
+    n_groups = counts.shape[0]
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=pd.RangeIndex(n_groups), dtype=object)
+    best = counts.argmax(axis=1)
+    has_mode = counts[np.arange(n_groups), best] > 0
+    modes = pd.Series(uniques.take(best), index=pd.RangeIndex(n_groups))
+    return modes.where(has_mode)
+
+
+def group_modes(series: pd.Series, codes: np.ndarray, n_groups: int) -> pd.Series:
+    """
+    Compute the mode of a column within every group from value counts.
+
+    Values are factorized once, counted per ``(group, value)`` with a single
+    ``bincount`` and the most frequent value is picked per group. Ties resolve
+    to the smallest value, matching ``Series.mode().iloc[0]``. Groups where the
+    column is entirely missing get NaN.
+    """
+    return modes_from_counts(*group_mode_counts(series, codes, n_groups))
+
+
+def overall_mode(series: pd.Series):
+    """Return the most frequent value of a column (smallest on ties), or None if it is all missing."""
+    value_codes, uniques = pd.factorize(series, sort=True)
+    observed = value_codes[value_codes >= 0]
+    if observed.size == 0:
+        return None
+    return uniques[np.bincount(observed, minlength=len(uniques)).argmax()]
+
+
+def fill_from_groups(
+    series: pd.Series,
+    group_values: pd.Series,
+    codes: np.ndarray,
+    missing: np.ndarray
+) -> Tuple[pd.Series, int]:
+    """
+    Fill missing entries of ``series`` with the statistic of the row's group.
+
+    Parameters:
+    - series (pd.Series): Column to fill.
+    - group_values (pd.Series): Statistic per group id, as returned by
+      ``group_medians`` or ``group_modes``.
+    - codes (np.ndarray): Group id per row.
+    - missing (np.ndarray): Boolean mask of the missing entries of ``series``.
+
+    Returns:
+    - filled (pd.Series): The filled column.
+    - n_unfilled (int): Entries left missing because their group has no statistic.
+    """
+    row_values = group_values.to_numpy()[codes[missing]]
+    n_unfilled = int(pd.isna(row_values).sum())
+
+    values = series.to_numpy()
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'fO':
+        values = values.copy()
+        values[missing] = row_values
+        return pd.Series(values, index=series.index, name=series.name), n_unfilled
+
+    fill = pd.Series(row_values, index=series.index[missing])
+    return series.fillna(fill), n_unfilled
+
+
+class GroupImputer:
+    """
+    Group-based imputer that learns its statistics once and reuses them.
+
+    ``fit`` learns, per group of ``group_cols``, the median of every numeric
+    column and the mode of every categorical column, plus the fills used for
+    the grouping columns themselves and an overall fallback per column. The
+    statistics form a small lookup table (one row per group) that can be saved
+    and reloaded, so new rows are imputed by a hash lookup on their group key
+    without access to the training data.
+    """
+
+    def __init__(self, group_cols: Optional[List[str]] = None, verbose: bool = False):
+        self.group_cols = group_cols or list(DEFAULT_GROUP_COLS)
+        self.verbose = verbose
+        self.grouping_fill_: Optional[Dict[str, Any]] = None
+        self.statistics_: Optional[pd.DataFrame] = None
+        self.fallback_: Optional[Dict[str, Any]] = None
+        self._records: Optional[Dict[tuple, Dict[str, Any]]] = None
+
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(message)
+
+    def fit(self, df: pd.DataFrame) -> 'GroupImputer':
+        """Learn the imputation statistics from ``df``."""
+        self.fit_transform(df)
+        return self
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Learn the imputation statistics from ``df`` and return it imputed.
+
+        The statistics are those of the training frame: grouping columns are
+        filled with their overall mode (or median) first, then every other
+        column is filled with its group's median or mode, and anything left
+        with the column's overall mode (or median) after the group fill.
+        """
+        df = df.copy()
+
+        self._log("Step 1️⃣: Imputing missing values in grouping columns...")
+        self.grouping_fill_ = {}
+        for col in self.group_cols:
+            value = overall_mode(df[col]) if is_categorical(df[col]) else df[col].median()
+            self.grouping_fill_[col] = value
+            if value is not None and df[col].isnull().any():
+                df[col] = df[col].fillna(value)
+                kind = "mode" if is_categorical(df[col]) else "median"
+                self._log(f"Filled missing values in '{col}' with {kind}: {value}")
+
+        self._log("Step 2️⃣: Imputing missing values in remaining columns...")
+        codes, keys = group_codes(df, self.group_cols)
+        n_groups = len(keys)
+
+        other_cols = [col for col in df.columns if col not in self.group_cols]
+        numeric_cols = [col for col in other_cols if not is_categorical(df[col])]
+        medians = group_medians(df, numeric_cols, codes, n_groups)
+
+        statistics = {}
+        self.fallback_ = {}
+        for i, col in enumerate(df.columns):
+            if col in self.group_cols:
+                continue
+            missing = df[col].isnull().to_numpy()
+            if missing.any():
+                self._log(f"Imputing column: '{col}' ({i+1}/{len(df.columns)})")
+
+            if is_categorical(df[col]):
+                uniques, counts = group_mode_counts(df[col], codes, n_groups)
+                modes = modes_from_counts(uniques, counts)
+                statistics[col] = modes
+                totals = counts.sum(axis=0)
+                if missing.any():
+                    df[col], n_unfilled = fill_from_groups(df[col], modes, codes, missing)
+                    # Rows filled from their group now count towards that group's mode.
+                    filled = counts.argmax(axis=1)[codes[missing]][modes.notna().to_numpy()[codes[missing]]]
+                    totals = totals + np.bincount(filled, minlength=len(uniques))
+                else:
+                    n_unfilled = 0
+                fallback = uniques[totals.argmax()] if totals.sum() > 0 else None
+                self.fallback_[col] = fallback
+                if n_unfilled > 0 and fallback is not None:
+                    df[col] = df[col].fillna(fallback)
+                    self._log(f"Fallback: filled remaining nulls in '{col}' with overall mode.")
+            else:
+                statistics[col] = medians[col]
+                n_unfilled = 0
+                if missing.any():
+                    df[col], n_unfilled = fill_from_groups(df[col], medians[col], codes, missing)
+                fallback = df[col].median()
+                self.fallback_[col] = fallback
+                if n_unfilled > 0:
+                    df[col] = df[col].fillna(fallback)
+                    self._log(f"Fallback: filled remaining nulls in '{col}' with overall median.")
+
+        self.statistics_ = pd.DataFrame(statistics, index=pd.RangeIndex(n_groups), columns=other_cols)
+        self.statistics_.index = keys
+        self._records = None
+        return df
+
+    def _check_fitted(self) -> None:
+        if self.statistics_ is None:
+            raise ValueError("GroupImputer is not fitted yet")
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Impute ``df`` with the learned statistics; groups unseen during fit use the fallbacks."""
+        self._check_fitted()
+        df = df.copy()
+
+        for col, value in self.grouping_fill_.items():
+            if value is not None and col in df.columns:
+                df[col] = df[col].fillna(value)
+
+        # Unknown groups map to -1, which selects the trailing NaN sentinel below.
+        rows = self.statistics_.index.get_indexer(pd.MultiIndex.from_frame(df[self.group_cols]))
+        for col in self.statistics_.columns:
+            if col not in df.columns:
+                continue
+            missing = df[col].isnull().to_numpy()
+            if not missing.any():
+                continue
+            if is_categorical(self.statistics_[col]) and not is_categorical(df[col]):
+                # A chunk where the column is entirely missing is read as float.
+                df[col] = df[col].astype(object)
+            group_values = pd.Series(np.append(self.statistics_[col].to_numpy(dtype=object), np.nan))
+            df[col], n_unfilled = fill_from_groups(df[col], group_values, rows, missing)
+            if n_unfilled > 0 and self.fallback_[col] is not None:
+                df[col] = df[col].fillna(self.fallback_[col])
+        return df
+
+    def transform_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Impute a single row given as a dict, in O(1) per column.
+
+        Only keys present in ``record`` are filled, like ``transform`` only fills
+        the columns of its frame.
+        """
+        self._check_fitted()
+        if self._records is None:
+            self._records = dict(zip(self.statistics_.index, self.statistics_.to_dict('records')))
+
+        record = dict(record)
+        for col, value in self.grouping_fill_.items():
+            if col in record and _is_missing(record[col]) and value is not None:
+                record[col] = value
+
+        group_stats = self._records.get(tuple(record.get(col) for col in self.group_cols), {})
+        for col in self.statistics_.columns:
+            if col not in record or not _is_missing(record[col]):
+                continue
+            value = group_stats.get(col)
+            record[col] = self.fallback_[col] if _is_missing(value) else value
+        return record
+
+    def save(self, path: str) -> None:
+        """Persist the fitted lookup table and fallbacks to ``path``."""
+        self._check_fitted()
+        joblib.dump({
+            'group_cols': self.group_cols,
+            'grouping_fill': self.grouping_fill_,
+            'statistics': self.statistics_,
+            'fallback': self.fallback_
+        }, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'GroupImputer':
+        """Load an imputer saved with ``save``."""
+        state = joblib.load(path)
+        imputer = cls(group_cols=state['group_cols'])
+        imputer.grouping_fill_ = state['grouping_fill']
+        imputer.statistics_ = state['statistics']
+        imputer.fallback_ = state['fallback']
+        return imputer
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (np.isscalar(value) and pd.isna(value))
@@ -1,11 +1,39 @@
 
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.ensemble import IsolationForest
-from sklearn.neighbors import LocalOutlierFactor
-from pyod.models.knn import KNN
+from sklearn.neighbors import LocalOutlierFactor, NearestNeighbors
+
+from ..instrumentation import instrumented
+
+METHODS = ('iforest', 'lof', 'knn')
+
+def select_features(df, method, target='HadHeartAttack'):
+    """
+    Select the columns an outlier detection method works on.
+
+    Parameters:
+        df (pd.DataFrame): The input DataFrame.
+        method (str): One of 'iforest', 'lof', or 'knn'.
+        target (str): Column excluded from the features.
+
+    Returns:
+        list: Feature column names.
+    """
+    # Any integer or float width, so int8-encoded and downcast columns are included
+    if method == 'iforest':
+        features = df.select_dtypes(include=['integer', 'floating']).columns.tolist()
+    elif method in ['lof', 'knn']:
+        features = df.select_dtypes(include=['floating']).columns.tolist()
+    else:
+        raise ValueError("Invalid method. Choose from 'iforest', 'lof', or 'knn'.")
+    return [col for col in features if col != target]
 
+@instrumented('detect_outliers')
 def detect_outliers(df, method='iforest', contamination=0.005, random_state=42, n_neighbors=20, 
                     show_plots=True, boxplot_cols=None, scatterplot_cols=None):
     """
@@ -26,15 +54,7 @@ def detect_outliers(df, method='iforest', contamination=0.005, random_state=42,
     """
     df_copy = df.copy()
 
-    # Select features based on method
-    if method == 'iforest':
-        features = df_copy.select_dtypes(include=['float64', 'int64']).columns.tolist()
-    elif method in ['lof', 'knn']:
-        features = df_copy.select_dtypes(include=['float64']).columns.tolist()
-    else:
-        raise ValueError("Invalid method. Choose from 'iforest', 'lof', or 'knn'.")
-
-    features = [col for col in features if col != 'HadHeartAttack']
+    features = select_features(df_copy, method)
     print(f"🔹 Using {len(features)} features for method '{method}': {features}")
 
     print(f"🔎 Dataset shape before outlier removal: {df_copy.shape}")
@@ -47,6 +67,8 @@ def detect_outliers(df, method='iforest', contamination=0.005, random_state=42,
         model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination)
         preds = model.fit_predict(df_copy[features])
     elif method == 'knn':
+        from pyod.models.knn import KNN
+
         model = KNN(contamination=contamination, n_neighbors=n_neighbors)
         model.fit(df_copy[features])
         preds = model.labels_
@@ -59,30 +81,141 @@ def detect_outliers(df, method='iforest', contamination=0.005, random_state=42,
     print(f"✅ Remaining samples after removal: {df_copy.shape[0] - num_outliers}")
 
     # Visualize
-    if show_plots:
-        # Boxplots
-        if boxplot_cols:
-            for col in boxplot_cols:
-                if col in df_copy.columns:
-                    plt.figure(figsize=(10, 4))
-                    sns.boxplot(x='outlier_label', y=col, data=df_copy, palette='Set2')
-                    plt.title(f"Boxplot of {col} by Outlier Label ({method})")
-                    plt.show()
-
-        # Scatterplot
-        if scatterplot_cols and len(scatterplot_cols) == 2:
-            x, y = scatterplot_cols
-            if x in df_copy.columns and y in df_copy.columns:
-                plt.figure(figsize=(8, 6))
-                sns.scatterplot(
-                    x=df_copy[x],
-                    y=df_copy[y],
-                    hue=df_copy['outlier_label'],
-                    palette='Set2',
-                    alpha=0.3
-                )
-                plt.title(f"Scatter Plot of {x} vs {y} ({method})")
-                plt.show()
+    if show_plots and (boxplot_cols or scatterplot_cols):
+        from ..plotting import plot_outliers
+        plot_outliers(df_copy, method, boxplot_cols, scatterplot_cols)
 
     filtered_df = df_copy[df_copy['outlier'] != -1].drop(columns=['outlier', 'outlier_label'])
     return filtered_df
+
+
+def _outlier_score(model, batch):
+    """Outlier scores of ``batch`` from a fitted detector; higher means more anomalous."""
+    if isinstance(model, NearestNeighbors):
+        return model.kneighbors(batch)[0][:, -1]
+    return -model.score_samples(batch)
+
+
+def _detector_scores(method, matrix_path, columns, fit_idx, n_neighbors, random_state, algorithm, batch_size):
+    """
+    Fit one detector on rows ``fit_idx`` and score every row in batches.
+
+    Runs in a worker process. The features are the ``columns`` positions of the
+    shared float32 matrix at ``matrix_path``, which is memory-mapped read-only,
+    so only the fit sample and one batch are held in memory at a time. Returns
+    outlier scores where higher means more anomalous: the negated
+    ``score_samples`` for IsolationForest and LOF (fitted with ``novelty=True``
+    so unseen rows can be scored), and the distance to the k-th nearest
+    neighbor for KNN, as in PyOD's default ``method='largest'``. Rows of the fit
+    sample count themselves as a neighbor, which shifts their neighborhood by
+    one and is negligible for ranking.
+    """
+    X = np.load(matrix_path, mmap_mode='r')
+    X_fit = X[fit_idx][:, columns]
+    if method == 'iforest':
+        model = IsolationForest(random_state=random_state).fit(X_fit)
+    elif method == 'lof':
+        model = LocalOutlierFactor(n_neighbors=n_neighbors, novelty=True, algorithm=algorithm).fit(X_fit)
+    else:
+        model = NearestNeighbors(n_neighbors=n_neighbors, algorithm=algorithm).fit(X_fit)
+
+    scores = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), batch_size):
+        scores[start:start + batch_size] = _outlier_score(model, X[start:start + batch_size, columns])
+    return scores
+
+
+def outlier_scores(df, methods=METHODS, random_state=42, n_neighbors=20, fit_size=100_000,
+                   batch_size=50_000, algorithm='auto', n_jobs=None):
+    """
+    Score every row with several outlier detectors in parallel and combine them.
+
+    Each detector runs in its own process. The features are written once to a
+    float32 matrix in a temporary file that every worker memory-maps, instead of
+    pickling a copy of the data to each process. Detectors are fitted on a random
+    subsample of at most ``fit_size`` rows and then score the full dataset in
+    batches of ``batch_size`` rows, so memory and neighbor search cost stay
+    bounded on large datasets. LOF and KNN pick their neighbor index with
+    ``algorithm``; 'auto' lets scikit-learn choose a tree index or brute force
+    from the data's size and dimensionality. Because the detectors' scores are on
+    different scales, each is converted to its percentile rank, and the consensus
+    score is the mean rank across detectors.
+
+    Parameters:
+        df (pd.DataFrame): The input DataFrame.
+        methods (tuple): Detectors to run, any of 'iforest', 'lof', 'knn'.
+        random_state (int): Random seed for the subsample and iforest.
+        n_neighbors (int): Number of neighbors (used in LOF and KNN).
+        fit_size (int): Rows the detectors are fitted on; None fits on all rows.
+        batch_size (int): Rows scored at a time.
+        algorithm (str): Neighbor index for LOF and KNN: 'auto', 'kd_tree',
+            'ball_tree' or 'brute'.
+        n_jobs (int): Worker processes; defaults to one per detector.
+
+    Returns:
+        pd.DataFrame: One percentile-rank column per method (1.0 = most anomalous)
+        and a 'consensus' column, indexed like ``df``.
+    """
+    methods = list(methods)
+    for method in methods:
+        select_features(df.head(0), method)
+
+    rng = np.random.default_rng(random_state)
+    n = len(df)
+    fit_idx = np.arange(n) if fit_size is None or fit_size >= n else np.sort(rng.choice(n, fit_size, replace=False))
+    print(f"🔹 Fitting {methods} on {len(fit_idx)} of {n} rows")
+
+    method_features = {method: select_features(df, method) for method in methods}
+    used = set().union(*method_features.values())
+    features = [col for col in df.columns if col in used]
+    positions = {col: k for k, col in enumerate(features)}
+
+    with tempfile.TemporaryDirectory() as tmp, ProcessPoolExecutor(max_workers=n_jobs or len(methods)) as pool:
+        matrix_path = Path(tmp) / 'X.npy'
+        matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float32, shape=(n, len(features)))
+        for start in range(0, n, batch_size):
+            matrix[start:start + batch_size] = df[features].iloc[start:start + batch_size].to_numpy(dtype=np.float32)
+        matrix.flush()
+        del matrix
+
+        futures = {
+            method: pool.submit(
+                _detector_scores, method, matrix_path, [positions[col] for col in method_features[method]],
+                fit_idx, n_neighbors, random_state, algorithm, batch_size
+            )
+            for method in methods
+        }
+        scores = pd.DataFrame({method: future.result() for method, future in futures.items()}, index=df.index)
+
+    ranks = scores.rank(pct=True)
+    ranks['consensus'] = ranks[methods].mean(axis=1)
+    return ranks
+
+
+@instrumented('detect_outliers_consensus')
+def detect_outliers_consensus(df, methods=METHODS, contamination=0.005, random_state=42, n_neighbors=20,
+                              fit_size=100_000, batch_size=50_000, algorithm='auto', n_jobs=None):
+    """
+    Remove the rows with the highest consensus outlier score of several detectors.
+
+    See ``outlier_scores`` for how the detectors are run and combined. The
+    ``contamination`` fraction of rows with the highest consensus score is removed.
+
+    Returns:
+        tuple: (filtered DataFrame, consensus score Series for all input rows)
+    """
+    print(f"🔎 Dataset shape before outlier removal: {df.shape}")
+    consensus = outlier_scores(
+        df, methods, random_state=random_state, n_neighbors=n_neighbors, fit_size=fit_size,
+        batch_size=batch_size, algorithm=algorithm, n_jobs=n_jobs
+    )['consensus']
+
+    num_outliers = int(round(contamination * len(df)))
+    # Stable sort so ties are broken by row position
+    order = np.argsort(-consensus.to_numpy(), kind='stable')
+    is_outlier = np.zeros(len(df), dtype=bool)
+    is_outlier[order[:num_outliers]] = True
+
+    print(f"🚫 Detected outliers: {num_outliers}")
+    print(f"✅ Remaining samples after removal: {len(df) - num_outliers}")
+    return df[~is_outlier], consensus
@@ -1,119 +1,233 @@
+import warnings
+
+import joblib
 import numpy as np
 import pandas as pd
-from scipy import stats
-from scipy.stats import mstats, zscore, boxcox, shapiro, probplot
-import matplotlib.pyplot as plt
-import seaborn as sns
+from scipy import special
+
+from ..instrumentation import instrumented
 
 
 def winsorization(df, column, lower_percentile=0.01, upper_percentile=0.01):
     """
     Winsorization: Capping outliers at the specified percentiles.
     """
-    df_transformed = df.copy(deep=True) 
-    df_transformed[column] = mstats.winsorize(df_transformed[column], limits=[lower_percentile, upper_percentile])
-    return df_transformed
+    plan = {column: ('winsorization', {'lower_percentile': lower_percentile, 'upper_percentile': upper_percentile})}
+    return OutlierTransformer(plan).fit_transform(df)
 
 def log_transformation(df, column):
     """
     Log Transformation: Apply log(x+1) to handle skewed distributions.
     """
-    df_transformed = df.copy(deep=True) 
-    df_transformed[column] = np.log1p(df_transformed[column])  # log(x+1) to handle zeros and negative values
-    return df_transformed
+    return OutlierTransformer({column: 'log'}).fit_transform(df)
 
 def z_score_transformation(df, column, threshold=3):
     """
     Z-Score Transformation: Replace outliers with the threshold value.
     """
-    df_transformed = df.copy(deep=True) 
-    df_transformed['z_score'] = zscore(df_transformed[column])
-    df_transformed[column] = np.where(df_transformed['z_score'] > threshold, threshold, 
-                                      np.where(df_transformed['z_score'] < -threshold, -threshold, df_transformed[column]))
-    return df_transformed
+    return OutlierTransformer({column: ('z_score', {'threshold': threshold})}).fit_transform(df)
 
 def iqr_transformation(df, column):
     """
     IQR (Interquartile Range) Transformation: Cap values outside the IQR boundaries.
     """
-    df_transformed = df.copy(deep=True) 
-    Q1 = df_transformed[column].quantile(0.25)
-    Q3 = df_transformed[column].quantile(0.75)
-    IQR = Q3 - Q1
-    
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    
-    df_transformed[column] = np.where(df_transformed[column] < lower_bound, lower_bound, 
-                                      np.where(df_transformed[column] > upper_bound, upper_bound, df_transformed[column]))
-    return df_transformed
+    return OutlierTransformer({column: 'iqr'}).fit_transform(df)
 
 def boxcox_transformation(df, column):
     """
     Box-Cox Transformation: Apply Box-Cox transformation to normalize the data.
     """
-    df_transformed = df.copy(deep=True) 
-    df_transformed[column], _ = boxcox(df_transformed[column] + 1)  # Box-Cox needs strictly positive values, so add 1 if necessary
-    return df_transformed
+    return OutlierTransformer({column: 'boxcox'}).fit_transform(df)
 
+@instrumented('transform_outliers')
 def transform_outliers(df, column, method='winsorization', **kwargs):
     """
     Main function to choose the outlier handling method.
     """
-    if method == 'winsorization':
-        return winsorization(df, column, **kwargs)
-    elif method == 'log':
-        return log_transformation(df, column)
-    elif method == 'z_score':
-        return z_score_transformation(df, column, **kwargs)
-    elif method == 'iqr':
-        return iqr_transformation(df, column)
-    elif method == 'boxcox':
-        return boxcox_transformation(df, column)
-    else:
+    if method not in METHODS:
         raise ValueError(f"Method '{method}' is not supported!")
-    
-def plot_transformed(df, column, transformed_df, transformed_column, method):
-    """
-    Plot the original and transformed data as separate images.
-    """
-    plt.figure(figsize=(14, 6))
+    return OutlierTransformer({column: (method, kwargs)}).fit_transform(df)
 
-    # Plot Original Data (Before Transformation)
-    plt.subplot(1, 2, 1)
-    sns.kdeplot(df[column], fill=True, color='blue', alpha=0.5, linewidth=2)
-    plt.title(f'Original {column} - Distribution')
-    plt.xlabel(column)
-    plt.ylabel('Density')
 
-    # Boxplot of Original Data
-    plt.subplot(1, 2, 2)
-    sns.boxplot(x=df[column], palette='Set2')
-    plt.title(f'Original {column} - Boxplot')
+METHODS = ('winsorization', 'log', 'z_score', 'iqr', 'boxcox')
+DEFAULT_PARAMS = {
+    'winsorization': {'lower_percentile': 0.01, 'upper_percentile': 0.01},
+    'log': {},
+    'z_score': {'threshold': 3},
+    'iqr': {},
+    'boxcox': {},
+}
 
-    plt.tight_layout()
-    plt.show()
 
-    # Plot Transformed Data (After Transformation)
-    plt.figure(figsize=(14, 6))
+def _winsor_bounds(values, lower_percentile, upper_percentile):
+    """
+    Capping values of ``mstats.winsorize``: the order statistics at the same
+    positions, found with one partial sort instead of a full argsort. Without
+    values there is nothing to cap and both bounds are None.
+    """
+    n = len(values)
+    if n == 0:
+        return None, None
+    low_k = int(lower_percentile * n)
+    high_k = n - int(n * upper_percentile) - 1
+    part = np.partition(values, [low_k, high_k])
+    return (part[low_k] if lower_percentile else None,
+            part[high_k] if upper_percentile else None)
 
-    # Distribution (KDE) of Transformed Data
-    plt.subplot(1, 2, 1)
-    sns.kdeplot(transformed_df[transformed_column], fill=True, color='red', alpha=0.5, linewidth=2)
-    plt.title(f'{method} - Transformed {column} - Distribution')
-    plt.xlabel(column)
-    plt.ylabel('Density')
 
-    # Boxplot of Transformed Data
-    plt.subplot(1, 2, 2)
-    sns.boxplot(x=transformed_df[transformed_column], palette='Set2')
-    plt.title(f'{method} - Transformed {column} - Boxplot')
+class OutlierTransformer:
+    """
+    Fitted outlier transformation for several columns at once.
+
+    The plan maps each column to a method name ('winsorization', 'log', 'z_score',
+    'iqr' or 'boxcox'), or to a ``(method, kwargs)`` tuple with the keyword
+    arguments of the matching single-column helper. ``fit`` computes every cap,
+    mean/std and Box-Cox lambda from the training data (the IQR quartiles of all
+    IQR columns in one call), and ``transform`` applies them without recomputing
+    any statistic, so the same caps are used at scoring time. Missing values are
+    ignored when fitting and left as they are.
+
+    A column without values to fit on (empty or all missing) gets no caps and
+    is left unchanged by the capping methods, as is a ``z_score`` column
+    without variation. Box-Cox has no such fallback and raises a ValueError
+    for a column with fewer than two distinct values.
+    """
 
-    plt.tight_layout()
-    plt.show()
+    def __init__(self, plan):
+        self.plan = {}
+        for column, spec in plan.items():
+            method, kwargs = (spec, {}) if isinstance(spec, str) else spec
+            if method not in METHODS:
+                raise ValueError(f"Method '{method}' is not supported!")
+            self.plan[column] = (method, {**DEFAULT_PARAMS[method], **kwargs})
+        self.params_ = None
+
+    def fit(self, df, y=None):
+        """
+        Compute the transformation parameters of every planned column.
+
+        Parameters:
+            df (pd.DataFrame): Training data.
+
+        Returns:
+            OutlierTransformer: The fitted transformer.
+        """
+        params = {}
+
+        iqr_cols = [col for col, (method, _) in self.plan.items() if method == 'iqr']
+        if iqr_cols:
+            block = df[iqr_cols].to_numpy(dtype=np.float64)
+            # All-missing columns get NaN quartiles, turned into no caps below
+            quartiles = np.full((2, len(iqr_cols)), np.nan)
+            if len(block):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    quartiles = np.nanquantile(block, [0.25, 0.75], axis=0)
+            for col, q1, q3 in zip(iqr_cols, *quartiles):
+                if np.isnan(q1):
+                    params[col] = {'lower': None, 'upper': None}
+                else:
+                    params[col] = {'lower': q1 - 1.5 * (q3 - q1), 'upper': q3 + 1.5 * (q3 - q1)}
+
+        z_cols = [col for col, (method, _) in self.plan.items() if method == 'z_score']
+        if z_cols:
+            block = df[z_cols].to_numpy(dtype=np.float64)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                means, stds = np.nanmean(block, axis=0), np.nanstd(block, axis=0)
+            for col, mean, std in zip(z_cols, means, stds):
+                params[col] = {'mean': mean, 'std': std, 'threshold': self.plan[col][1]['threshold']}
+
+        for col, (method, kwargs) in self.plan.items():
+            if method == 'winsorization':
+                values = df[col].dropna().to_numpy()
+                lower, upper = _winsor_bounds(values, kwargs['lower_percentile'], kwargs['upper_percentile'])
+                params[col] = {'lower': lower, 'upper': upper}
+            elif method == 'boxcox':
+                from scipy.stats import boxcox
+
+                values = df[col].dropna().to_numpy(dtype=np.float64)
+                if len(np.unique(values)) < 2:
+                    raise ValueError(f"Box-Cox needs at least two distinct values in column '{col}'")
+                # Box-Cox needs strictly positive values, so add 1 if necessary
+                _, lmbda = boxcox(values + 1)
+                params[col] = {'lmbda': lmbda}
+            elif method == 'log':
+                params[col] = {}
+
+        self.params_ = params
+        return self
+
+    def _apply(self, column, values):
+        method, _ = self.plan[column]
+        params = self.params_[column]
+        if method in ('winsorization', 'iqr'):
+            if params['lower'] is None and params['upper'] is None:
+                return values
+            return np.clip(values, params['lower'], params['upper'])
+        if method == 'log':
+            return np.log1p(values)  # log(x+1) to handle zeros and negative values
+        if method == 'z_score':
+            # No variation (or no values) to measure deviations against
+            if not params['std'] > 0:
+                return values
+            threshold = params['threshold']
+            z = (values - params['mean']) / params['std']
+            return np.where(z > threshold, threshold, np.where(z < -threshold, -threshold, values))
+        return special.boxcox(values + 1, params['lmbda'])
+
+    def transform(self, df, copy=True):
+        """
+        Apply the fitted transformations.
+
+        Parameters:
+            df (pd.DataFrame): Data with the planned columns.
+            copy (bool): Return a new DataFrame (sharing the untouched columns)
+                instead of replacing the columns of ``df`` in place.
+
+        Returns:
+            pd.DataFrame: The transformed data.
+        """
+        if self.params_ is None:
+            raise ValueError("OutlierTransformer is not fitted yet")
+        out = df.copy(deep=False) if copy else df
+        for column in self.plan:
+            out[column] = self._apply(column, out[column].to_numpy())
+        return out
+
+    def fit_transform(self, df, y=None, copy=True):
+        return self.fit(df).transform(df, copy=copy)
+
+    def transform_record(self, record):
+        """Transform a single row given as a dict; absent columns are skipped."""
+        if self.params_ is None:
+            raise ValueError("OutlierTransformer is not fitted yet")
+        transformed = dict(record)
+        for column in self.plan:
+            if column in record and record[column] is not None and not pd.isna(record[column]):
+                transformed[column] = float(self._apply(column, np.float64(record[column])))
+        return transformed
+
+    def save(self, path):
+        """Persist the fitted transformer with joblib."""
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a transformer saved with ``save``."""
+        return joblib.load(path)
+    
+def plot_transformed(df, column, transformed_df, transformed_column, method):
+    """
+    Plot the original and transformed data as separate images; see ``src.plotting``.
+    """
+    from ..plotting import plot_transformed as plot
+    plot(df, column, transformed_df, transformed_column, method)
 
 # Shapiro-Wilk test for normality
 def check_normality(df, column, method):
+    from scipy.stats import shapiro
+
     stat, p_value = shapiro(df[column])
     print(f"Shapiro-Wilk Test ({method}): Statistic = {stat}, p-value = {p_value}")
     if p_value > 0.05:
@@ -123,20 +237,5 @@ def check_normality(df, column, method):
 
 # QQ plot to visually inspect normality
 def qq_plot(df, column, method, palette='Set2'):
-
-    # Create the QQ plot
-    plt.figure(figsize=(12, 12))
-    
-    # Generate the QQ plot (this will return values for quantiles and theoretical quantiles)
-    res = stats.probplot(df[column], dist="norm", plot=plt)
-    
-    # Extract the points (x, y) from the QQ plot for further customization
-    line = res[0]
-    
-    plt.scatter(line[0], line[1], color= '#66c2a5', label=f'{method} Transformation')
-
-    # Set plot title and labels
-    plt.title(f"QQ Plot of {column} ({method} Transformation)")
-    plt.legend()
-
-    plt.show()
+    from ..plotting import qq_plot as plot
+    plot(df, column, method, palette)
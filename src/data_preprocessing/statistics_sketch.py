@@ -0,0 +1,250 @@
+"""Mergeable group statistics for imputing datasets that do not fit in memory."""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .imputation import DEFAULT_GROUP_COLS, GroupImputer, group_codes, is_categorical
+
+VALUE = '__value'
+COUNT = '__count'
+
+
+class GroupStatisticsSketch:
+    """
+    Accumulate the statistics of ``GroupImputer`` over chunks of rows.
+
+    Every column is summarised by counts per ``(group key, value)``. Modes of
+    categorical columns are exact. Numeric columns keep exact value counts until
+    they exceed ``max_exact_values`` distinct values; after that values are
+    mapped to logarithmic buckets with a relative error of at most
+    ``relative_accuracy``, so medians become approximate but the sketch size no
+    longer grows with the data. Sketches built on separate chunks can be
+    combined with ``merge``.
+    """
+
+    def __init__(
+        self,
+        group_cols: Optional[List[str]] = None,
+        relative_accuracy: float = 0.01,
+        max_exact_values: int = 2048
+    ):
+        self.group_cols = group_cols or list(DEFAULT_GROUP_COLS)
+        self.relative_accuracy = relative_accuracy
+        self.max_exact_values = max_exact_values
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.n_rows = 0
+        self.columns: List[str] = []
+        self.kinds: Dict[str, str] = {}
+        self.bucketed: Dict[str, bool] = {}
+        self.counts: Dict[str, pd.Series] = {}
+        self.missing: Dict[str, pd.Series] = {}
+        self.group_sizes: Optional[pd.Series] = None
+
+    def update(self, chunk: pd.DataFrame) -> 'GroupStatisticsSketch':
+        """Add the rows of ``chunk`` to the sketch."""
+        if chunk.empty:
+            return self
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns.append(col)
+
+        codes, keys = group_codes(chunk, self.group_cols)
+        sizes = pd.Series(np.bincount(codes, minlength=len(keys)), index=keys)
+        self.group_sizes = _add_counts(self.group_sizes, sizes)
+
+        for col in chunk.columns:
+            series = chunk[col]
+            missing = series.isnull().to_numpy()
+            if col not in self.group_cols and missing.any():
+                missing_sizes = pd.Series(np.bincount(codes[missing], minlength=len(keys)), index=keys)
+                self.missing[col] = _add_counts(self.missing.get(col), missing_sizes[missing_sizes > 0])
+            if missing.all():
+                continue
+
+            if col not in self.kinds:
+                self.kinds[col] = 'categorical' if is_categorical(series) else 'numeric'
+                self.bucketed[col] = False
+            values = series[~missing]
+            if self.bucketed[col]:
+                values = pd.Series(self._bucket(values.to_numpy(dtype=float)), index=values.index)
+            chunk_counts = _pair_counts(codes[~missing], keys, values)
+            self.counts[col] = _add_counts(self.counts.get(col), chunk_counts)
+            self._compact(col)
+
+        self.n_rows += len(chunk)
+        return self
+
+    def merge(self, other: 'GroupStatisticsSketch') -> 'GroupStatisticsSketch':
+        """Fold the counts of another sketch with the same settings into this one."""
+        for col in other.columns:
+            if col not in self.columns:
+                self.columns.append(col)
+        self.group_sizes = _add_counts(self.group_sizes, other.group_sizes)
+        for col, counts in other.missing.items():
+            self.missing[col] = _add_counts(self.missing.get(col), counts)
+        for col, counts in other.counts.items():
+            self.kinds.setdefault(col, other.kinds[col])
+            if other.bucketed[col] and not self.bucketed.get(col, False):
+                self._to_buckets(col)
+            elif self.bucketed.get(col, False) and not other.bucketed[col]:
+                counts = _map_values(counts, self._bucket)
+            self.bucketed.setdefault(col, other.bucketed[col])
+            self.counts[col] = _add_counts(self.counts.get(col), counts)
+            self._compact(col)
+        self.n_rows += other.n_rows
+        return self
+
+    def _bucket(self, values: np.ndarray) -> np.ndarray:
+        """Map values to the representative of their logarithmic bucket."""
+        out = np.zeros(len(values), dtype=float)
+        magnitude = np.abs(values)
+        nonzero = magnitude > 0
+        log_gamma = np.log(self._gamma)
+        index = np.ceil(np.log(magnitude[nonzero]) / log_gamma)
+        out[nonzero] = np.sign(values[nonzero]) * 2 * np.exp(index * log_gamma) / (self._gamma + 1)
+        return out
+
+    def _to_buckets(self, col: str) -> None:
+        if col in self.counts:
+            self.counts[col] = _map_values(self.counts[col], self._bucket)
+        self.bucketed[col] = True
+
+    def _compact(self, col: str) -> None:
+        if self.kinds[col] != 'numeric' or self.bucketed[col]:
+            return
+        if self.counts[col].index.get_level_values(VALUE).nunique() > self.max_exact_values:
+            self._to_buckets(col)
+
+    def to_imputer(self) -> GroupImputer:
+        """Build a fitted ``GroupImputer`` equivalent to fitting on all rows seen so far."""
+        if self.group_sizes is None:
+            raise ValueError("GroupStatisticsSketch has not seen any rows")
+
+        grouping_fill = {}
+        for col in self.group_cols:
+            totals = self.counts[col].groupby(level=VALUE).sum() if col in self.counts else pd.Series(dtype=float)
+            if totals.empty:
+                grouping_fill[col] = None
+            elif self.kinds[col] == 'categorical':
+                grouping_fill[col] = _modes(totals.reset_index(name=COUNT), [])
+            else:
+                grouping_fill[col] = _medians(totals.reset_index(name=COUNT), [])
+
+        keys = self._fill_keys(self.group_sizes, grouping_fill).index.sort_values()
+
+        statistics = {}
+        fallback = {}
+        for col in self.columns:
+            if col in self.group_cols:
+                continue
+            if col not in self.counts:
+                statistics[col] = pd.Series(np.nan, index=keys)
+                fallback[col] = None
+                continue
+
+            counts = self._fill_keys(self.counts[col], grouping_fill).reset_index(name=COUNT)
+            if self.kinds[col] == 'categorical':
+                group_stats = _modes(counts, self.group_cols).reindex(keys)
+            else:
+                group_stats = _medians(counts, self.group_cols).reindex(keys)
+            statistics[col] = group_stats
+
+            # Fallbacks are taken after the group fill, so each group's missing
+            # rows count towards that group's statistic.
+            totals = counts[[VALUE, COUNT]]
+            if col in self.missing:
+                missing = self._fill_keys(self.missing[col], grouping_fill)
+                filled = pd.DataFrame({
+                    VALUE: group_stats.reindex(missing.index).to_numpy(),
+                    COUNT: missing.to_numpy()
+                }).dropna(subset=[VALUE])
+                totals = pd.concat([totals, filled], ignore_index=True)
+            if self.kinds[col] == 'categorical':
+                fallback[col] = _modes(totals, [])
+            else:
+                fallback[col] = _medians(totals, [])
+
+        imputer = GroupImputer(group_cols=self.group_cols)
+        imputer.grouping_fill_ = grouping_fill
+        imputer.statistics_ = pd.DataFrame(statistics, index=keys)
+        imputer.fallback_ = fallback
+        return imputer
+
+    def _fill_keys(self, counts: pd.Series, grouping_fill: Dict) -> pd.Series:
+        """Replace missing grouping keys with their fills and re-aggregate the counts."""
+        levels = list(counts.index.names)
+        frame = counts.rename(COUNT).reset_index()
+        for col in self.group_cols:
+            if grouping_fill[col] is not None:
+                frame[col] = frame[col].fillna(grouping_fill[col])
+        counts = frame.groupby(levels, sort=True, dropna=False)[COUNT].sum()
+        counts.index = _as_multiindex(counts.index, levels)
+        return counts
+
+
+def _pair_counts(codes: np.ndarray, keys: pd.MultiIndex, values: pd.Series) -> pd.Series:
+    """Count ``(group, value)`` pairs of one chunk as a Series indexed by group key and value."""
+    value_codes, uniques = pd.factorize(values)
+    pairs, counts = np.unique(codes * len(uniques) + value_codes, return_counts=True)
+    group_ids, value_ids = np.divmod(pairs, len(uniques))
+    arrays = [keys.get_level_values(i).take(group_ids) for i in range(keys.nlevels)]
+    arrays.append(uniques.take(value_ids))
+    index = pd.MultiIndex.from_arrays(arrays, names=list(keys.names) + [VALUE])
+    return pd.Series(counts, index=index)
+
+
+def _add_counts(left: Optional[pd.Series], right: pd.Series) -> pd.Series:
+    if left is None:
+        return right
+    levels = list(right.index.names)
+    return pd.concat([left, right]).groupby(level=levels, sort=False, dropna=False).sum()
+
+
+def _map_values(counts: pd.Series, func) -> pd.Series:
+    """Apply ``func`` to the value level of a counts Series and re-aggregate."""
+    frame = counts.rename(COUNT).reset_index()
+    frame[VALUE] = func(frame[VALUE].to_numpy(dtype=float))
+    levels = list(counts.index.names)
+    return frame.groupby(levels, sort=False, dropna=False)[COUNT].sum()
+
+
+def _modes(frame: pd.DataFrame, by: List[str]):
+    """Most frequent value per group of ``by`` (smallest on ties) from a value/count frame."""
+    frame = frame.groupby(by + [VALUE], sort=False, as_index=False)[COUNT].sum()
+    ordered = frame.sort_values(by + [COUNT, VALUE], ascending=[True] * len(by) + [False, True])
+    if not by:
+        return ordered[VALUE].iloc[0]
+    first = ordered.drop_duplicates(by)
+    return pd.Series(first[VALUE].to_numpy(), index=pd.MultiIndex.from_frame(first[by]))
+
+
+def _medians(frame: pd.DataFrame, by: List[str]):
+    """Weighted median per group of ``by``, averaging the two middle values like ``Series.median``."""
+    ordered = frame.sort_values(by + [VALUE])
+    weights = ordered[COUNT].to_numpy(dtype=float)
+    if by:
+        cumulative = ordered.groupby(by, sort=False)[COUNT].cumsum().to_numpy(dtype=float)
+        totals = ordered.groupby(by, sort=False)[COUNT].transform('sum').to_numpy(dtype=float)
+    else:
+        cumulative = np.cumsum(weights)
+        totals = np.full(len(weights), weights.sum())
+    previous = cumulative - weights
+    lower = np.floor((totals - 1) / 2)
+    upper = np.ceil((totals - 1) / 2)
+    is_lower = (previous <= lower) & (lower < cumulative)
+    is_upper = (previous <= upper) & (upper < cumulative)
+
+    middle = pd.concat([ordered.loc[is_lower], ordered.loc[is_upper]])
+    if not by:
+        return middle[VALUE].astype(float).mean()
+    medians = middle.groupby(by, sort=True)[VALUE].mean()
+    medians.index = _as_multiindex(medians.index, by)
+    return medians
+
+
+def _as_multiindex(index: pd.Index, names: List[str]) -> pd.MultiIndex:
+    if isinstance(index, pd.MultiIndex):
+        return index
+    return pd.MultiIndex.from_arrays([index], names=names)
@@ -0,0 +1,188 @@
+"""Schema-driven dtype planning so datasets are loaded with their narrowest types.
+
+A plan maps every column to the narrowest dtype that holds its values: the
+smallest integer type for the observed range, ``float32`` where the float64
+values survive the round trip within a relative tolerance, and ``category`` for
+strings. Plans are built from column profiles, which are computed either on a
+frame already in memory or chunk by chunk over a file, so the file is then read
+once with the planned dtypes and the wide types are never allocated for the
+full frame.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data_io import is_parquet, iter_dataset, read_dataset
+
+UNSIGNED_TYPES = [np.uint8, np.uint16, np.uint32, np.uint64]
+SIGNED_TYPES = [np.int8, np.int16, np.int32, np.int64]
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def narrowest_int(min_val: float, max_val: float) -> str:
+    """Return the smallest integer dtype holding ``[min_val, max_val]``, unsigned when possible."""
+    candidates = UNSIGNED_TYPES if min_val >= 0 else SIGNED_TYPES
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= min_val and max_val <= info.max:
+            return np.dtype(dtype).name
+    return 'int64'
+
+
+def profile_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarise every column of ``df`` for dtype planning.
+
+    Statistics are computed for all numeric columns at once rather than column by
+    column.
+
+    Returns:
+    - pd.DataFrame: One row per column with ``kind`` ('int', 'float', 'string' or
+      'other'), ``min``, ``max``, ``float32_error`` (largest relative error of a
+      float32 round trip), ``has_missing`` and ``bytes`` (current memory usage).
+    """
+    profile = pd.DataFrame(index=pd.Index(df.columns, name='column'))
+    kinds = []
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            kinds.append('other')
+        elif pd.api.types.is_integer_dtype(dtype):
+            kinds.append('int')
+        elif pd.api.types.is_float_dtype(dtype):
+            kinds.append('float')
+        elif dtype == 'object' or pd.api.types.is_string_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            kinds.append('string')
+        else:
+            kinds.append('other')
+    profile['kind'] = kinds
+
+    numeric = [col for col, kind in zip(df.columns, kinds) if kind in ('int', 'float')]
+    profile['min'] = df[numeric].min().reindex(profile.index).astype(float)
+    profile['max'] = df[numeric].max().reindex(profile.index).astype(float)
+
+    floats = [col for col, kind in zip(df.columns, kinds) if kind == 'float']
+    profile['float32_error'] = 0.0
+    if floats and len(df):
+        values = df[floats].to_numpy(dtype=np.float64)
+        with np.errstate(over='ignore', invalid='ignore'):
+            rounded = values.astype(np.float32).astype(np.float64)
+            error = np.abs(rounded - values) / np.maximum(np.abs(values), np.finfo(np.float64).tiny)
+        profile.loc[floats, 'float32_error'] = np.nan_to_num(np.nanmax(error, axis=0, initial=0.0), nan=np.inf)
+
+    profile['has_missing'] = df.isnull().any().reindex(profile.index)
+    profile['bytes'] = df.memory_usage(deep=True, index=False).reindex(profile.index)
+    return profile
+
+
+def merge_profiles(left: Optional[pd.DataFrame], right: pd.DataFrame) -> pd.DataFrame:
+    """Combine the profiles of two chunks of the same dataset."""
+    if left is None:
+        return right
+    merged = left.copy()
+    merged['min'] = np.fmin(left['min'], right['min'])
+    merged['max'] = np.fmax(left['max'], right['max'])
+    merged['float32_error'] = np.fmax(left['float32_error'], right['float32_error'])
+    merged['has_missing'] = left['has_missing'] | right['has_missing']
+    merged['bytes'] = left['bytes'] + right['bytes']
+    # A column that is integral in one chunk but float in another (missing values) is float.
+    merged.loc[(left['kind'] == 'float') | (right['kind'] == 'float'), 'kind'] = 'float'
+    return merged
+
+
+def plan_from_profile(profile: pd.DataFrame, float_tolerance: float = 1e-6) -> Dict[str, str]:
+    """
+    Choose the narrowest dtype for every profiled column.
+
+    Parameters:
+    - profile (pd.DataFrame): Output of ``profile_frame`` / ``profile_file``.
+    - float_tolerance (float): Largest relative error accepted when storing a
+      float64 column as float32.
+
+    Returns:
+    - Dict[str, str]: Mapping of column name to dtype name.
+    """
+    plan = {}
+    for col, row in profile.iterrows():
+        if row['kind'] == 'int':
+            plan[col] = narrowest_int(row['min'], row['max'])
+        elif row['kind'] == 'float':
+            fits = max(abs(row['min']), abs(row['max'])) <= FLOAT32_MAX if pd.notna(row['min']) else True
+            plan[col] = 'float32' if fits and row['float32_error'] <= float_tolerance else 'float64'
+        elif row['kind'] == 'string':
+            plan[col] = 'category'
+    return plan
+
+
+def profile_file(
+    path: str,
+    schema: Optional[Dict[str, str]] = None,
+    columns: Optional[List[str]] = None,
+    chunksize: int = 100_000
+) -> pd.DataFrame:
+    """
+    Profile a dataset chunk by chunk, holding at most ``chunksize`` rows at a time.
+
+    The ``bytes`` column adds up the memory the chunks take with the schema's
+    dtypes, i.e. what loading the whole file with those dtypes would need.
+    """
+    profile = None
+    for chunk in iter_dataset(path, chunksize, columns=columns, dtype=schema):
+        profile = merge_profiles(profile, profile_frame(chunk))
+    if profile is None:
+        raise ValueError(f"No rows found in '{path}'")
+    return profile
+
+
+def plan_dtypes(
+    path: str,
+    schema: Optional[Dict[str, str]] = None,
+    columns: Optional[List[str]] = None,
+    float_tolerance: float = 1e-6,
+    chunksize: int = 100_000
+) -> Dict[str, str]:
+    """Profile ``path`` in chunks and return the dtype plan to load it with."""
+    profile = profile_file(path, schema=schema, columns=columns, chunksize=chunksize)
+    return plan_from_profile(profile, float_tolerance)
+
+
+def read_planned(path: str, plan: Dict[str, str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a dataset with the dtypes of ``plan``.
+
+    CSV files are parsed straight into the planned dtypes. Parquet files are cast
+    after loading unless they were written with the plan already.
+    """
+    df = read_dataset(path, columns=columns, schema=plan)
+    if is_parquet(path):
+        changed = {col: dtype for col, dtype in plan.items() if col in df.columns and str(df[col].dtype) != dtype}
+        if changed:
+            df = df.astype(changed)
+    return df
+
+
+def format_memory_report(before_bytes: float, after_bytes: float) -> str:
+    """Describe a change in memory usage, e.g. ``245.1 MB -> 61.3 MB (4.0x smaller)``."""
+    ratio = before_bytes / after_bytes if after_bytes else float('inf')
+    return f"{before_bytes / 1024 ** 2:.1f} MB -> {after_bytes / 1024 ** 2:.1f} MB ({ratio:.1f}x smaller)"
+
+
+def optimize_dtypes(df: pd.DataFrame, float_tolerance: float = 1e-6, verbose: bool = True) -> pd.DataFrame:
+    """
+    Return ``df`` cast to its narrowest dtypes, reporting memory before and after.
+
+    Parameters:
+    - df (pd.DataFrame): Input data.
+    - float_tolerance (float): Largest relative error accepted for float32.
+    - verbose (bool): Print the memory report.
+    """
+    profile = profile_frame(df)
+    plan = plan_from_profile(profile, float_tolerance)
+    changed = {col: dtype for col, dtype in plan.items() if str(df[col].dtype) != dtype}
+    optimized = df.astype(changed) if changed else df
+    if verbose:
+        after = optimized.memory_usage(deep=True, index=False).sum()
+        print(f"💾 Memory usage: {format_memory_report(profile['bytes'].sum(), after)}")
+    return optimized
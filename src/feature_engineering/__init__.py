@@ -1,15 +1,38 @@
-"""Feature engineering package for heart attack prediction."""
+"""Feature engineering package for heart attack prediction.
 
-from .feature_engineering import (
-    create_interaction_features,
-    create_polynomial_features,
-    engineer_features
-)
-from ..data_preprocessing.encoding import encode_features
+The exported names are loaded on first access (PEP 562).
+"""
+
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    'FeatureEngineer': '.feature_engineering',
+    'build_features': '.feature_engineering',
+    'create_interaction_features': '.feature_engineering',
+    'create_polynomial_features': '.feature_engineering',
+    'engineer_features': '.feature_engineering',
+    'prune_correlated_features': '.feature_selection',
+    'encode_features': '..data_preprocessing.encoding',
+}
 
 __all__ = [
+    'FeatureEngineer',
+    'build_features',
     'create_interaction_features',
     'create_polynomial_features',
     'engineer_features',
+    'prune_correlated_features',
     'encode_features'
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
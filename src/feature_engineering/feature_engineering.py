@@ -1,80 +1,459 @@
 """Feature engineering module for heart attack prediction model."""
 
+from itertools import combinations, combinations_with_replacement
+
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import PolynomialFeatures
 from ..config import FEATURE_CONFIG
+from ..data_io import DatasetWriter, iter_dataset
+from ..instrumentation import instrumented
+
+OUTPUTS = ('dense', 'sparse', 'lazy')
+
+
+def interaction_terms(features):
+    """List the pairwise interaction features as (name, feature indices) tuples.
+
+    Args:
+        features (list): Feature names
+
+    Returns:
+        list: ``(f"{feat1}_{feat2}_interaction", (i, j))`` for every pair i < j
+    """
+    return [
+        (f"{features[i]}_{features[j]}_interaction", (i, j))
+        for i, j in combinations(range(len(features)), 2)
+    ]
+
+
+def polynomial_terms(features, degree):
+    """List the polynomial features of degree 2..``degree`` as (name, feature indices) tuples.
+
+    Terms follow the order and naming of sklearn's ``PolynomialFeatures`` (without
+    the bias and degree-1 terms), with spaces replaced by underscores and a
+    ``_poly`` suffix, e.g. ``BMI^2_poly`` or ``BMI_SleepHours_poly``.
+
+    Args:
+        features (list): Feature names
+        degree (int): Highest polynomial degree
+
+    Returns:
+        list: ``(name, indices)`` where ``indices`` holds one feature index per factor
+    """
+    terms = []
+    for d in range(2, degree + 1):
+        for combo in combinations_with_replacement(range(len(features)), d):
+            powers = np.bincount(combo, minlength=len(features))
+            parts = [
+                name if power == 1 else f"{name}^{power}"
+                for name, power in zip(features, powers) if power
+            ]
+            terms.append(('_'.join(parts).replace(' ', '_') + '_poly', combo))
+    return terms
+
+
+class PolynomialFeatureView:
+    """Lazy view of a dataframe extended with product features.
+
+    Product columns are only computed when accessed, one column or one batch of
+    rows at a time, so wide polynomial expansions never have to be materialised.
+
+    Args:
+        df (pd.DataFrame): Input dataframe
+        base (np.ndarray): Values of the factor features, shape (rows, features)
+        terms (list): ``(name, indices)`` tuples of the product features
+    """
+
+    def __init__(self, df, base, terms):
+        self.df = df
+        self.base = base
+        self.terms = dict(terms)
+        self.columns = list(df.columns) + [name for name, _ in terms if name not in df.columns]
+
+    def __len__(self):
+        return len(self.df)
+
+    def __getitem__(self, name):
+        if name not in self.terms:
+            return self.df[name]
+        values = np.asarray(_product(self.base, self.terms[name]), dtype=np.float32)
+        return pd.Series(values, index=self.df.index, name=name)
+
+    def iter_batches(self, batch_size=100_000):
+        """Yield dense dataframes of at most ``batch_size`` rows."""
+        for start in range(0, len(self.df), batch_size):
+            stop = start + batch_size
+            yield _assemble(self.df.iloc[start:stop], self.base[start:stop], list(self.terms.items()))
+
+    def to_frame(self):
+        """Materialise the full dense dataframe."""
+        return _assemble(self.df, self.base, list(self.terms.items()))
+
+
+def _product(base, combo, known=None):
+    """Product of the ``combo`` factor columns.
+
+    ``known`` maps already computed products to their values; the product of all
+    factors but the last is reused from it when available, so each degree only
+    costs one multiplication per row.
+    """
+    if len(combo) == 1:
+        return base[:, combo[0]]
+    prefix = combo[:-1]
+    if known is not None and prefix in known:
+        head = known[prefix]
+    else:
+        head = _product(base, prefix, known)
+    return head * base[:, combo[-1]]
+
+
+class _BlockColumns:
+    """Read access to products already written to a float32 block, by factor indices."""
+
+    def __init__(self, block):
+        self.block = block
+        self.index = {}
+
+    def __contains__(self, combo):
+        return combo in self.index
+
+    def __getitem__(self, combo):
+        return self.block[:, self.index[combo]]
+
+
+def _product_block(base, terms):
+    """Compute all product features into one float32 block, each distinct product once."""
+    block = np.empty((base.shape[0], len(terms)), dtype=np.float32)
+    known = _BlockColumns(block)
+    for k, (_, combo) in enumerate(terms):
+        if combo in known:
+            block[:, k] = known[combo]
+        else:
+            block[:, k] = _product(base, combo, known)
+            known.index[combo] = k
+    return block
+
+
+def _sparse_columns(base, terms):
+    """Compute product features as sparse float32 columns, one dense column at a time."""
+    max_degree = max((len(combo) for _, combo in terms), default=0)
+    known = {}
+    columns = {}
+    for name, combo in terms:
+        values = known[combo] if combo in known else np.asarray(_product(base, combo, known), dtype=np.float32)
+        if len(combo) < max_degree:
+            # Kept dense only while higher degrees may extend it
+            known[combo] = values
+        columns[name] = pd.arrays.SparseArray(values, fill_value=0.0)
+    return columns
+
+
+def _assemble(df, base, terms, output='dense'):
+    """Concatenate ``df`` with its product features in a single step."""
+    names = [name for name, _ in terms]
+    # Recomputed features replace existing columns of the same name
+    df = df.drop(columns=[name for name in names if name in df.columns])
+    if output == 'sparse':
+        new = pd.DataFrame(_sparse_columns(base, terms), index=df.index)
+    else:
+        new = pd.DataFrame(_product_block(base, terms), index=df.index, columns=names)
+    return pd.concat([df, new], axis=1)
+
+
+def build_features(df, features=None, degree=None, interactions=True, output='dense'):
+    """Add interaction and polynomial features in one pass.
+
+    Interaction features duplicate the pairwise polynomial terms, so every distinct
+    product is computed once and written wherever it is needed. The new columns are
+    built as one float32 block and joined to ``df`` with a single concat, instead of
+    copying the frame and inserting columns one at a time.
+
+    Args:
+        df (pd.DataFrame): Input dataframe
+        features (list): Features to multiply; defaults to ``FEATURE_CONFIG['interaction_features']``
+        degree (int): Polynomial degree; defaults to ``FEATURE_CONFIG['polynomial_degree']``.
+            Use 1 for no polynomial features.
+        interactions (bool): Whether to add the ``*_interaction`` features
+        output (str): 'dense' for a regular dataframe, 'sparse' for sparse float32
+            product columns (most products of health-day counts are zero), or 'lazy'
+            for a ``PolynomialFeatureView`` that computes columns on access
+
+    Returns:
+        pd.DataFrame or PolynomialFeatureView: Input columns followed by the interaction
+        features and then the polynomial features
+    """
+    if features is None:
+        features = FEATURE_CONFIG['interaction_features']
+    if degree is None:
+        degree = FEATURE_CONFIG['polynomial_degree']
+    if output not in OUTPUTS:
+        raise ValueError(f"Invalid output '{output}'. Choose from {OUTPUTS}.")
+
+    present = [feat for feat in features if feat in df.columns]
+    poly = polynomial_terms(features, degree)
+    # Polynomial terms need every feature; interactions skip absent ones
+    used = list(features) if poly else present
+    position = {feat: k for k, feat in enumerate(used)}
+
+    terms = []
+    if interactions:
+        terms += [(name, tuple(position[present[i]] for i in combo))
+                  for name, combo in interaction_terms(present)]
+    terms += poly
+
+    base = df[used].to_numpy(dtype=np.float64)
+
+    if output == 'lazy':
+        return PolynomialFeatureView(df, base, terms)
+    return _assemble(df, base, terms, output)
+
 
 def create_interaction_features(df, features=None):
     """Create interaction features between specified columns.
-    
+
     Args:
         df (pd.DataFrame): Input dataframe
         features (list): List of features to create interactions for
-        
+
     Returns:
         pd.DataFrame: DataFrame with interaction features
     """
-    if features is None:
-        features = FEATURE_CONFIG['interaction_features']
-    
-    df_copy = df.copy()
-    
-    for i in range(len(features)):
-        for j in range(i + 1, len(features)):
-            feat1, feat2 = features[i], features[j]
-            if feat1 in df.columns and feat2 in df.columns:
-                interaction_name = f"{feat1}_{feat2}_interaction"
-                df_copy[interaction_name] = df[feat1] * df[feat2]
-    
-    return df_copy
+    return build_features(df, features, degree=1, interactions=True)
 
 def create_polynomial_features(df, features=None, degree=None):
     """Create polynomial and interaction features for specified numerical columns.
-    
+
     Args:
         df (pd.DataFrame): Input dataframe
         features (list): List of features to create polynomials and interactions for
         degree (int): Degree of polynomial features
-        
+
     Returns:
         pd.DataFrame: DataFrame with polynomial and interaction features
     """
-    if features is None:
-        features = FEATURE_CONFIG['interaction_features']
-    if degree is None:
-        degree = FEATURE_CONFIG['polynomial_degree']
-    
-    df_copy = df.copy()
-    poly = PolynomialFeatures(degree=degree, include_bias=False)
-    
-    if not features:
-        return df_copy
-        
-    feature_data = df[features]
-    poly_features = poly.fit_transform(feature_data)
-    
-    # Get feature names and clean them
-    feature_names = poly.get_feature_names_out(features)
-    
-    # Add polynomial features to dataframe, with cleaned names
-    for i, name in enumerate(feature_names[len(features):], len(features)):
-        # Replace spaces with underscores and add suffix for clarity
-        clean_name = name.replace(' ', '_') + '_poly'
-        df_copy[clean_name] = poly_features[:, i]
-    
-    return df_copy
-
-def engineer_features(df):
+    if not features and features is not None:
+        return df.copy()
+    return build_features(df, features, degree, interactions=False)
+
+@instrumented('engineer_features')
+def engineer_features(df, output='dense'):
     """Apply all feature engineering steps.
-    
+
     Args:
         df (pd.DataFrame): Input dataframe
-        
+        output (str): 'dense', 'sparse' or 'lazy'; see ``build_features``
+
     Returns:
         pd.DataFrame: DataFrame with engineered features
     """
-    df = create_interaction_features(df)
-    df = create_polynomial_features(df)
-    
-    return df 
\ No newline at end of file
+    return build_features(df, interactions=True, output=output)
+
+
+class FeatureEngineer:
+    """Fitted feature engineering transformer for chunked and streaming pipelines.
+
+    Every engineered feature depends only on its own row, so once fitted the
+    transformer can be applied to any chunk of rows independently. ``fit`` pins
+    the input columns and their dtypes, and ``transform`` aligns each chunk to
+    them, so every chunk comes out with identical column names and order and
+    the chunks can be concatenated, written or fed to a model one by one.
+
+    The fitted dtypes are only ever widened, never narrowed: a chunk with
+    categories the fit did not see extends them to the sorted union, and a
+    chunk whose values an integer column cannot hold (e.g. an encoded column
+    that is ``float32`` with NaN for unknown answers) promotes it to a float.
+    Later chunks keep the wider dtype. Files read with ``iter_dataset`` already
+    carry the categories of the whole file.
+
+    Args:
+        features (list): Features to multiply; defaults to ``FEATURE_CONFIG['interaction_features']``
+        degree (int): Polynomial degree; defaults to ``FEATURE_CONFIG['polynomial_degree']``
+        interactions (bool): Whether to add the ``*_interaction`` features
+    """
+
+    def __init__(self, features=None, degree=None, interactions=True):
+        self.features = list(features if features is not None else FEATURE_CONFIG['interaction_features'])
+        self.degree = degree if degree is not None else FEATURE_CONFIG['polynomial_degree']
+        self.interactions = interactions
+        self.input_dtypes_ = None
+        self.columns_ = None
+
+    def fit(self, df, y=None):
+        """Record the input columns and dtypes; ``df`` can be a sample or the first chunk.
+
+        Args:
+            df (pd.DataFrame): Representative input rows
+
+        Returns:
+            FeatureEngineer: The fitted transformer
+        """
+        self.input_dtypes_ = df.dtypes.to_dict()
+        self.columns_ = list(build_features(
+            df.head(0), self.features, self.degree, self.interactions
+        ).columns)
+        return self
+
+    def _align(self, df):
+        if self.input_dtypes_ is None:
+            raise ValueError("FeatureEngineer is not fitted yet")
+        missing = [col for col in self.input_dtypes_ if col not in df.columns]
+        if missing:
+            raise ValueError(f"Input is missing fitted columns: {missing}")
+        df = df[list(self.input_dtypes_)]
+
+        changed = {}
+        for col, fitted in self.input_dtypes_.items():
+            dtype = df[col].dtype
+            if dtype == fitted:
+                continue
+            if isinstance(fitted, pd.CategoricalDtype):
+                fitted = self._widen_categories(col, fitted, df[col])
+            elif (pd.api.types.is_numeric_dtype(fitted) and pd.api.types.is_numeric_dtype(dtype)
+                  and not pd.api.types.is_bool_dtype(fitted) and not pd.api.types.is_bool_dtype(dtype)):
+                fitted = np.promote_types(fitted, dtype)
+            self.input_dtypes_[col] = fitted
+            if dtype != fitted:
+                changed[col] = fitted
+        return df.astype(changed) if changed else df
+
+    @staticmethod
+    def _widen_categories(col, fitted, series):
+        """``fitted`` extended by the categories of ``series`` it lacks."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            seen = series.cat.categories
+        else:
+            seen = pd.Index(series.dropna().unique())
+        new = seen.difference(fitted.categories)
+        if len(new) == 0:
+            return fitted
+        if fitted.ordered:
+            raise ValueError(f"Column '{col}' has categories not seen during fit: {list(new)}")
+        return pd.CategoricalDtype(sorted(fitted.categories.union(new)))
+
+    def transform(self, df, output='dense'):
+        """Engineer features for a chunk of rows.
+
+        Args:
+            df (pd.DataFrame): Rows with the fitted input columns
+            output (str): 'dense', 'sparse' or 'lazy'; see ``build_features``
+
+        Returns:
+            pd.DataFrame: Engineered rows with columns ``self.columns_``
+        """
+        return build_features(self._align(df), self.features, self.degree, self.interactions, output)
+
+    def fit_transform(self, df, y=None, output='dense'):
+        return self.fit(df).transform(df, output)
+
+    def transform_chunks(self, chunks):
+        """Engineer an iterable of DataFrames lazily, one chunk at a time.
+
+        If not fitted yet, the transformer is fitted on the first chunk.
+
+        Args:
+            chunks (iterable): DataFrames with the same columns
+
+        Yields:
+            pd.DataFrame: Engineered chunks
+        """
+        for chunk in chunks:
+            if self.input_dtypes_ is None:
+                self.fit(chunk)
+            yield self.transform(chunk)
+
+    def transform_file(self, input_path, output_path, chunksize=100_000):
+        """Engineer a CSV or Parquet dataset into ``output_path`` chunk by chunk.
+
+        Args:
+            input_path (str): Input dataset
+            output_path (str): Output dataset; ``.parquet`` or CSV
+            chunksize (int): Rows held in memory at a time
+        """
+        with DatasetWriter(output_path) as writer:
+            for chunk in self.transform_chunks(iter_dataset(input_path, chunksize)):
+                writer.write(chunk)
+
+    def save(self, path):
+        """Persist the fitted transformer with joblib."""
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a transformer saved with ``save``."""
+        return joblib.load(path)
+
+
+def scaled_columns(features=None, degree=None):
+    """The continuous factor features and every interaction and polynomial term built from them."""
+    features = list(features if features is not None else FEATURE_CONFIG['interaction_features'])
+    degree = degree if degree is not None else FEATURE_CONFIG['polynomial_degree']
+    terms = [name for name, _ in interaction_terms(features) + polynomial_terms(features, degree)]
+    return features + [name for name in terms if name not in features]
+
+
+class FeatureScaler:
+    """Fitted standardization of the continuous and engineered product features.
+
+    The models are trained on engineered features standardized after the
+    products are computed, so scoring has to apply the same means and standard
+    deviations to its products. Binary and ordinal answers keep their codes.
+
+    Args:
+        columns (list): Columns to standardize; defaults to ``scaled_columns()``
+    """
+
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns is not None else scaled_columns()
+        self.mean_ = None
+        self.scale_ = None
+
+    def fit(self, df, y=None):
+        """Learn the mean and standard deviation of every configured column present in ``df``.
+
+        Args:
+            df (pd.DataFrame): Engineered training rows, before scaling
+
+        Returns:
+            FeatureScaler: The fitted scaler
+        """
+        values = df[[col for col in self.columns if col in df.columns]].astype(np.float64)
+        self.mean_ = values.mean()
+        # Population standard deviation, as in sklearn's StandardScaler; constant columns are left unscaled
+        self.scale_ = values.std(ddof=0).replace(0.0, 1.0).fillna(1.0)
+        return self
+
+    def _check(self):
+        if self.mean_ is None:
+            raise ValueError("FeatureScaler is not fitted yet")
+
+    def transform(self, df):
+        """Standardize the fitted columns of ``df``, returning a new dataframe with the same dtypes."""
+        self._check()
+        columns = [col for col in self.mean_.index if col in df.columns]
+        scaled = (df[columns].astype(np.float64) - self.mean_[columns]) / self.scale_[columns]
+        df = df.copy(deep=False)
+        for col in columns:
+            dtype = df[col].dtype if pd.api.types.is_float_dtype(df[col].dtype) else np.float64
+            df[col] = scaled[col].astype(dtype)
+        return df
+
+    def fit_transform(self, df, y=None):
+        return self.fit(df).transform(df)
+
+    def parameters(self, columns):
+        """Positions in ``columns`` of the fitted columns and their means and scales, for scaling arrays."""
+        self._check()
+        positions = [k for k, col in enumerate(columns) if col in self.mean_.index]
+        names = [columns[k] for k in positions]
+        return (np.array(positions, dtype=np.intp), self.mean_[names].to_numpy(),
+                self.scale_[names].to_numpy())
+
+    def save(self, path):
+        """Persist the fitted scaler with joblib."""
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a scaler saved with ``save``."""
+        return joblib.load(path)
@@ -0,0 +1,172 @@
+"""Correlation-based pruning of redundant features.
+
+The correlation matrix is accumulated over row chunks: each chunk is converted
+to one float32 block, shifted by a per-column reference value and multiplied
+into float64 running sums, so only ``chunk_rows x n_features`` values are held
+at a time and a frame with thousands of polynomial features is never copied as
+a whole.
+
+Category columns are handled explicitly: ordered categories and binary ones are
+correlated through their codes, while unordered columns with more than two
+levels have no meaningful linear correlation and are kept as they are.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Target size of one float32 row chunk
+CHUNK_BYTES = 64 * 2 ** 20
+
+
+def _numeric_view(series):
+    """``series`` as float32 values, or None when it has no linear meaning."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        if not dtype.ordered and len(dtype.categories) > 2:
+            return None
+        codes = series.cat.codes.to_numpy(dtype=np.float32)
+        codes[codes < 0] = np.nan
+        return codes
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return series.to_numpy(dtype=np.float32, na_value=np.nan)
+    return None
+
+
+def correlatable_columns(df):
+    """Columns of ``df`` that take part in correlation pruning."""
+    return [
+        col for col in df.columns
+        if pd.api.types.is_bool_dtype(df[col].dtype)
+        or pd.api.types.is_numeric_dtype(df[col].dtype)
+        or (isinstance(df[col].dtype, pd.CategoricalDtype)
+            and (df[col].dtype.ordered or len(df[col].dtype.categories) <= 2))
+    ]
+
+
+def _chunk(df, numeric, categorical, start, stop):
+    """Rows ``start:stop`` as one float32 block: numeric positions first, then category codes."""
+    rows = df.iloc[start:stop]
+    block = np.empty((stop - start, len(numeric) + len(categorical)), dtype=np.float32)
+    if numeric:
+        block[:, :len(numeric)] = rows.iloc[:, numeric].to_numpy(dtype=np.float32, na_value=np.nan)
+    for j, position in enumerate(categorical, start=len(numeric)):
+        block[:, j] = _numeric_view(rows.iloc[:, position])
+    return block
+
+
+def correlation_matrix(df, columns=None, chunk_rows=None):
+    """Pearson correlation of ``columns`` computed over row chunks.
+
+    Like ``DataFrame.corr``, every pair is correlated over the rows where both
+    values are present. Chunks without missing values cost one float32 matrix
+    product; chunks with missing values add the products needed for the pairwise
+    counts and means.
+
+    Args:
+        df (pd.DataFrame): Input data
+        columns (list): Columns to correlate; defaults to ``correlatable_columns(df)``
+        chunk_rows (int): Rows per float32 block; by default sized to ``CHUNK_BYTES``
+
+    Returns:
+        pd.DataFrame: Correlation matrix; pairs without variation have correlation 0
+    """
+    if columns is None:
+        columns = correlatable_columns(df)
+    positions = [df.columns.get_loc(col) for col in columns]
+    categorical = [k for k, col in enumerate(columns) if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    numeric = sorted(set(range(len(columns))) - set(categorical))
+    # Blocks hold numeric columns first; ``order`` maps block positions back to ``columns``
+    order = numeric + categorical
+    n_rows, n_cols = len(df), len(columns)
+    if chunk_rows is None:
+        chunk_rows = max(1024, CHUNK_BYTES // (4 * max(n_cols, 1)))
+
+    shift = None
+    # Rows without missing values, accumulated per column
+    n_full, sums, squares = 0, np.zeros(n_cols), np.zeros(n_cols)
+    cross = np.zeros((n_cols, n_cols))
+    # Rows with missing values, accumulated per pair (i, j) over rows where j is present
+    pair_counts = pair_sums = pair_squares = None
+    for start in range(0, n_rows, chunk_rows):
+        block = _chunk(df, [positions[k] for k in numeric], [positions[k] for k in categorical],
+                       start, min(start + chunk_rows, n_rows))
+        if shift is None:
+            # Shifting by a value near the mean keeps the float32 products from cancelling
+            with np.errstate(all='ignore'):
+                shift = np.nan_to_num(np.nanmean(block, axis=0)).astype(np.float32)
+        block -= shift
+        missing = np.isnan(block)
+        if not missing.any():
+            n_full += len(block)
+            sums += block.sum(axis=0, dtype=np.float64)
+            squares += np.einsum('ij,ij->j', block, block, dtype=np.float64)
+            cross += block.T @ block
+            continue
+        present = (~missing).astype(np.float32)
+        block[missing] = 0.0
+        if pair_counts is None:
+            pair_counts, pair_sums, pair_squares = (np.zeros((n_cols, n_cols)) for _ in range(3))
+        pair_counts += present.T @ present
+        pair_sums += block.T @ present
+        pair_squares += (block * block).T @ present
+        cross += block.T @ block
+
+    counts = np.full((n_cols, n_cols), float(n_full))
+    # Sum of column i over the rows where column j is present, and likewise for squares
+    sums_ij = np.broadcast_to(sums[:, None], counts.shape).copy()
+    squares_ij = np.broadcast_to(squares[:, None], counts.shape).copy()
+    if pair_counts is not None:
+        counts += pair_counts
+        sums_ij += pair_sums
+        squares_ij += pair_squares
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_ij = sums_ij / counts
+        cov = cross / counts - mean_ij * mean_ij.T
+        var_ij = squares_ij / counts - mean_ij ** 2
+        corr = cov / np.sqrt(np.clip(var_ij * var_ij.T, 0, None))
+    corr[~np.isfinite(corr)] = 0.0
+    np.fill_diagonal(corr, np.where(np.diag(var_ij) > 0, 1.0, 0.0))
+    corr = np.clip(corr, -1.0, 1.0)
+    # Back from block order to the order of ``columns``
+    inverse = np.argsort(order)
+    corr = corr[np.ix_(inverse, inverse)]
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def prune_correlated_features(df, target_col=None, threshold=0.95, chunk_rows=None):
+    """Pick features to drop so no two kept features correlate above ``threshold``.
+
+    Features are visited from the most to the least correlated with the target
+    (in column order without a target), and a feature is dropped when its
+    absolute correlation with an already kept feature exceeds ``threshold``. Of
+    each redundant group, the feature most related to the target survives.
+
+    Args:
+        df (pd.DataFrame): Features, optionally with the target column
+        target_col (str): Target column; never dropped
+        threshold (float): Absolute correlation above which a feature is redundant
+        chunk_rows (int): Rows per float32 block; see ``correlation_matrix``
+
+    Returns:
+        list: Columns to drop, in column order
+    """
+    columns = correlatable_columns(df)
+    has_target = target_col is not None and target_col in columns
+    corr = correlation_matrix(df, columns, chunk_rows).to_numpy()
+    abs_corr = np.abs(corr)
+
+    candidates = [k for k, col in enumerate(columns) if col != target_col]
+    if has_target:
+        relevance = abs_corr[columns.index(target_col)]
+        # Stable sort so ties keep the column order
+        candidates.sort(key=lambda k: -relevance[k])
+
+    kept = np.zeros(len(columns), dtype=bool)
+    dropped = set()
+    for k in candidates:
+        if np.any(abs_corr[k, kept] > threshold):
+            dropped.add(columns[k])
+        else:
+            kept[k] = True
+    return [col for col in df.columns if col in dropped]
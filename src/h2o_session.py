@@ -0,0 +1,103 @@
+"""Shared H2O cluster session for the training and evaluation code.
+
+The cluster is started (or connected to) the first time a caller needs it and
+then reused for the rest of the process, so building several predictors does
+not pay for JVM startup or reconnection each time. A cluster started by this
+module is shut down when the process exits.
+"""
+
+import atexit
+import threading
+
+import h2o
+
+from .config import H2O_CONFIG
+
+
+class H2OSession:
+    """Lazily started H2O cluster connection with health checks.
+
+    Args:
+        nthreads (int): Threads of a locally started cluster; -1 uses all cores
+        max_mem_size (str): JVM heap limit of a locally started cluster, e.g. '8G'
+        url (str): URL of an existing cluster to connect to instead of starting one
+        shutdown_on_exit (bool): Shut down a cluster started by this session at exit
+    """
+
+    def __init__(self, nthreads=None, max_mem_size=None, url=None, shutdown_on_exit=True):
+        self.nthreads = nthreads if nthreads is not None else H2O_CONFIG['nthreads']
+        self.max_mem_size = max_mem_size if max_mem_size is not None else H2O_CONFIG['max_mem_size']
+        self.url = url if url is not None else H2O_CONFIG['url']
+        self.shutdown_on_exit = shutdown_on_exit
+        self.started_cluster = False
+        self._lock = threading.Lock()
+        self._exit_hook = False
+
+    def is_healthy(self):
+        """Return True if connected to a running cluster whose nodes all report healthy."""
+        connection = h2o.connection()
+        if connection is None or not connection.connected:
+            return False
+        try:
+            if not h2o.cluster().is_running():
+                return False
+            status = h2o.api("GET /3/Cloud")
+        except Exception:
+            return False
+        return bool(status.get('cloud_healthy', True)) and bool(status.get('consensus', True))
+
+    def connect(self):
+        """Return the cluster connection, starting or reconnecting only when needed."""
+        with self._lock:
+            if self.is_healthy():
+                return h2o.connection()
+
+            h2o.init(
+                url=self.url,
+                nthreads=self.nthreads,
+                max_mem_size=self.max_mem_size,
+                verbose=False
+            )
+            # local_server is set only when h2o.init launched the JVM itself
+            self.started_cluster = h2o.connection().local_server is not None
+            if self.shutdown_on_exit and not self._exit_hook:
+                atexit.register(self.shutdown)
+                self._exit_hook = True
+            return h2o.connection()
+
+    def shutdown(self):
+        """Shut down a cluster started by this session, or just disconnect from a shared one."""
+        with self._lock:
+            connection = h2o.connection()
+            if connection is None or not connection.connected:
+                return
+            try:
+                if self.started_cluster:
+                    h2o.cluster().shutdown(prompt=False)
+                else:
+                    connection.close()
+            except Exception as error:
+                print(f"⚠️ H2O shutdown failed: {error}")
+            self.started_cluster = False
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(**kwargs):
+    """Return the process-wide ``H2OSession``, created with ``kwargs`` on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = H2OSession(**kwargs)
+        return _session
+
+
+def ensure_cluster(**kwargs):
+    """Connect to the shared H2O cluster, starting it on first use.
+
+    Accepts the arguments of ``H2OSession``; they only apply when the session
+    is created.
+    """
+    return get_session(**kwargs).connect()
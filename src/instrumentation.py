@@ -0,0 +1,333 @@
+"""Per-stage timing and memory instrumentation of the pipeline.
+
+Wrap a stage in ``with stage('name', rows_in=len(df)) as s:`` (or decorate a
+function with ``@instrumented('name')``) to record its wall time, CPU time,
+memory, rows in and out and bytes read or written. Records are aggregated in
+an in-process ``MetricsRegistry``, which renders the Prometheus text format,
+and can also be emitted as one JSON log line per stage.
+
+CPU time includes child processes that finished during the stage, such as the
+workers of ``detect_outliers_consensus``. Memory is reported three ways:
+
+- ``peak_rss_bytes``: the process high-water mark (``ru_maxrss``) at the end of
+  the stage. It covers the whole process lifetime, so it only tells what a
+  stage used when that stage set a new peak.
+- ``rss_growth_bytes``: how far the resident set rose above its size at the
+  start of the stage. On Linux the current RSS is sampled every
+  ``RSS_SAMPLE_SECONDS`` while the stage runs; elsewhere it is the rise of the
+  high-water mark, which stays 0 whenever an earlier stage peaked higher.
+- ``children_peak_rss_bytes``: the high-water mark of the largest finished
+  child process.
+
+Where the ``resource`` module is missing (Windows), CPU time covers this
+process only and the memory fields are None.
+
+Instrumentation is off unless ``enable()`` is called or the ``PIPELINE_METRICS``
+environment variable is set. While off, ``stage`` returns a shared no-op object
+and ``instrumented`` functions call straight through, so the cost is one flag
+check per stage.
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+_STATM = '/proc/self/statm'
+
+# Interval between samples of the current RSS while a stage runs
+RSS_SAMPLE_SECONDS = 0.05
+
+_METRICS = [
+    # (name, type, help, record field, aggregation)
+    ('pipeline_stage_calls_total', 'counter', 'Completed runs of the stage', None, 'count'),
+    ('pipeline_stage_errors_total', 'counter', 'Runs of the stage that raised', 'error', 'count'),
+    ('pipeline_stage_wall_seconds_total', 'counter', 'Wall time spent in the stage', 'wall_seconds', 'sum'),
+    ('pipeline_stage_cpu_seconds_total', 'counter', 'CPU time spent in the stage, finished child processes included',
+     'cpu_seconds', 'sum'),
+    ('pipeline_stage_rows_in_total', 'counter', 'Rows passed into the stage', 'rows_in', 'sum'),
+    ('pipeline_stage_rows_out_total', 'counter', 'Rows produced by the stage', 'rows_out', 'sum'),
+    ('pipeline_stage_bytes_read_total', 'counter', 'Bytes read by the stage', 'bytes_read', 'sum'),
+    ('pipeline_stage_bytes_written_total', 'counter', 'Bytes written by the stage', 'bytes_written', 'sum'),
+    ('pipeline_stage_last_wall_seconds', 'gauge', 'Wall time of the latest run', 'wall_seconds', 'last'),
+    ('pipeline_stage_peak_rss_bytes', 'gauge', 'Process RSS high-water mark at the end of the stage',
+     'peak_rss_bytes', 'max'),
+    ('pipeline_stage_rss_growth_bytes', 'gauge', 'Largest rise of the RSS above its size at the start of a run',
+     'rss_growth_bytes', 'max'),
+    ('pipeline_stage_children_peak_rss_bytes', 'gauge', 'RSS high-water mark of the largest finished child process',
+     'children_peak_rss_bytes', 'max'),
+]
+
+
+def _peak_rss(children=False):
+    """RSS high-water mark of this process or of its largest finished child, or None without ``resource``."""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss * _RSS_UNIT
+
+
+def _cpu_seconds():
+    """CPU time of this process and of its finished, waited-for child processes.
+
+    Without ``resource`` only this process is counted.
+    """
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _current_rss():
+    """Current resident set size in bytes, or None where /proc is not available."""
+    try:
+        with open(_STATM) as handle:
+            resident = int(handle.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident * os.sysconf('SC_PAGE_SIZE')
+
+
+class _RssSampler(threading.Thread):
+    """Background thread tracking the largest current RSS until ``stop`` is called."""
+
+    def __init__(self, start_rss):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.peak = start_rss
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, _current_rss() or 0)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _current_rss() or 0)
+        return self.peak
+
+
+def file_size(path):
+    """Size of a file in bytes, or None if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+class MetricsRegistry:
+    """Thread-safe aggregate of stage records with a Prometheus text exporter.
+
+    Args:
+        history (int): Number of recent raw records kept for inspection
+    """
+
+    def __init__(self, history=1000):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.records = deque(maxlen=history)
+
+    def record(self, record):
+        """Add one finished stage record (a dict as produced by ``stage``)."""
+        with self._lock:
+            self.records.append(record)
+            stats = self._stages.setdefault(record['stage'], {'count': 0})
+            stats['count'] += 1
+            for name, _, _, field, aggregation in _METRICS:
+                value = record.get(field)
+                if field is None or value is None:
+                    continue
+                if aggregation == 'count':
+                    stats[name] = stats.get(name, 0) + 1
+                elif aggregation == 'sum':
+                    stats[name] = stats.get(name, 0) + value
+                elif aggregation == 'max':
+                    stats[name] = max(stats.get(name, value), value)
+                else:
+                    stats[name] = value
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self.records.clear()
+
+    def summary(self):
+        """Aggregates per stage as a DataFrame, one row per stage."""
+        with self._lock:
+            rows = {stage: dict(stats) for stage, stats in self._stages.items()}
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('stage')
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stages = {stage: dict(stats) for stage, stats in self._stages.items()}
+        lines = []
+        for name, kind, help_text, _, _ in _METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage_name, stats in sorted(stages.items()):
+                value = stats['count'] if name == 'pipeline_stage_calls_total' else stats.get(name, 0)
+                label = stage_name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{stage="{label}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the metrics for a node-exporter textfile collector, replacing the file atomically."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as handle:
+            handle.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+REGISTRY = MetricsRegistry()
+
+_state = {'enabled': bool(os.environ.get('PIPELINE_METRICS')), 'log': bool(os.environ.get('PIPELINE_METRICS_LOG'))}
+
+
+def enable(log=False):
+    """Start recording stages; with ``log`` every record is also logged as a JSON line."""
+    _state['enabled'] = True
+    _state['log'] = log
+
+
+def disable():
+    _state['enabled'] = False
+
+
+def is_enabled():
+    return _state['enabled']
+
+
+class _Stage:
+    """A running stage; set ``rows_out``, ``bytes_read`` or ``bytes_written`` on it as they become known."""
+
+    def __init__(self, name, rows_in=None, bytes_read=None, registry=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = bytes_read
+        self.bytes_written = None
+        self.registry = registry or REGISTRY
+
+    def __enter__(self):
+        self._rss = _current_rss()
+        self._peak = _peak_rss()
+        self._sampler = None
+        if self._rss is not None:
+            self._sampler = _RssSampler(self._rss)
+            self._sampler.start()
+        self._cpu = _cpu_seconds()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = _cpu_seconds() - self._cpu
+        peak = _peak_rss()
+        if self._sampler is not None:
+            growth = self._sampler.stop() - self._rss
+        elif peak is not None:
+            growth = peak - self._peak
+        else:
+            growth = None
+        record = {
+            'stage': self.name,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'peak_rss_bytes': peak,
+            'rss_growth_bytes': growth,
+            'children_peak_rss_bytes': _peak_rss(children=True),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'error': exc_type.__name__ if exc_type is not None else None,
+        }
+        self.registry.record(record)
+        if _state['log']:
+            logger.info(json.dumps({'event': 'stage', **record}))
+        return False
+
+
+class _NullStage:
+    """Shared stand-in used while instrumentation is off; attribute writes are dropped."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, rows_in=None, bytes_read=None):
+    """Context manager recording one run of a pipeline stage.
+
+    Args:
+        name (str): Stage name, used as the ``stage`` label
+        rows_in (int): Rows passed into the stage
+        bytes_read (int): Bytes the stage reads, e.g. ``file_size(input_path)``
+
+    Returns:
+        Context manager whose target accepts ``rows_out``, ``bytes_read`` and
+        ``bytes_written`` attributes
+    """
+    if not _state['enabled']:
+        return _NULL_STAGE
+    return _Stage(name, rows_in, bytes_read)
+
+
+def _rows(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+def instrumented(name=None):
+    """Decorator recording every call of a function as a stage.
+
+    Rows in and out are the lengths of the first DataFrame argument and of the
+    returned DataFrame (or of the first element of a returned tuple).
+
+    Args:
+        name (str): Stage name; defaults to the function name
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            frame = next((arg for arg in args if isinstance(arg, pd.DataFrame)), None)
+            with _Stage(stage_name, rows_in=_rows(frame)) as record:
+                result = func(*args, **kwargs)
+                record.rows_out = _rows(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,195 @@
+"""Revenue evaluation of every model on an H2O AutoML leaderboard.
+
+Each model scores the validation and test frames once; the probabilities are
+cached on disk under the model id and a hash of the frame's contents, so re-running
+the analysis only scores models (or frames) it has not seen. The revenue-optimal
+threshold is picked on validation and applied to test, and one row per model is
+appended to the leaderboard file as soon as that model is done.
+"""
+
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import h2o
+import numpy as np
+import pandas as pd
+
+from .config import DATA_PATH
+from .h2o_session import ensure_cluster
+from .revenue import baseline_revenue, optimize_thresholds, revenue_at_threshold
+
+COLUMNS = ['model_id', 'threshold', 'test_revenue', 'validation_revenue', 'gain_vs_baseline', 'source']
+
+
+def frame_fingerprint(df):
+    """Hash of a DataFrame's column names, dtypes and every value, in row order."""
+    digest = hashlib.sha1(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Positive-class probabilities stored as ``.npy`` files keyed by model id and frame fingerprint.
+
+    Args:
+        directory (str): Cache directory, created on first write
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, model_id, frame_key):
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_id)
+        return self.directory / f"{name}__{frame_key}.npy"
+
+    def get(self, model_id, frame_key):
+        path = self._path(model_id, frame_key)
+        return np.load(path) if path.exists() else None
+
+    def put(self, model_id, frame_key, scores):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(model_id, frame_key)
+        # Written under a temporary name first so a crash never leaves a truncated entry
+        tmp = path.with_name(path.stem + '.tmp.npy')
+        np.save(tmp, scores)
+        tmp.replace(path)
+
+
+class LeaderboardEvaluator:
+    """Score leaderboard models concurrently and evaluate their revenue.
+
+    Args:
+        valid_frame (H2OFrame): Frame the thresholds are chosen on
+        test_frame (H2OFrame): Frame the revenue is reported on
+        target (str): Target column, a factor whose last level is the positive class
+        output_path (str): Leaderboard CSV, appended to model by model
+        cache_dir (str): Directory of the prediction cache
+        max_workers (int): Models scored at the same time
+        source (str): Value of the 'source' column, e.g. the experiment name
+        source_frames (dict): Optional 'validation' and 'test' pandas DataFrames the
+            H2O frames were uploaded from; they are hashed instead of downloading
+            the H2O frames to fingerprint them
+    """
+
+    def __init__(self, valid_frame, test_frame, target='HadHeartAttack', output_path=None,
+                 cache_dir=None, max_workers=4, source=None, source_frames=None):
+        self.frames = {'validation': valid_frame, 'test': test_frame}
+        self.source_frames = dict(source_frames or {})
+        self.target = target
+        self.output_path = Path(output_path or DATA_PATH['leaderboard'])
+        self.cache = PredictionCache(cache_dir or DATA_PATH['prediction_cache'])
+        self.max_workers = max_workers
+        self.source = source
+        self._labels = {}
+        self._keys = {}
+
+    def labels(self, name):
+        """0/1 labels of a frame, transferred once."""
+        if name not in self._labels:
+            column = self.frames[name][self.target]
+            positive = column.levels()[0][-1] if column.isfactor()[0] else 1
+            values = column.as_data_frame()[self.target].astype(str).to_numpy()
+            self._labels[name] = (values == str(positive)).astype(np.int8)
+        return self._labels[name]
+
+    def fingerprint(self, name):
+        """Content fingerprint of a frame; any changed, swapped or reordered value gives a new key.
+
+        The pandas source frame is hashed when given; otherwise the H2O frame is
+        downloaded once and hashed.
+        """
+        if name not in self._keys:
+            df = self.source_frames.get(name)
+            if df is None:
+                df = self.frames[name].as_data_frame()
+            self._keys[name] = frame_fingerprint(df)
+        return self._keys[name]
+
+    def predict(self, model_id, name):
+        """Positive-class probabilities of one model on one frame, from the cache when possible."""
+        key = self.fingerprint(name)
+        scores = self.cache.get(model_id, key)
+        if scores is None:
+            predictions = h2o.get_model(model_id).predict(self.frames[name])
+            scores = predictions[:, -1].as_data_frame().iloc[:, 0].to_numpy(dtype=np.float64)
+            self.cache.put(model_id, key, scores)
+        return scores
+
+    def _score_model(self, model_id):
+        return {name: self.predict(model_id, name) for name in self.frames}
+
+    def evaluate_model(self, model_id, scores):
+        """Leaderboard row of one model given its validation and test probabilities."""
+        best = optimize_thresholds(self.labels('validation'), {model_id: scores['validation']}, n_bootstrap=0)
+        threshold = float(best.loc[model_id, 'threshold'])
+        test_revenue = revenue_at_threshold(self.labels('test'), scores['test'], threshold)
+        return {
+            'model_id': model_id,
+            'threshold': threshold,
+            'test_revenue': test_revenue,
+            'validation_revenue': float(best.loc[model_id, 'revenue']),
+            'gain_vs_baseline': test_revenue - baseline_revenue(self.labels('test')),
+            'source': self.source,
+        }
+
+    def completed(self):
+        """Model ids already in the leaderboard file."""
+        if not self.output_path.exists():
+            return set()
+        return set(pd.read_csv(self.output_path, usecols=['model_id'])['model_id'])
+
+    def _append(self, row):
+        header = not self.output_path.exists()
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame([row], columns=COLUMNS).to_csv(self.output_path, mode='a', header=header, index=False)
+
+    def run(self, model_ids):
+        """Evaluate the models not yet in the leaderboard file.
+
+        Args:
+            model_ids (list): Model ids, e.g. from ``leaderboard_model_ids``
+
+        Returns:
+            pd.DataFrame: The full leaderboard file after this run
+        """
+        done = self.completed()
+        pending = [model_id for model_id in dict.fromkeys(model_ids) if model_id not in done]
+        print(f"🔹 {len(pending)} models to evaluate, {len(done)} already on the leaderboard")
+
+        # Labels and fingerprints are shared by all workers; compute them up front
+        for name in self.frames:
+            self.labels(name)
+            self.fingerprint(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._score_model, model_id): model_id for model_id in pending}
+            for future in as_completed(futures):
+                model_id = futures[future]
+                try:
+                    row = self.evaluate_model(model_id, future.result())
+                except Exception as error:
+                    print(f"⚠️ {model_id} failed: {error}")
+                    continue
+                self._append(row)
+                print(f"✅ {model_id}: test revenue {row['test_revenue']:,.0f} at threshold {row['threshold']:.4f}")
+
+        if not self.output_path.exists():
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.read_csv(self.output_path)
+
+
+def leaderboard_model_ids(aml):
+    """Model ids of an ``H2OAutoML`` run, in leaderboard order."""
+    return aml.leaderboard['model_id'].as_data_frame()['model_id'].tolist()
+
+
+def evaluate_leaderboard(aml, valid_frame, test_frame, target='HadHeartAttack', output_path=None,
+                         cache_dir=None, max_workers=4, source=None, source_frames=None):
+    """Evaluate the revenue of every model of an AutoML run; see ``LeaderboardEvaluator``."""
+    ensure_cluster()
+    evaluator = LeaderboardEvaluator(valid_frame, test_frame, target, output_path, cache_dir, max_workers, source,
+                                     source_frames)
+    return evaluator.run(leaderboard_model_ids(aml))
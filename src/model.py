@@ -2,19 +2,69 @@
 
 import h2o
 from h2o.automl import H2OAutoML
-import pandas as pd
 import numpy as np
-from sklearn.metrics import classification_report, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
 from .config import MODEL_CONFIG, TRAIN_CONFIG
+from .h2o_session import ensure_cluster
+
+def confusion_from_counts(counts):
+    """Build a confusion matrix from (actual, predicted, count) rows.
+
+    Args:
+        counts (pd.DataFrame): Dense co-occurrence counts, e.g. from ``H2OFrame.table``
+
+    Returns:
+        tuple: Sorted labels and the confusion matrix, rows = actual, columns = predicted,
+        laid out like ``sklearn.metrics.confusion_matrix``
+    """
+    actual, predicted, count = (counts.iloc[:, i] for i in range(3))
+    labels = sorted(set(actual) | set(predicted))
+    position = {label: k for k, label in enumerate(labels)}
+    cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    np.add.at(cm, (actual.map(position).to_numpy(), predicted.map(position).to_numpy()),
+              count.to_numpy(dtype=np.int64))
+    return labels, cm
+
+def classification_report_from_confusion(cm, labels):
+    """Per-class precision, recall, F1 and support from a confusion matrix.
+
+    Args:
+        cm (np.array): Confusion matrix, rows = actual, columns = predicted
+        labels (list): Class labels in matrix order
+
+    Returns:
+        dict: Same layout as ``classification_report(..., output_dict=True)``
+    """
+    tp = np.diag(cm).astype(float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.nan_to_num(tp / predicted)
+        recall = np.nan_to_num(tp / support)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    report = {
+        str(label): {'precision': float(p), 'recall': float(r), 'f1-score': float(f), 'support': float(n)}
+        for label, p, r, f, n in zip(labels, precision, recall, f1, support)
+    }
+    total = support.sum()
+    report['accuracy'] = float(tp.sum() / total) if total else 0.0
+    report['macro avg'] = {
+        'precision': float(precision.mean()), 'recall': float(recall.mean()),
+        'f1-score': float(f1.mean()), 'support': float(total)
+    }
+    weights = support / total if total else np.zeros_like(tp)
+    report['weighted avg'] = {
+        'precision': float(precision @ weights), 'recall': float(recall @ weights),
+        'f1-score': float(f1 @ weights), 'support': float(total)
+    }
+    return report
 
 class HeartAttackPredictor:
     """Class for training and evaluating heart attack prediction models."""
     
     def __init__(self):
-        """Initialize H2O and class variables."""
-        h2o.init()
+        """Connect to the shared H2O cluster and initialize class variables."""
+        ensure_cluster()
         self.model = None
         self.feature_importance = None
     
@@ -82,17 +132,16 @@ class HeartAttackPredictor:
         if self.model is None:
             raise ValueError("Model not trained yet")
         
-        # Get predictions
+        # Score once; the metrics and the confusion matrix are computed on the
+        # cluster from these predictions instead of rescoring the frame
         predictions = self.model.leader.predict(test_frame)
-        performance = self.model.leader.model_performance(test_frame)
-        
-        # Convert to pandas for sklearn metrics
-        preds = predictions.as_data_frame()['predict']
-        true_labels = test_frame[self.target].as_data_frame()[self.target]
-        
-        # Calculate metrics
-        report = classification_report(true_labels, preds, output_dict=True)
-        cm = confusion_matrix(true_labels, preds)
+        actual = test_frame[self.target]
+        performance = h2o.make_metrics(predictions[:, -1], actual)
+
+        # Only the (actual, predicted, count) combinations are transferred
+        counts = actual.table(predictions['predict']).as_data_frame()
+        labels, cm = confusion_from_counts(counts)
+        report = classification_report_from_confusion(cm, labels)
         
         return {
             'classification_report': report,
@@ -106,13 +155,8 @@ class HeartAttackPredictor:
         Args:
             confusion_matrix (np.array): Confusion matrix from evaluate()
         """
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(confusion_matrix, annot=True, fmt="d", cmap="Blues")
-        plt.xlabel("Predicted Label")
-        plt.ylabel("True Label")
-        plt.title("Confusion Matrix")
-        plt.tight_layout()
-        plt.show()
+        from .plotting import plot_confusion_matrix
+        plot_confusion_matrix(confusion_matrix)
     
     def plot_feature_importance(self, top_n=30):
         """Plot feature importance.
@@ -123,20 +167,6 @@ class HeartAttackPredictor:
         if self.feature_importance is None:
             print("Feature importance not available")
             return
-            
-        # Convert to pandas DataFrame
-        importance_df = pd.DataFrame(self.feature_importance)
-        importance_df = importance_df.sort_values(by="relative_importance", ascending=False)
-        
-        # Plot top N features
-        plt.figure(figsize=(10, 6))
-        sns.barplot(
-            y=importance_df['variable'].head(top_n),
-            x=importance_df['relative_importance'].head(top_n),
-            palette='Set2'
-        )
-        plt.xlabel('Relative Importance')
-        plt.ylabel('Feature')
-        plt.title(f'Top {top_n} Feature Importance')
-        plt.tight_layout()
-        plt.show() 
\ No newline at end of file
+
+        from .plotting import plot_feature_importance
+        plot_feature_importance(self.feature_importance, top_n)
@@ -0,0 +1,243 @@
+"""Cross-validation folds with their preprocessing fitted once and stored on disk.
+
+``CVCache.build`` splits a frame into stratified folds and, for every fold, fits
+the preprocessing on the training rows only (group imputation, encoding,
+feature engineering and optional outlier caps) and applies it to both parts.
+Each fold is saved as one float32 matrix with its training rows first, so the
+training and validation parts are contiguous slices of a memory-mapped file:
+a trainer gets them without copying, and repeated CV runs or tuning trials pay
+only for fitting the model.
+
+Layout of the cache directory::
+
+    manifest.json         settings, columns, categorical features, fold sizes
+    folds.npy             fold number of every input row
+    fold_<k>/X.npy        float32 (rows, features), training rows first
+    fold_<k>/y.npy        int8 labels in the same order
+    fold_<k>/index.npy    input row position of every stored row
+    fold_<k>/*.joblib     preprocessing fitted on the fold's training rows
+"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+
+from ..config import DATA_PATH, MODEL_CONFIG
+from ..data_preprocessing.encoding import ENCODING_SPEC, YES_NO_MAP, CategoricalEncoder
+from ..data_preprocessing.imputation import GroupImputer, is_categorical
+from ..data_preprocessing.outlier_transformation import OutlierTransformer
+from ..feature_engineering.feature_engineering import FeatureEngineer
+
+
+class Fold(NamedTuple):
+    """Training and validation views of one fold; the arrays are memory-mapped."""
+    number: int
+    X_train: np.ndarray
+    y_train: np.ndarray
+    X_valid: np.ndarray
+    y_valid: np.ndarray
+    train_index: np.ndarray
+    valid_index: np.ndarray
+
+
+def _labels(series):
+    """0/1 labels from a numeric or Yes/No target column."""
+    if is_categorical(series):
+        return series.astype(object).map(YES_NO_MAP).to_numpy(dtype=np.int8)
+    return series.to_numpy(dtype=np.int8)
+
+
+def _fingerprint(df, settings):
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode())
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class CVCache:
+    """Stratified folds with per-fold fitted preprocessing, memory-mapped from disk.
+
+    Use ``CVCache.build`` to create (or reuse) a cache and ``CVCache(directory)``
+    to open an existing one.
+
+    Args:
+        directory (str): Cache directory written by ``build``
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        manifest_path = self.directory / 'manifest.json'
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No CV cache at {self.directory}")
+        self.manifest = json.loads(manifest_path.read_text())
+        self.columns = self.manifest['columns']
+        self.categorical_features = self.manifest['categorical_features']
+        self.n_splits = self.manifest['n_splits']
+
+    @classmethod
+    def build(cls, df, directory=None, target='HadHeartAttack', n_splits=None, random_state=None,
+              outlier_plan=None, impute=True, features=None, degree=None, overwrite=False):
+        """Split ``df`` into folds and store each fold preprocessed.
+
+        The cache is reused when ``directory`` already holds one built from the
+        same data and settings.
+
+        Args:
+            df (pd.DataFrame): Cleaned data with the target column
+            directory (str): Cache directory; defaults to ``DATA_PATH['cv_cache']``
+            target (str): Target column, numeric 0/1 or Yes/No
+            n_splits (int): Number of folds; defaults to ``MODEL_CONFIG['nfolds']``
+            random_state (int): Seed of the split; defaults to ``MODEL_CONFIG['seed']``
+            outlier_plan (dict): ``OutlierTransformer`` plan fitted per fold; None skips it
+            impute (bool): Fit a ``GroupImputer`` per fold
+            features (list): Factor features of ``FeatureEngineer``
+            degree (int): Polynomial degree of ``FeatureEngineer``
+            overwrite (bool): Rebuild even if a matching cache exists
+
+        Returns:
+            CVCache: The opened cache
+        """
+        directory = Path(directory or DATA_PATH['cv_cache'])
+        n_splits = n_splits or MODEL_CONFIG['nfolds']
+        random_state = MODEL_CONFIG['seed'] if random_state is None else random_state
+        settings = {
+            'target': target, 'n_splits': n_splits, 'random_state': random_state,
+            'outlier_plan': outlier_plan, 'impute': impute, 'features': features, 'degree': degree,
+        }
+        fingerprint = _fingerprint(df, settings)
+
+        manifest_path = directory / 'manifest.json'
+        if not overwrite and manifest_path.exists():
+            if json.loads(manifest_path.read_text()).get('fingerprint') == fingerprint:
+                print(f"✅ Reusing CV cache at {directory}")
+                return cls(directory)
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+
+        y = _labels(df[target])
+        X = df.drop(columns=[target]).reset_index(drop=True)
+        # Category vocabularies carry no label information, so they are shared by all folds
+        vocabularies = {
+            col: pd.Index(sorted(X[col].dropna().unique(), key=str))
+            for col in X.columns if is_categorical(X[col]) and col not in ENCODING_SPEC
+        }
+
+        folds = np.empty(len(X), dtype=np.int8)
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        fold_sizes = []
+        columns = None
+        for k, (train_idx, valid_idx) in enumerate(splitter.split(np.zeros(len(y)), y)):
+            print(f"🔹 Preparing fold {k + 1}/{n_splits}...")
+            folds[valid_idx] = k
+            fold_dir = directory / f"fold_{k}"
+            fold_dir.mkdir()
+            train, valid = X.iloc[train_idx], X.iloc[valid_idx]
+
+            if impute:
+                imputer = GroupImputer()
+                train = imputer.fit_transform(train)
+                valid = imputer.transform(valid)
+                imputer.save(fold_dir / 'imputer.joblib')
+            encoder = CategoricalEncoder()
+            train, valid = encoder.transform(train), encoder.transform(valid)
+            # Remaining string columns become vocabulary codes; unseen or missing values get -1,
+            # which LightGBM treats as a missing category
+            for col, vocabulary in vocabularies.items():
+                train[col] = vocabulary.get_indexer(train[col]).astype(np.float32)
+                valid[col] = vocabulary.get_indexer(valid[col]).astype(np.float32)
+            engineer = FeatureEngineer(features, degree).fit(train)
+            train, valid = engineer.transform(train), engineer.transform(valid)
+            engineer.save(fold_dir / 'feature_engineer.joblib')
+            if outlier_plan:
+                transformer = OutlierTransformer(outlier_plan)
+                train = transformer.fit_transform(train, copy=False)
+                valid = transformer.transform(valid, copy=False)
+                transformer.save(fold_dir / 'outlier_transformer.joblib')
+
+            columns = list(train.columns)
+            matrix = np.lib.format.open_memmap(
+                fold_dir / 'X.npy', mode='w+', dtype=np.float32, shape=(len(X), len(columns))
+            )
+            matrix[:len(train_idx)] = train.to_numpy(dtype=np.float32)
+            matrix[len(train_idx):] = valid[columns].to_numpy(dtype=np.float32)
+            matrix.flush()
+            del matrix
+            np.save(fold_dir / 'y.npy', np.concatenate([y[train_idx], y[valid_idx]]))
+            np.save(fold_dir / 'index.npy', np.concatenate([train_idx, valid_idx]))
+            fold_sizes.append(int(len(train_idx)))
+
+        np.save(directory / 'folds.npy', folds)
+        manifest = {
+            **settings,
+            'fingerprint': fingerprint,
+            'n_rows': int(len(X)),
+            'columns': columns,
+            'categorical_features': [col for col in columns if col in vocabularies],
+            'categories': {col: [str(value) for value in vocabulary] for col, vocabulary in vocabularies.items()},
+            'n_train': fold_sizes,
+        }
+        # Written last, so an interrupted build is never mistaken for a complete cache
+        manifest_path.write_text(json.dumps(manifest, indent=2, default=str))
+        print(f"💾 Saved {n_splits} folds to {directory}")
+        return cls(directory)
+
+    def __len__(self):
+        return self.n_splits
+
+    def __iter__(self):
+        for k in range(self.n_splits):
+            yield self.fold(k)
+
+    def fold(self, k):
+        """Memory-mapped training and validation views of fold ``k``."""
+        if not 0 <= k < self.n_splits:
+            raise IndexError(f"Fold {k} out of range for {self.n_splits} folds")
+        fold_dir = self.directory / f"fold_{k}"
+        X = np.load(fold_dir / 'X.npy', mmap_mode='r')
+        y = np.load(fold_dir / 'y.npy', mmap_mode='r')
+        index = np.load(fold_dir / 'index.npy', mmap_mode='r')
+        n_train = self.manifest['n_train'][k]
+        return Fold(k, X[:n_train], y[:n_train], X[n_train:], y[n_train:], index[:n_train], index[n_train:])
+
+    def preprocessors(self, k):
+        """Preprocessing fitted on the training rows of fold ``k``, by name."""
+        fold_dir = self.directory / f"fold_{k}"
+        loaders = {
+            'imputer': GroupImputer.load,
+            'feature_engineer': FeatureEngineer.load,
+            'outlier_transformer': OutlierTransformer.load,
+        }
+        return {
+            name: load(fold_dir / f"{name}.joblib")
+            for name, load in loaders.items() if (fold_dir / f"{name}.joblib").exists()
+        }
+
+    def labels(self):
+        """Labels of all rows in input order."""
+        y = np.empty(self.manifest['n_rows'], dtype=np.int8)
+        for fold in self:
+            y[fold.valid_index] = fold.y_valid
+        return y
+
+    def out_of_fold(self, fit_predict):
+        """Out-of-fold predictions of a model trained on every fold.
+
+        Args:
+            fit_predict (callable): Takes a ``Fold`` and returns scores for its
+                validation rows, e.g. by training on ``fold.X_train`` and
+                predicting ``fold.X_valid``
+
+        Returns:
+            np.ndarray: Score of every input row from the fold that held it out
+        """
+        scores = np.full(self.manifest['n_rows'], np.nan)
+        for fold in self:
+            scores[fold.valid_index] = np.asarray(fit_predict(fold), dtype=np.float64)
+        return scores
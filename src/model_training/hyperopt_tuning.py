@@ -0,0 +1,315 @@
+"""Resumable, parallel HyperOpt tuning of LightGBM models.
+
+The training and validation data are binned into LightGBM ``Dataset`` binaries
+once by ``prepare_datasets``; every worker process loads them a single time and
+reuses them for all of its trials, so a trial costs only the boosting itself.
+TPE suggestions are handed to a pool of worker processes, and every finished
+trial is written to a SQLite store at once, so a search that is interrupted, or
+whose workers die, resumes from the trials already recorded.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from hyperopt import STATUS_FAIL, STATUS_OK, Trials, hp, space_eval, tpe
+from hyperopt.base import JOB_STATE_DONE, JOB_STATE_ERROR, JOB_STATE_RUNNING, Domain, spec_from_misc
+from hyperopt.pyll import scope
+
+from ..config import TUNING_CONFIG
+from ..revenue import optimize_thresholds
+
+# Metrics where higher is better; their loss is the negated score
+MAXIMIZED_METRICS = ('auc', 'average_precision')
+
+DEFAULT_SPACE = {
+    'learning_rate': hp.loguniform('learning_rate', np.log(0.01), np.log(0.3)),
+    'num_leaves': scope.int(hp.quniform('num_leaves', 15, 127, 1)),
+    'max_depth': hp.choice('max_depth', [-1, 3, 4, 5, 6, 8, 10, 12]),
+    'min_data_in_leaf': scope.int(hp.quniform('min_data_in_leaf', 10, 200, 1)),
+    'feature_fraction': hp.uniform('feature_fraction', 0.5, 1.0),
+    'bagging_fraction': hp.uniform('bagging_fraction', 0.5, 1.0),
+    'lambda_l1': hp.loguniform('lambda_l1', np.log(1e-8), np.log(10.0)),
+    'lambda_l2': hp.loguniform('lambda_l2', np.log(1e-8), np.log(10.0)),
+}
+
+
+def prepare_datasets(X_train, y_train, X_valid, y_valid, directory=None, categorical_feature='auto', max_bin=255):
+    """Bin the tuning data once and save it for the workers.
+
+    Writes ``train.bin`` and ``valid.bin`` (LightGBM Dataset binaries sharing the
+    training bins) and the validation features and labels as ``.npy`` for
+    metrics that need predictions, such as revenue.
+
+    Args:
+        X_train (pd.DataFrame): Training features; category columns are used as
+            categorical features with ``categorical_feature='auto'``
+        y_train (array-like): Training labels
+        X_valid (pd.DataFrame): Validation features
+        y_valid (array-like): Validation labels
+        directory (str): Output directory; defaults to ``TUNING_CONFIG['dataset_dir']``
+        categorical_feature (list or str): Passed to ``lgb.Dataset``
+        max_bin (int): Histogram bins per feature; fixed for the whole search
+
+    Returns:
+        dict: Paths of the saved files
+    """
+    directory = Path(directory or TUNING_CONFIG['dataset_dir'])
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {name: str(directory / name) for name in ('train.bin', 'valid.bin', 'valid_X.npy', 'valid_y.npy')}
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    # feature_pre_filter=False so trials may lower min_data_in_leaf on the saved bins
+    params = {'max_bin': max_bin, 'feature_pre_filter': False, 'verbose': -1}
+    train = lgb.Dataset(X_train, y_train, categorical_feature=categorical_feature, params=params)
+    valid = lgb.Dataset(X_valid, y_valid, reference=train)
+    train.save_binary(paths['train.bin'])
+    valid.save_binary(paths['valid.bin'])
+
+    # Category columns are stored as their codes, which is what the booster splits on
+    if isinstance(X_valid, pd.DataFrame):
+        X_valid = X_valid.apply(lambda col: col.cat.codes.replace(-1, np.nan) if isinstance(col.dtype, pd.CategoricalDtype) else col)
+    np.save(paths['valid_X.npy'], np.asarray(X_valid, dtype=np.float64))
+    np.save(paths['valid_y.npy'], np.asarray(y_valid, dtype=np.float64))
+    print(f"💾 Saved tuning datasets to {directory}")
+    return {
+        'train': paths['train.bin'], 'valid': paths['valid.bin'],
+        'valid_X': paths['valid_X.npy'], 'valid_y': paths['valid_y.npy'],
+    }
+
+
+class TrialStore:
+    """SQLite history of the trials of one or more studies.
+
+    Args:
+        path (str): Database file
+        study (str): Name of the search; trials of other studies are ignored
+    """
+
+    def __init__(self, path, study):
+        self.path = str(path)
+        self.study = study
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS trials ('
+                ' study TEXT, tid INTEGER, status TEXT, loss REAL, vals TEXT, params TEXT,'
+                ' best_iteration INTEGER, duration REAL, error TEXT, finished_at REAL,'
+                ' PRIMARY KEY (study, tid))'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, tid, status, vals, params, loss=None, best_iteration=None, duration=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.study, tid, status, loss, json.dumps(vals), json.dumps(params, default=float),
+                 best_iteration, duration, error, time.time())
+            )
+
+    def load(self):
+        """Recorded trials of the study, in trial order."""
+        with self._connect() as conn:
+            df = pd.read_sql_query('SELECT * FROM trials WHERE study = ? ORDER BY tid', conn, params=(self.study,))
+        for col in ('vals', 'params'):
+            df[col] = df[col].map(json.loads)
+        return df
+
+
+_WORKER = {}
+
+
+def _init_worker(paths):
+    """Load the binned datasets once per worker process."""
+    train = lgb.Dataset(paths['train'], params={'feature_pre_filter': False, 'verbose': -1}).construct()
+    _WORKER['train'] = train
+    _WORKER['valid'] = lgb.Dataset(paths['valid'], reference=train).construct()
+    _WORKER['valid_X'] = np.load(paths['valid_X'], mmap_mode='r')
+    _WORKER['valid_y'] = np.load(paths['valid_y'], mmap_mode='r')
+
+
+def _run_trial(params, settings):
+    """Train one configuration with early stopping and return its loss."""
+    start = time.time()
+    params = {**settings['base_params'], **params}
+    booster = lgb.train(
+        params, _WORKER['train'],
+        num_boost_round=settings['num_boost_round'],
+        valid_sets=[_WORKER['valid']], valid_names=['valid'],
+        callbacks=[lgb.early_stopping(settings['early_stopping_rounds'], verbose=False)]
+    )
+    loss_name = settings['loss']
+    if loss_name == 'revenue':
+        scores = booster.predict(_WORKER['valid_X'], num_iteration=booster.best_iteration)
+        loss = -float(optimize_thresholds(_WORKER['valid_y'], scores, n_bootstrap=0)['revenue'].iloc[0])
+    else:
+        score = booster.best_score['valid'][loss_name]
+        loss = -score if loss_name in MAXIMIZED_METRICS else score
+    return {'loss': float(loss), 'best_iteration': int(booster.best_iteration), 'duration': time.time() - start}
+
+
+def _plain(vals):
+    """hyperopt ``misc['vals']`` with NumPy scalars converted for JSON."""
+    return {label: [v.item() if hasattr(v, 'item') else v for v in values] for label, values in vals.items()}
+
+
+class HyperoptTuner:
+    """Parallel TPE search over LightGBM parameters with a persisted trial history.
+
+    Each free worker gets its own TPE suggestion; trials still running are
+    visible to TPE with an unknown (infinite) loss, so concurrent suggestions do
+    not pile onto the same point. Re-running a study with the same ``store_path``
+    and ``study`` resumes from its recorded trials.
+
+    Args:
+        paths (dict): Output of ``prepare_datasets``
+        space (dict): HyperOpt search space; defaults to ``DEFAULT_SPACE``
+        study (str): Name of the search in the store
+        store_path (str): SQLite file; defaults to ``TUNING_CONFIG['store']``
+        n_workers (int): Worker processes; defaults to ``TUNING_CONFIG['n_workers']``
+        loss (str): 'revenue' or a LightGBM metric such as 'binary_logloss' or 'auc'
+        num_boost_round (int): Maximum boosting rounds per trial
+        early_stopping_rounds (int): Rounds without validation improvement before stopping
+        base_params (dict): Fixed LightGBM parameters added to every trial
+        seed (int): Seed of the TPE suggestions
+    """
+
+    def __init__(self, paths, space=None, study='lightgbm', store_path=None, n_workers=None, loss='binary_logloss',
+                 num_boost_round=None, early_stopping_rounds=None, base_params=None, seed=42):
+        self.paths = paths
+        self.space = space if space is not None else DEFAULT_SPACE
+        self.store = TrialStore(store_path or TUNING_CONFIG['store'], study)
+        self.n_workers = n_workers or TUNING_CONFIG['n_workers']
+        self.seed = seed
+        threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+        self.settings = {
+            'loss': loss,
+            'num_boost_round': num_boost_round or TUNING_CONFIG['num_boost_round'],
+            'early_stopping_rounds': early_stopping_rounds or TUNING_CONFIG['early_stopping_rounds'],
+            'base_params': {
+                'objective': 'binary', 'metric': ['binary_logloss', 'auc'], 'bagging_freq': 1,
+                'num_threads': threads, 'verbose': -1, 'seed': seed, **(base_params or {})
+            },
+        }
+        self.domain = Domain(lambda params: 0.0, self.space)
+        self.trials = Trials()
+        self._restore()
+
+    def _restore(self):
+        history = self.store.load()
+        if history.empty:
+            return
+        # Reserve every recorded tid so new trials never reuse one
+        self.trials.new_trial_ids(int(history['tid'].max()) + 1)
+        for row in history.itertuples():
+            ok = row.status == STATUS_OK
+            misc = {
+                'tid': row.tid, 'cmd': self.domain.cmd, 'workdir': self.domain.workdir,
+                'idxs': {label: [row.tid] * len(values) for label, values in row.vals.items()},
+                'vals': row.vals,
+            }
+            result = {'status': STATUS_OK, 'loss': row.loss} if ok else {'status': STATUS_FAIL}
+            doc = self.trials.new_trial_docs([row.tid], [None], [result], [misc])[0]
+            doc['state'] = JOB_STATE_DONE if ok else JOB_STATE_ERROR
+            self.trials.insert_trial_docs([doc])
+        self.trials.refresh()
+        print(f"🔁 Resumed study '{self.store.study}' with {len(history)} recorded trials")
+
+    def _suggest(self, rng):
+        tid = self.trials.new_trial_ids(1)
+        self.trials.refresh()
+        doc = tpe.suggest(tid, self.domain, self.trials, int(rng.integers(2 ** 31 - 1)))[0]
+        doc['state'] = JOB_STATE_RUNNING
+        self.trials.insert_trial_docs([doc])
+        self.trials.refresh()
+        doc = next(trial for trial in self.trials._dynamic_trials if trial['tid'] == tid[0])
+        params = space_eval(self.space, spec_from_misc(doc['misc']))
+        return doc, params
+
+    def _finish(self, doc, params, outcome=None, error=None):
+        vals = _plain(doc['misc']['vals'])
+        if outcome is not None:
+            doc['result'] = {'status': STATUS_OK, 'loss': outcome['loss']}
+            doc['state'] = JOB_STATE_DONE
+            self.store.save(doc['tid'], STATUS_OK, vals, params, outcome['loss'],
+                            outcome['best_iteration'], outcome['duration'])
+        else:
+            doc['result'] = {'status': STATUS_FAIL}
+            doc['state'] = JOB_STATE_ERROR
+            self.store.save(doc['tid'], STATUS_FAIL, vals, params, error=error)
+        self.trials.refresh()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker, initargs=(self.paths,))
+
+    def run(self, max_evals=None):
+        """Run trials until the study holds ``max_evals`` of them.
+
+        Returns:
+            dict: Best trial: 'loss', 'params', 'best_iteration' and 'tid'
+        """
+        max_evals = max_evals or TUNING_CONFIG['max_evals']
+        rng = np.random.default_rng(self.seed + len(self.trials._dynamic_trials))
+        pending = {}
+        pool = self._new_pool()
+        try:
+            while pending or len(self.trials._dynamic_trials) < max_evals:
+                while len(pending) < self.n_workers and len(self.trials._dynamic_trials) < max_evals:
+                    doc, params = self._suggest(rng)
+                    pending[pool.submit(_run_trial, params, self.settings)] = (doc, params)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    doc, params = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        self._finish(doc, params, error='worker process died')
+                        continue
+                    except Exception as error:
+                        self._finish(doc, params, error=repr(error))
+                        continue
+                    self._finish(doc, params, outcome)
+                    print(f"✅ Trial {doc['tid']}: loss {outcome['loss']:.6f} "
+                          f"({outcome['best_iteration']} rounds, {outcome['duration']:.1f}s)")
+
+                if broken:
+                    # A worker died (e.g. out of memory) and took the pool down; the
+                    # trials in flight are recorded as failed and the pool is restarted
+                    print("⚠️ Worker process died, restarting the pool")
+                    for doc, params in pending.values():
+                        self._finish(doc, params, error='worker process died')
+                    pending.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return self.best()
+
+    def history(self):
+        """All recorded trials of the study as a DataFrame."""
+        return self.store.load()
+
+    def best(self):
+        """Best successful trial recorded for the study."""
+        history = self.store.load()
+        history = history[history['status'] == STATUS_OK]
+        if history.empty:
+            raise ValueError(f"Study '{self.store.study}' has no successful trials")
+        row = history.loc[history['loss'].idxmin()]
+        return {'tid': int(row['tid']), 'loss': float(row['loss']), 'params': row['params'],
+                'best_iteration': int(row['best_iteration'])}
@@ -1,13 +1,58 @@
-def shap_interaction_selection(model, X, y=None, top_percent=0.2, top_interactions=10):
+import numpy as np
+import pandas as pd
+import shap
+from sklearn.model_selection import train_test_split
+
+
+def stratified_sample(X, y=None, sample_size=20000, random_state=42):
+    """
+    依目標變數分層抽樣，保留原本的正負類比例；資料量不超過 sample_size 時直接回傳原資料
+
+    參數：
+    - X: 特徵資料 (DataFrame)
+    - y: 目標變數 (Series)，None 時改為簡單隨機抽樣
+    - sample_size: 抽樣筆數
+    - random_state: 隨機種子
+
+    Return：
+    - 抽樣後的特徵資料 (DataFrame)
+    """
+    if sample_size is None or len(X) <= sample_size:
+        return X
+    if y is None:
+        return X.sample(n=sample_size, random_state=random_state)
+    sample, _ = train_test_split(X, train_size=sample_size, stratify=np.asarray(y), random_state=random_state)
+    return sample
+
+
+def _positive_class(values):
+    """分類模型可能回傳各類別的 SHAP 值，只取正類 (最後一類)"""
+    if isinstance(values, list):
+        return values[-1]
+    if values.ndim == 4:
+        return values[..., -1]
+    return values
+
+
+def shap_interaction_selection(model, X, y=None, top_percent=0.2, top_interactions=10,
+                               sample_size=20000, batch_size=1000, random_state=42):
     """
     使用 SHAP 計算特徵重要性和交互作用項，並篩選出重要特徵和交互作用特徵
 
+    交互作用值的大小是 (筆數 × 特徵數 × 特徵數)，全量計算 40 萬筆、77 個特徵需要約 19 GB，
+    因此先依 y 分層抽樣，再分批計算交互作用值，邊算邊累加 |交互作用| 的平均，
+    不會產生完整的三維陣列。交互作用矩陣每一列的總和即為該特徵的 SHAP 值，
+    所以特徵重要性也在同一次計算中取得，只建立一個 TreeExplainer。
+
     參數：
-    - model: 訓練好的機器學習模型 (支持 predict 方法)
+    - model: 訓練好的樹模型 (LightGBM、XGBoost 或 sklearn 樹模型)
     - X: 特徵資料 (DataFrame)
-    - y: 目標變數 (Series)，可選
+    - y: 目標變數 (Series)，可選；提供時用於分層抽樣
     - top_percent: 保留的特徵重要性百分比 (0~1)
     - top_interactions: 保留的交互作用特徵數量
+    - sample_size: 用來計算 SHAP 的抽樣筆數，None 表示使用全部資料
+    - batch_size: 每批計算交互作用值的筆數
+    - random_state: 抽樣的隨機種子
 
     Return：
     - top_features: 篩選後的重要特徵名稱 (List)
@@ -15,12 +60,26 @@ def shap_interaction_selection(model, X, y=None, top_percent=0.2, top_interactio
     - interaction_df: 所有交互作用特徵值 (DataFrame)
     """
 
-    # === 計算 SHAP 值 ===
-    explainer = shap.Explainer(model, X)
-    shap_values = explainer(X)
+    # === 分層抽樣 ===
+    X_sample = stratified_sample(X, y, sample_size, random_state)
+    print(f"\n 使用 {len(X_sample)} / {len(X)} 筆資料計算 SHAP")
+
+    # 交互作用值只支援 tree_path_dependent，不需要背景資料
+    explainer = shap.TreeExplainer(model)
+
+    # === 分批計算 SHAP 交互作用，累加絕對值 ===
+    n_features = X_sample.shape[1]
+    interaction_sum = np.zeros((n_features, n_features))
+    importance_sum = np.zeros(n_features)
+    for start in range(0, len(X_sample), batch_size):
+        batch = X_sample.iloc[start:start + batch_size]
+        interaction_values = _positive_class(explainer.shap_interaction_values(batch))
+        interaction_sum += np.abs(interaction_values).sum(axis=0)
+        # 每列交互作用值的總和就是該特徵的 SHAP 值
+        importance_sum += np.abs(interaction_values.sum(axis=2)).sum(axis=0)
 
     # 計算特徵重要性 (取絕對值平均)
-    shap_importance = np.abs(shap_values.values).mean(axis=0)
+    shap_importance = importance_sum / len(X_sample)
     feature_importance = pd.Series(shap_importance, index=X.columns).sort_values(ascending=False)
 
     # === 篩選重要特徵 ===
@@ -30,12 +89,9 @@ def shap_interaction_selection(model, X, y=None, top_percent=0.2, top_interactio
     print(f"\n SHAP 特徵重要性 (Top {int(top_percent * 100)}%):")
     print(feature_importance.head(10))
 
-    # === 計算 SHAP 交互作用 ===
-    print("\n 計算交互作用效果：")
-    interaction_values = shap.TreeExplainer(model).shap_interaction_values(X)
-
     # 生成交互作用特徵的 DataFrame
-    interaction_df = pd.DataFrame(np.abs(interaction_values).mean(axis=0), columns=X.columns, index=X.columns)
+    print("\n 計算交互作用效果：")
+    interaction_df = pd.DataFrame(interaction_sum / len(X_sample), columns=X.columns, index=X.columns)
 
     # 篩選交互作用強的特徵對
     interaction_pairs = interaction_df.unstack().sort_values(ascending=False)
@@ -48,4 +104,4 @@ def shap_interaction_selection(model, X, y=None, top_percent=0.2, top_interactio
     for pair in top_interaction_pairs:
         print(f"{pair[0]} x {pair[1]}: {interaction_df.loc[pair[0], pair[1]]:.4f}")
 
-    return top_features, top_interaction_pairs, interaction_df
\ No newline at end of file
+    return top_features, top_interaction_pairs, interaction_df
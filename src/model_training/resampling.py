@@ -0,0 +1,407 @@
+"""Class-imbalance resampling with SMOTENC and a tabular GAN, plus a cache of synthetic rows.
+
+Only about 5% of the policyholders had a heart attack, so both samplers work on
+the minority class alone: ``FastSMOTENC`` builds its neighbour index over the
+minority rows instead of the whole frame, and ``TabularGAN`` is trained on them.
+Both expose ``sample(X, y, n_samples)`` returning synthetic minority rows, and
+``SyntheticPool`` stores those rows on disk under a key derived from the data and
+the sampler parameters, so experiments reuse an augmented pool instead of
+generating it again.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+from ..config import DATA_PATH, RESAMPLING_CONFIG
+from ..data_io import read_dataset, write_dataset
+
+
+def _minority(X, y):
+    """Rows of the minority class and its label."""
+    y = np.asarray(y)
+    labels, counts = np.unique(y, return_counts=True)
+    label = labels[counts.argmin()]
+    return X[y == label].reset_index(drop=True), label
+
+
+def n_samples_for_ratio(y, ratio):
+    """Synthetic minority rows needed for a minority/majority ratio of ``ratio``."""
+    counts = np.unique(np.asarray(y), return_counts=True)[1]
+    return max(int(round(ratio * counts.max())) - int(counts.min()), 0)
+
+
+def _split_columns(X, categorical_features):
+    if categorical_features is None:
+        categorical_features = [
+            col for col in X.columns
+            if not pd.api.types.is_numeric_dtype(X[col]) or pd.api.types.is_bool_dtype(X[col])
+        ]
+    categorical = [col for col in X.columns if col in set(categorical_features)]
+    continuous = [col for col in X.columns if col not in set(categorical)]
+    return continuous, categorical
+
+
+def _decode(codes, uniques, like):
+    """Column of category codes mapped back to the values (and dtype) of ``like``."""
+    values = uniques.take(codes)
+    if isinstance(like.dtype, pd.CategoricalDtype):
+        return pd.Categorical(values, dtype=like.dtype)
+    return values.astype(like.dtype) if isinstance(like.dtype, np.dtype) else values
+
+
+class FastSMOTENC:
+    """SMOTENC over the minority class only, with a parallel neighbour index.
+
+    Follows imbalanced-learn's ``SMOTENC``: continuous features are interpolated
+    between a minority row and one of its ``k_neighbors`` nearest minority
+    neighbours, and each categorical feature takes the most frequent value among
+    those neighbours (smallest code on ties). Distances use the continuous
+    features plus the one-hot encoded categories scaled by half the median
+    standard deviation of the continuous features. The index is built on the
+    minority rows only, queried with ``n_jobs`` workers, and the categorical
+    modes of all new rows are counted with one ``bincount`` per column. Unlike
+    imbalanced-learn, missing values are accepted: a continuous value is missing
+    in a new row when it is missing at either end of the interpolation.
+
+    Args:
+        categorical_features (list): Categorical column names; defaults to the
+            non-numeric columns
+        k_neighbors (int): Neighbours used for interpolation and the modes
+        random_state (int): Seed of the sampling
+        n_jobs (int): Workers of the neighbour search; -1 uses all cores
+    """
+
+    def __init__(self, categorical_features=None, k_neighbors=5, random_state=42, n_jobs=-1):
+        self.categorical_features = categorical_features
+        self.k_neighbors = k_neighbors
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def get_params(self):
+        return {
+            'categorical_features': self.categorical_features, 'k_neighbors': self.k_neighbors,
+            'random_state': self.random_state,
+        }
+
+    def sample(self, X, y, n_samples):
+        """Generate ``n_samples`` synthetic minority rows.
+
+        Args:
+            X (pd.DataFrame): Features
+            y (array-like): Labels
+            n_samples (int): Rows to generate
+
+        Returns:
+            pd.DataFrame: Synthetic rows with the columns and dtypes of ``X``
+        """
+        minority, _ = _minority(X, y)
+        continuous, categorical = _split_columns(minority, self.categorical_features)
+        rng = np.random.default_rng(self.random_state)
+        k = min(self.k_neighbors, len(minority) - 1)
+        if k < 1:
+            raise ValueError("The minority class needs at least 2 rows")
+
+        numeric = minority[continuous].to_numpy(dtype=np.float64)
+        coded = [pd.factorize(minority[col], sort=True) for col in categorical]
+
+        # Distance space of SMOTENC: continuous values plus scaled one-hot categories
+        stds = np.nanstd(numeric, axis=0) if continuous else np.zeros(0)
+        scale = np.median(stds) if stds.size else 1.0
+        blocks = [np.nan_to_num(numeric)]
+        for codes, uniques in coded:
+            onehot = np.zeros((len(minority), len(uniques) + 1), dtype=np.float64)
+            onehot[np.arange(len(minority)), codes] = scale / 2  # code -1 (missing) lands in the last column
+            blocks.append(onehot)
+        space = np.hstack(blocks)
+
+        index = NearestNeighbors(n_neighbors=k + 1, n_jobs=self.n_jobs).fit(space)
+        neighbors = index.kneighbors(space, return_distance=False)[:, 1:]
+
+        rows = rng.integers(len(minority), size=n_samples)
+        chosen = neighbors[rows, rng.integers(k, size=n_samples)]
+        gaps = rng.random((n_samples, 1))
+
+        synthetic = {}
+        new_numeric = numeric[rows] + gaps * (numeric[chosen] - numeric[rows])
+        for j, col in enumerate(continuous):
+            values = new_numeric[:, j]
+            if pd.api.types.is_integer_dtype(minority[col]):
+                values = np.round(values).astype(minority[col].dtype)
+            synthetic[col] = values
+
+        # Mode of every categorical over each new row's neighbours, all rows at once
+        neighbor_rows = neighbors[rows]
+        for col, (codes, uniques) in zip(categorical, coded):
+            width = len(uniques) + 1
+            shifted = codes[neighbor_rows] + 1  # missing (-1) becomes 0
+            counts = np.bincount(
+                (np.arange(n_samples)[:, None] * width + shifted).ravel(),
+                minlength=n_samples * width
+            ).reshape(n_samples, width)
+            best = counts[:, 1:].argmax(axis=1)
+            # Rows whose neighbours are all missing keep the value missing
+            best = np.where(counts[:, 1:].max(axis=1) > 0, best, -1)
+            values = pd.Series(_decode(np.maximum(best, 0), uniques, minority[col]))
+            synthetic[col] = values.where(best >= 0)
+
+        return pd.DataFrame(synthetic)[list(X.columns)]
+
+    def fit_resample(self, X, y, ratio=None):
+        """Append synthetic minority rows until minority/majority reaches ``ratio``.
+
+        Args:
+            X (pd.DataFrame): Features
+            y (array-like): Labels
+            ratio (float): Target ratio; defaults to ``RESAMPLING_CONFIG['ratio']``
+
+        Returns:
+            tuple: Resampled ``(X, y)``
+        """
+        return _append(X, y, self.sample(X, y, n_samples_for_ratio(y, ratio or RESAMPLING_CONFIG['ratio'])))
+
+
+def _append(X, y, synthetic):
+    label = _minority(X, y)[1]
+    y_synthetic = np.full(len(synthetic), label, dtype=np.asarray(y).dtype)
+    X_res = pd.concat([X.reset_index(drop=True), synthetic], ignore_index=True)
+    return X_res, np.concatenate([np.asarray(y), y_synthetic])
+
+
+def _torch():
+    try:
+        import torch
+    except ImportError as error:
+        raise ImportError("TabularGAN needs PyTorch; install it with 'pip install torch'") from error
+    return torch
+
+
+class TabularGAN:
+    """GAN trained on the minority rows, generating synthetic rows in batches on the CPU.
+
+    Continuous features are standardized and categorical features one-hot
+    encoded; the generator outputs the continuous values plus one
+    Gumbel-softmax block per categorical feature, so it can learn discrete
+    values. PyTorch is only imported when the GAN is fitted.
+
+    Args:
+        categorical_features (list): Categorical column names; defaults to the
+            non-numeric columns
+        latent_dim (int): Size of the noise vector
+        hidden_dim (int): Width of the hidden layers
+        epochs (int): Training epochs over the minority rows
+        batch_size (int): Training batch size
+        generate_batch_size (int): Rows generated per forward pass
+        lr (float): Adam learning rate of both networks
+        random_state (int): Seed of PyTorch and NumPy
+        n_threads (int): PyTorch CPU threads; None keeps the default
+    """
+
+    def __init__(self, categorical_features=None, latent_dim=64, hidden_dim=256, epochs=300, batch_size=512,
+                 generate_batch_size=65_536, lr=2e-4, random_state=42, n_threads=None):
+        self.categorical_features = categorical_features
+        self.latent_dim = latent_dim
+        self.hidden_dim = hidden_dim
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.generate_batch_size = generate_batch_size
+        self.lr = lr
+        self.random_state = random_state
+        self.n_threads = n_threads
+        self.generator_ = None
+
+    def get_params(self):
+        return {
+            'categorical_features': self.categorical_features, 'latent_dim': self.latent_dim,
+            'hidden_dim': self.hidden_dim, 'epochs': self.epochs, 'batch_size': self.batch_size,
+            'lr': self.lr, 'random_state': self.random_state,
+        }
+
+    def _encode(self, df):
+        blocks = [((df[self.continuous_].to_numpy(dtype=np.float64) - self.means_) / self.stds_)]
+        for col in self.categorical_:
+            codes = self.vocabularies_[col].get_indexer(df[col])
+            onehot = np.zeros((len(df), len(self.vocabularies_[col]) + 1))
+            onehot[np.arange(len(df)), codes] = 1.0  # missing or unseen in the last column
+            blocks.append(onehot)
+        return np.nan_to_num(np.hstack(blocks)).astype(np.float32)
+
+    def _networks(self, torch, width):
+        nn = torch.nn
+        generator = nn.Sequential(
+            nn.Linear(self.latent_dim, self.hidden_dim), nn.BatchNorm1d(self.hidden_dim), nn.ReLU(),
+            nn.Linear(self.hidden_dim, self.hidden_dim), nn.BatchNorm1d(self.hidden_dim), nn.ReLU(),
+            nn.Linear(self.hidden_dim, width),
+        )
+        discriminator = nn.Sequential(
+            nn.Linear(width, self.hidden_dim), nn.LeakyReLU(0.2), nn.Dropout(0.3),
+            nn.Linear(self.hidden_dim, self.hidden_dim), nn.LeakyReLU(0.2), nn.Dropout(0.3),
+            nn.Linear(self.hidden_dim, 1),
+        )
+        return generator, discriminator
+
+    def _activate(self, torch, raw, hard=False):
+        """Continuous outputs as they are, categorical blocks through (Gumbel-)softmax."""
+        parts = [raw[:, :len(self.continuous_)]]
+        start = len(self.continuous_)
+        for col in self.categorical_:
+            stop = start + len(self.vocabularies_[col]) + 1
+            parts.append(torch.nn.functional.gumbel_softmax(raw[:, start:stop], tau=0.2, hard=hard))
+            start = stop
+        return torch.cat(parts, dim=1)
+
+    def fit(self, X, y=None):
+        """Train the GAN on the minority rows of ``X`` (all rows when ``y`` is None)."""
+        torch = _torch()
+        torch.manual_seed(self.random_state)
+        if self.n_threads:
+            torch.set_num_threads(self.n_threads)
+
+        minority = X.reset_index(drop=True) if y is None else _minority(X, y)[0]
+        self.columns_ = list(X.columns)
+        self.dtypes_ = X.dtypes.to_dict()
+        self.continuous_, self.categorical_ = _split_columns(minority, self.categorical_features)
+        numeric = minority[self.continuous_].to_numpy(dtype=np.float64)
+        self.means_ = np.nanmean(numeric, axis=0)
+        self.stds_ = np.where(np.nanstd(numeric, axis=0) > 0, np.nanstd(numeric, axis=0), 1.0)
+        self.vocabularies_ = {
+            col: pd.Index(pd.factorize(minority[col], sort=True)[1]) for col in self.categorical_
+        }
+        data = torch.from_numpy(self._encode(minority))
+
+        generator, discriminator = self._networks(torch, data.shape[1])
+        g_opt = torch.optim.Adam(generator.parameters(), lr=self.lr, betas=(0.5, 0.9))
+        d_opt = torch.optim.Adam(discriminator.parameters(), lr=self.lr, betas=(0.5, 0.9))
+        loss_fn = torch.nn.BCEWithLogitsLoss()
+        loader = torch.utils.data.DataLoader(data, batch_size=self.batch_size, shuffle=True, drop_last=len(data) > self.batch_size)
+
+        for epoch in range(self.epochs):
+            for real in loader:
+                ones = torch.ones(len(real), 1)
+                zeros = torch.zeros(len(real), 1)
+                noise = torch.randn(len(real), self.latent_dim)
+                fake = self._activate(torch, generator(noise))
+
+                d_opt.zero_grad()
+                d_loss = loss_fn(discriminator(real), ones) + loss_fn(discriminator(fake.detach()), zeros)
+                d_loss.backward()
+                d_opt.step()
+
+                g_opt.zero_grad()
+                g_loss = loss_fn(discriminator(fake), ones)
+                g_loss.backward()
+                g_opt.step()
+            if (epoch + 1) % 50 == 0:
+                print(f"🔹 Epoch {epoch + 1}/{self.epochs}: D loss {d_loss.item():.4f}, G loss {g_loss.item():.4f}")
+
+        self.generator_ = generator.eval()
+        return self
+
+    def generate(self, n_samples):
+        """Generate ``n_samples`` rows with the trained generator, in batches."""
+        if self.generator_ is None:
+            raise ValueError("TabularGAN is not fitted yet")
+        torch = _torch()
+        batches = []
+        with torch.no_grad():
+            for start in range(0, n_samples, self.generate_batch_size):
+                size = min(self.generate_batch_size, n_samples - start)
+                raw = self.generator_(torch.randn(size, self.latent_dim))
+                batches.append(self._activate(torch, raw, hard=True).numpy())
+        encoded = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+        synthetic = {}
+        numeric = encoded[:, :len(self.continuous_)] * self.stds_ + self.means_
+        for j, col in enumerate(self.continuous_):
+            values = numeric[:, j]
+            if pd.api.types.is_integer_dtype(self.dtypes_[col]):
+                values = np.round(values).astype(self.dtypes_[col])
+            synthetic[col] = values
+        start = len(self.continuous_)
+        for col in self.categorical_:
+            vocabulary = self.vocabularies_[col]
+            stop = start + len(vocabulary) + 1
+            codes = encoded[:, start:stop].argmax(axis=1)
+            values = pd.Series(vocabulary.take(np.minimum(codes, len(vocabulary) - 1)))
+            if isinstance(self.dtypes_[col], pd.CategoricalDtype):
+                values = values.astype(self.dtypes_[col])
+            synthetic[col] = values.where(codes < len(vocabulary))
+            start = stop
+        return pd.DataFrame(synthetic)[self.columns_]
+
+    def sample(self, X, y, n_samples):
+        """Train on the minority rows of ``X`` and generate ``n_samples`` rows."""
+        return self.fit(X, y).generate(n_samples)
+
+
+def data_fingerprint(X, y):
+    """Content hash of a feature frame and its labels."""
+    digest = hashlib.sha1(json.dumps([[str(col), str(dtype)] for col, dtype in X.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(np.ascontiguousarray(np.asarray(y)).tobytes())
+    return digest.hexdigest()
+
+
+class SyntheticPool:
+    """Content-addressed store of generated synthetic rows.
+
+    A pool is keyed on the data fingerprint, the sampler class and its
+    parameters, and the number of rows, and stored as Parquet with an index of
+    keys, so asking again for the same augmentation reads it back instead of
+    running the sampler.
+
+    Args:
+        directory (str): Pool directory; defaults to ``DATA_PATH['synthetic_pool']``
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or DATA_PATH['synthetic_pool'])
+
+    @staticmethod
+    def key(X, y, sampler, n_samples):
+        spec = {
+            'data': data_fingerprint(X, y),
+            'sampler': type(sampler).__name__,
+            'params': sampler.get_params(),
+            'n_samples': int(n_samples),
+        }
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest(), spec
+
+    def get(self, X, y, sampler, n_samples):
+        """Synthetic rows for this data and sampler, generated on a cache miss."""
+        key, spec = self.key(X, y, sampler, n_samples)
+        path = self.directory / f"{key}.parquet"
+        if path.exists():
+            print(f"✅ Reusing synthetic pool {key[:12]} ({spec['sampler']}, {n_samples} rows)")
+            synthetic = read_dataset(str(path))
+            # Parquet brings strings back as category; restore the input dtypes
+            return synthetic.astype({col: dtype for col, dtype in X.dtypes.items() if synthetic[col].dtype != dtype})
+
+        print(f"🔹 Generating {n_samples} rows with {spec['sampler']}...")
+        synthetic = sampler.sample(X, y, n_samples)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + '.tmp.parquet')
+        write_dataset(synthetic, str(tmp))
+        tmp.replace(path)
+        (self.directory / f"{key}.json").write_text(json.dumps(spec, indent=2, default=str))
+        return synthetic
+
+    def augment(self, X, y, sampler, ratio=None):
+        """``X`` and ``y`` with cached synthetic minority rows appended up to ``ratio``.
+
+        Args:
+            X (pd.DataFrame): Features
+            y (array-like): Labels
+            sampler: ``FastSMOTENC``, ``TabularGAN`` or any object with
+                ``sample(X, y, n_samples)`` and ``get_params()``
+            ratio (float): Minority/majority ratio; defaults to ``RESAMPLING_CONFIG['ratio']``
+
+        Returns:
+            tuple: Augmented ``(X, y)``
+        """
+        n_samples = n_samples_for_ratio(y, ratio or RESAMPLING_CONFIG['ratio'])
+        return _append(X, y, self.get(X, y, sampler, n_samples))
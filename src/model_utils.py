@@ -1,67 +1,63 @@
 import pandas as pd
-import numpy as np
-from typing import Tuple, List, Optional
-import h2o
-from h2o.automl import H2OAutoML
+from typing import TYPE_CHECKING, Tuple, List, Optional
 from pathlib import Path
 import joblib
-from sklearn.preprocessing import LabelEncoder
 
-def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Optimize memory usage by converting data types.
-    """
-    # Convert object columns to category
-    object_columns = df.select_dtypes(include=['object']).columns
-    for col in object_columns:
-        df[col] = df[col].astype('category')
-    
-    # Convert integer columns to smallest possible type
-    int_columns = df.select_dtypes(include=['int64']).columns
-    for col in int_columns:
-        max_val = df[col].max()
-        min_val = df[col].min()
-        
-        if min_val >= 0:
-            if max_val <= 255:
-                df[col] = df[col].astype(np.uint8)
-            elif max_val <= 65535:
-                df[col] = df[col].astype(np.uint16)
-        else:
-            if min_val >= -128 and max_val <= 127:
-                df[col] = df[col].astype(np.int8)
-            elif min_val >= -32768 and max_val <= 32767:
-                df[col] = df[col].astype(np.int16)
-    
-    return df
+from .data_io import read_dataset, read_schema, schema_path_for
+from .dtype_planner import (
+    format_memory_report,
+    optimize_dtypes,
+    plan_from_profile,
+    profile_file,
+    read_planned
+)
+from .feature_engineering.feature_selection import prune_correlated_features
+
+if TYPE_CHECKING:
+    from h2o.automl import H2OAutoML
 
 def load_and_preprocess_data(
     file_path: str,
     target_col: str,
     feature_selection: bool = True,
-    correlation_threshold: float = 0.95
+    correlation_threshold: float = 0.95,
+    columns: Optional[List[str]] = None,
+    schema_path: Optional[str] = None
 ) -> Tuple[pd.DataFrame, List[str]]:
     """
     Load and preprocess data with optimized memory usage and optional feature selection.
+
+    Only ``columns`` are loaded when given; Parquet files are read column by column,
+    so the rest of the file is never decoded. With ``schema_path`` (a ``dtype.csv``),
+    the file is first profiled in chunks and then loaded directly with the narrowest
+    dtypes, so the full frame is never held with wide types. The schema must
+    describe ``file_path`` as stored, e.g. the ``schema_path_for(file_path)`` file
+    the pipeline stage that produced it wrote; the shipped ``data/raw/dtype.csv``
+    describes the encoded frame, not the raw survey strings. Redundant features
+    are pruned with ``prune_correlated_features``.
     """
-    # Read data with optimized chunk size
-    df = pd.read_csv(file_path, sep=',', encoding='utf-8')
-    
-    # Optimize data types
-    df = optimize_dtypes(df)
+    if columns is not None and target_col not in columns:
+        columns = list(columns) + [target_col]
+
+    if schema_path is not None:
+        try:
+            profile = profile_file(file_path, schema=read_schema(schema_path), columns=columns)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(
+                f"'{schema_path}' does not describe '{file_path}' as stored; pass the schema the "
+                f"stage producing the file writes ({schema_path_for(file_path)}) or no schema"
+            ) from exc
+        df = read_planned(file_path, plan_from_profile(profile), columns=columns)
+        after = df.memory_usage(deep=True, index=False).sum()
+        print(f"💾 Memory usage: {format_memory_report(profile['bytes'].sum(), after)}")
+    else:
+        df = optimize_dtypes(read_dataset(file_path, columns=columns))
     
     # Feature selection if enabled
     selected_features = list(df.columns)
     if feature_selection and target_col in df.columns:
-        # Remove highly correlated features
-        correlation_matrix = df.corr().abs()
-        upper = correlation_matrix.where(np.triu(np.ones(correlation_matrix.shape), k=1).astype(bool))
-        to_drop = [column for column in upper.columns if any(upper[column] > correlation_threshold)]
-        
-        # Make sure we don't drop the target column
-        if target_col in to_drop:
-            to_drop.remove(target_col)
-            
+        # Remove highly correlated features, keeping the one most related to the target
+        to_drop = prune_correlated_features(df, target_col, correlation_threshold)
         df = df.drop(columns=to_drop)
         selected_features = list(df.columns)
     
@@ -74,12 +70,18 @@ def train_h2o_model(
     max_runtime_secs: int = 3600,
     max_models: int = 20,
     seed: int = 42
-) -> Tuple[H2OAutoML, dict]:
+) -> Tuple['H2OAutoML', dict]:
     """
     Train an H2O AutoML model with optimized settings.
     """
-    # Initialize H2O
-    h2o.init()
+    # H2O is only imported by the functions that use it
+    import h2o
+    from h2o.automl import H2OAutoML
+
+    from .h2o_session import ensure_cluster
+
+    # Connect to the shared H2O cluster, starting it on first use
+    ensure_cluster()
     
     # Convert to H2O frame
     train = h2o.H2OFrame(df)
@@ -113,7 +115,7 @@ def train_h2o_model(
     return aml, performance
 
 def save_model_artifacts(
-    model: H2OAutoML,
+    model: 'H2OAutoML',
     selected_features: List[str],
     performance: dict,
     output_dir: str
@@ -121,6 +123,8 @@ def save_model_artifacts(
     """
     Save model artifacts and metadata.
     """
+    import h2o
+
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
@@ -0,0 +1,147 @@
+"""Plots of the model evaluation and the outlier analysis.
+
+matplotlib and seaborn are only needed for these plots, so they are imported by
+this module alone; the modules that offer plotting import it when a plot is
+actually requested.
+"""
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+from scipy import stats
+
+
+def plot_confusion_matrix(confusion_matrix):
+    """Plot confusion matrix.
+
+    Args:
+        confusion_matrix (np.array): Confusion matrix from ``HeartAttackPredictor.evaluate``
+    """
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(confusion_matrix, annot=True, fmt="d", cmap="Blues")
+    plt.xlabel("Predicted Label")
+    plt.ylabel("True Label")
+    plt.title("Confusion Matrix")
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_feature_importance(feature_importance, top_n=30):
+    """Plot feature importance.
+
+    Args:
+        feature_importance (list): H2O ``varimp()`` rows with 'variable' and 'relative_importance'
+        top_n (int): Number of top features to plot
+    """
+    # Convert to pandas DataFrame
+    importance_df = pd.DataFrame(feature_importance)
+    importance_df = importance_df.sort_values(by="relative_importance", ascending=False)
+
+    # Plot top N features
+    plt.figure(figsize=(10, 6))
+    sns.barplot(
+        y=importance_df['variable'].head(top_n),
+        x=importance_df['relative_importance'].head(top_n),
+        palette='Set2'
+    )
+    plt.xlabel('Relative Importance')
+    plt.ylabel('Feature')
+    plt.title(f'Top {top_n} Feature Importance')
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_outliers(df, method, boxplot_cols=None, scatterplot_cols=None):
+    """
+    Plot detected outliers against inliers.
+
+    Parameters:
+        df (pd.DataFrame): Data with an 'outlier_label' column ('Outlier' or 'Inlier').
+        method (str): Detection method, used in the titles.
+        boxplot_cols (list): Columns to show in boxplots.
+        scatterplot_cols (list): Two columns to show in scatter plot.
+    """
+    # Boxplots
+    if boxplot_cols:
+        for col in boxplot_cols:
+            if col in df.columns:
+                plt.figure(figsize=(10, 4))
+                sns.boxplot(x='outlier_label', y=col, data=df, palette='Set2')
+                plt.title(f"Boxplot of {col} by Outlier Label ({method})")
+                plt.show()
+
+    # Scatterplot
+    if scatterplot_cols and len(scatterplot_cols) == 2:
+        x, y = scatterplot_cols
+        if x in df.columns and y in df.columns:
+            plt.figure(figsize=(8, 6))
+            sns.scatterplot(
+                x=df[x],
+                y=df[y],
+                hue=df['outlier_label'],
+                palette='Set2',
+                alpha=0.3
+            )
+            plt.title(f"Scatter Plot of {x} vs {y} ({method})")
+            plt.show()
+
+
+def plot_transformed(df, column, transformed_df, transformed_column, method):
+    """
+    Plot the original and transformed data as separate images.
+    """
+    plt.figure(figsize=(14, 6))
+
+    # Plot Original Data (Before Transformation)
+    plt.subplot(1, 2, 1)
+    sns.kdeplot(df[column], fill=True, color='blue', alpha=0.5, linewidth=2)
+    plt.title(f'Original {column} - Distribution')
+    plt.xlabel(column)
+    plt.ylabel('Density')
+
+    # Boxplot of Original Data
+    plt.subplot(1, 2, 2)
+    sns.boxplot(x=df[column], palette='Set2')
+    plt.title(f'Original {column} - Boxplot')
+
+    plt.tight_layout()
+    plt.show()
+
+    # Plot Transformed Data (After Transformation)
+    plt.figure(figsize=(14, 6))
+
+    # Distribution (KDE) of Transformed Data
+    plt.subplot(1, 2, 1)
+    sns.kdeplot(transformed_df[transformed_column], fill=True, color='red', alpha=0.5, linewidth=2)
+    plt.title(f'{method} - Transformed {column} - Distribution')
+    plt.xlabel(column)
+    plt.ylabel('Density')
+
+    # Boxplot of Transformed Data
+    plt.subplot(1, 2, 2)
+    sns.boxplot(x=transformed_df[transformed_column], palette='Set2')
+    plt.title(f'{method} - Transformed {column} - Boxplot')
+
+    plt.tight_layout()
+    plt.show()
+
+
+# QQ plot to visually inspect normality
+def qq_plot(df, column, method, palette='Set2'):
+
+    # Create the QQ plot
+    plt.figure(figsize=(12, 12))
+
+    # Generate the QQ plot (this will return values for quantiles and theoretical quantiles)
+    res = stats.probplot(df[column], dist="norm", plot=plt)
+
+    # Extract the points (x, y) from the QQ plot for further customization
+    line = res[0]
+
+    plt.scatter(line[0], line[1], color= '#66c2a5', label=f'{method} Transformation')
+
+    # Set plot title and labels
+    plt.title(f"QQ Plot of {column} ({method} Transformation)")
+    plt.legend()
+
+    plt.show()
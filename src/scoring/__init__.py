@@ -0,0 +1,12 @@
+"""Scoring of the trained models without the training libraries."""
+
+from .pipeline import ScoringPipeline
+from .server import MicroBatcher, ScoringServer
+from .tree_ensemble import TreeEnsemble
+
+__all__ = [
+    'MicroBatcher',
+    'ScoringPipeline',
+    'ScoringServer',
+    'TreeEnsemble'
+]
@@ -0,0 +1,129 @@
+"""Stub client generating load against the scoring server.
+
+Each simulated client keeps one connection open and sends single-record
+``/predict`` requests back to back, so ``concurrency`` clients keep that many
+requests in flight. Client-side latencies are summarised as p50/p99 next to
+the server's own ``/metrics``.
+
+Run with ``python -m src.scoring.client --requests 200 --concurrency 32`` while
+the server is running.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from ..config import DATA_PATH, SERVING_CONFIG
+from ..data_preprocessing.encoding import ENCODING_SPEC
+from .pipeline import REFERENCE_RECORD, ScoringPipeline
+from .server import latency_summary
+
+
+def stub_records(pipeline, n=1000, seed=42):
+    """Random raw records with every input column of ``pipeline``.
+
+    Categorical answers are drawn from the encoder's vocabulary or the model's
+    categories; numeric columns vary around their ``REFERENCE_RECORD`` value.
+    """
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        record = {}
+        for col in pipeline.input_columns:
+            choices = list(ENCODING_SPEC.get(col, pipeline.model.categories.get(col, [])))
+            if choices:
+                record[col] = choices[rng.integers(len(choices))]
+            else:
+                reference = REFERENCE_RECORD.get(col)
+                scale = reference if isinstance(reference, (int, float)) else 1.0
+                record[col] = round(float(scale * rng.uniform(0.7, 1.3)), 2)
+        records.append(record)
+    return records
+
+
+async def _request(reader, writer, host, method, path, body=b''):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    return int(status_line.split()[1]), payload
+
+
+async def _client(host, port, bodies, n_requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, 'POST', '/predict', bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def fetch(host, port, path):
+    """GET ``path`` from the server and return the decoded JSON."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await _request(reader, writer, host, 'GET', path))[1]
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, records, concurrency=32, requests_per_client=200):
+    """Drive the server with ``concurrency`` keep-alive clients.
+
+    Returns:
+        dict: Client latency summary, throughput, error count and the server's metrics
+    """
+    bodies = [json.dumps(record).encode() for record in records]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies[i::concurrency] or bodies, requests_per_client, latencies, errors)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    report = latency_summary(latencies)
+    report['throughput_rps'] = round(len(latencies) / elapsed, 1)
+    report['errors'] = len(errors)
+    report['server'] = await fetch(host, port, '/metrics')
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the scoring server with stub records.')
+    parser.add_argument('--model', default=DATA_PATH['lightgbm_model'], help='Model the server runs, for the record schema')
+    parser.add_argument('--host', default=SERVING_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVING_CONFIG['port'])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client')
+    args = parser.parse_args(argv)
+
+    records = stub_records(ScoringPipeline.load(args.model))
+    report = asyncio.run(run_load_test(args.host, args.port, records, args.concurrency, args.requests))
+    print(f"📊 {report['count']} requests, {report['throughput_rps']} req/s, {report['errors']} errors")
+    print(f"⏱️ Client latency p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms")
+    server = report['server']
+    print(f"⏱️ Server latency p50 {server['p50_ms']} ms, p99 {server['p99_ms']} ms, "
+          f"mean batch {server['mean_batch_size']}")
+
+
+if __name__ == '__main__':
+    main()
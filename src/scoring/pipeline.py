@@ -0,0 +1,209 @@
+"""Scoring pipeline from raw policyholder records to predicted probabilities."""
+
+from pathlib import Path
+
+import numpy as np
+
+from ..config import FEATURE_CONFIG
+from ..data_preprocessing.encoding import CategoricalEncoder
+from ..feature_engineering.feature_engineering import (
+    FeatureScaler,
+    build_features,
+    interaction_terms,
+    polynomial_terms
+)
+from .tree_ensemble import TreeEnsemble
+
+# A typical survey answer, used to check that raw records reach the model on its training scale
+REFERENCE_RECORD = {
+    'State': 'CA', 'Sex': 'Female', 'GeneralHealth': 'Very good', 'PhysicalHealthDays': 2.0,
+    'MentalHealthDays': 3.0, 'LastCheckupTime': 'Within past year (anytime less than 12 months ago)',
+    'PhysicalActivities': 'Yes', 'SleepHours': 7.0, 'RemovedTeeth': 'None of them', 'HadAngina': 'No',
+    'HadStroke': 'No', 'HadAsthma': 'No', 'HadSkinCancer': 'No', 'HadCOPD': 'No',
+    'HadDepressiveDisorder': 'No', 'HadKidneyDisease': 'No', 'HadArthritis': 'No', 'HadDiabetes': 'No',
+    'DeafOrHardOfHearing': 'No', 'BlindOrVisionDifficulty': 'No', 'DifficultyConcentrating': 'No',
+    'DifficultyWalking': 'No', 'DifficultyDressingBathing': 'No', 'DifficultyErrands': 'No',
+    'SmokerStatus': 'Never smoked', 'ECigaretteUsage': 'Never used e-cigarettes in my entire life',
+    'ChestScan': 'No', 'RaceEthnicityCategory': 'White only, Non-Hispanic', 'AgeCategory': 'Age 45 to 49',
+    'HeightInMeters': 1.68, 'WeightInKilograms': 77.0, 'BMI': 27.3, 'AlcoholDrinkers': 'Yes',
+    'HIVTesting': 'No', 'FluVaxLast12': 'Yes', 'PneumoVaxEver': 'No',
+    'TetanusLast10Tdap': 'Yes, received tetanus shot but not sure what type', 'HighRiskLastYear': 'No',
+    'CovidPos': 'No', 'BMI_Category': 'Overweight', 'SleepHours_Category': 'Normal Sleep',
+}
+
+
+def scaler_path_for(model_path):
+    """Where the feature scaler of a model is kept: next to the model, e.g. ``model.scaler.joblib``."""
+    path = Path(model_path)
+    return str(path.with_name(f"{path.stem}.scaler.joblib"))
+
+
+class ScoringPipeline:
+    """Encode, engineer and score records with a ``TreeEnsemble``.
+
+    Engineered model features (``*_interaction`` and ``*_poly``) are recognised by
+    name and computed as products of their factor columns, using the same term
+    definitions as ``build_features``. ``score_records`` builds the model matrix
+    directly from a list of dicts, without creating a DataFrame, so scoring a
+    handful of records costs a few NumPy operations; ``score_frame`` goes through
+    the regular DataFrame feature engineering for offline batches. Both apply the
+    fitted ``scaler`` after the products are computed, as in training.
+
+    Args:
+        model (TreeEnsemble): Model to score with
+        encoder (CategoricalEncoder): Encoder for the raw categorical answers;
+            defaults to the ``ENCODING_SPEC`` encoder
+        imputer (GroupImputer): Optional fitted imputer applied before encoding
+        scaler (FeatureScaler): Standardization fitted on the engineered training
+            data; required for models trained on standardized features
+        features (list): Factor features of the engineered terms; defaults to
+            ``FEATURE_CONFIG['interaction_features']``
+        degree (int): Polynomial degree; defaults to ``FEATURE_CONFIG['polynomial_degree']``
+    """
+
+    def __init__(self, model, encoder=None, imputer=None, scaler=None, features=None, degree=None):
+        self.model = model
+        self.encoder = encoder if encoder is not None else CategoricalEncoder()
+        self.imputer = imputer
+        self.scaler = scaler
+        self.features = list(features if features is not None else FEATURE_CONFIG['interaction_features'])
+        self.degree = degree if degree is not None else FEATURE_CONFIG['polynomial_degree']
+
+        terms = dict(interaction_terms(self.features) + polynomial_terms(self.features, self.degree))
+        products = {name: [self.features[i] for i in combo]
+                    for name, combo in terms.items() if name in model.feature_names}
+        self.input_columns = [col for col in model.feature_names if col not in products]
+        position = {col: k for k, col in enumerate(self.input_columns)}
+        missing = [col for factors in products.values() for col in factors if col not in position]
+        if missing:
+            raise ValueError(f"Model features depend on columns it does not use: {sorted(set(missing))}")
+
+        # Model column -> ('input', position) or ('product', factor positions)
+        self._layout = [
+            ('product', [position[col] for col in products[name]]) if name in products else ('input', position[name])
+            for name in model.feature_names
+        ]
+        self._category_codes = {
+            col: {value: code for code, value in enumerate(values)}
+            for col, values in model.categories.items()
+        }
+        self._scaling = scaler.parameters(model.feature_names) if scaler is not None else None
+
+    @classmethod
+    def load(cls, model_path, scaler_path=None, imputer=None):
+        """Load a model and the scaler saved next to it (see ``scaler_path_for``).
+
+        Args:
+            model_path (str): LightGBM ``.txt`` or XGBoost ``.json`` model
+            scaler_path (str): Fitted ``FeatureScaler``; defaults to the one next to the model
+            imputer (GroupImputer): Optional fitted imputer
+
+        Returns:
+            ScoringPipeline: The pipeline, without a scaler if none was saved
+        """
+        scaler_path = scaler_path or scaler_path_for(model_path)
+        scaler = FeatureScaler.load(scaler_path) if Path(scaler_path).exists() else None
+        return cls(TreeEnsemble.load(model_path), imputer=imputer, scaler=scaler)
+
+    def _value(self, col, value):
+        if value is None:
+            return np.nan
+        codes = self._category_codes.get(col)
+        if codes is not None:
+            return codes.get(value, np.nan)
+        return value
+
+    def to_matrix(self, records):
+        """Model input matrix for a list of raw records (dicts)."""
+        rows = []
+        for record in records:
+            if self.imputer is not None:
+                record = self.imputer.transform_record(record)
+            record = self.encoder.transform_record(record)
+            rows.append([self._value(col, record.get(col)) for col in self.input_columns])
+        inputs = np.array(rows, dtype=np.float64).reshape(len(records), len(self.input_columns))
+
+        matrix = np.empty((len(records), len(self._layout)), dtype=np.float64)
+        for j, (kind, source) in enumerate(self._layout):
+            if kind == 'input':
+                matrix[:, j] = inputs[:, source]
+            else:
+                matrix[:, j] = np.prod(inputs[:, source], axis=1)
+        if self._scaling is not None:
+            positions, mean, scale = self._scaling
+            matrix[:, positions] = (matrix[:, positions] - mean) / scale
+        return matrix
+
+    def out_of_range(self, records):
+        """Model features of ``records`` outside the range the model was trained on.
+
+        Only models whose file records the training ranges (LightGBM) can be checked.
+
+        Returns:
+            dict: Column -> (lowest value, highest value, trained range) for every
+            column with a value outside its trained range
+        """
+        matrix = self.to_matrix(records)
+        problems = {}
+        for j, col in enumerate(self.model.feature_names):
+            if col not in self.model.feature_ranges:
+                continue
+            low, high = self.model.feature_ranges[col]
+            values = matrix[:, j][~np.isnan(matrix[:, j])]
+            if len(values) and (values.min() < low or values.max() > high):
+                problems[col] = (float(values.min()), float(values.max()), (low, high))
+        return problems
+
+    def validate(self, records=None):
+        """Check that realistic raw records map into the model's trained feature ranges.
+
+        Catches a pipeline that feeds raw values to a model trained on standardized
+        features, e.g. a missing or mismatched scaler.
+
+        Args:
+            records (list): Raw records to check; defaults to ``[REFERENCE_RECORD]``
+
+        Raises:
+            ValueError: If any model feature falls outside its trained range
+        """
+        problems = self.out_of_range(records or [REFERENCE_RECORD])
+        if problems:
+            details = ', '.join(f"{col} spans [{low:.4g}, {high:.4g}], trained on [{lo:.4g}, {hi:.4g}]"
+                                for col, (low, high, (lo, hi)) in list(problems.items())[:5])
+            hint = '' if self.scaler is not None else ' The model may need its fitted FeatureScaler.'
+            raise ValueError(f"{len(problems)} model features fall outside their trained range: {details}.{hint}")
+
+    def score_records(self, records):
+        """Predicted probabilities for a list of raw records (dicts)."""
+        return self.model.predict(self.to_matrix(records))
+
+    def score_frame(self, df):
+        """Predicted probabilities for a DataFrame of raw records."""
+        if self.imputer is not None:
+            df = self.imputer.transform(df)
+        engineered = build_features(self.encoder.transform(df), self.features, self.degree)
+        if self.scaler is not None:
+            engineered = self.scaler.transform(engineered)
+        return self.model.predict(engineered)
+
+
+def fit_scaler(engineered_path, model_path, target='HadHeartAttack'):
+    """Fit the feature scaler of a model on its engineered (unscaled) training data and save it next to the model.
+
+    Args:
+        engineered_path (str): Engineered training dataset, ``.parquet`` or CSV
+        model_path (str): Model the scaler belongs to
+        target (str): Target column, never scaled
+
+    Returns:
+        FeatureScaler: The saved scaler
+    """
+    from ..data_io import read_dataset
+
+    model = TreeEnsemble.load(model_path)
+    columns = [col for col in FeatureScaler().columns if col in model.feature_names and col != target]
+    scaler = FeatureScaler(columns).fit(read_dataset(engineered_path, columns=columns))
+    scaler.save(scaler_path_for(model_path))
+    ScoringPipeline(model, scaler=scaler).validate()
+    print(f"💾 Feature scaler saved to {scaler_path_for(model_path)}")
+    return scaler
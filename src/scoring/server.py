@@ -0,0 +1,265 @@
+"""Asyncio HTTP service scoring single policyholder records with micro-batching.
+
+Concurrent requests are queued and scored together: the first queued record
+opens a batch, which takes in the records arriving within ``max_delay_ms`` and
+is scored once it holds ``max_batch_size`` records or the delay has passed, so
+a lone request waits at most the latency budget and under load batches fill up.
+Scoring runs in a worker thread, so the event loop keeps accepting requests
+while a batch is scored. The model, its feature
+scaler and the pipeline are loaded once at startup, checked against the model's
+trained feature ranges and warmed up with a first prediction.
+
+Endpoints:
+    POST /predict   JSON record, or a list of records -> probabilities
+    GET  /health    liveness and model summary
+    GET  /metrics   request latency percentiles and batch sizes
+
+Run with ``python -m src.scoring.server --model models/lightgbm_hyperopt_model.txt``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from ..config import DATA_PATH, SERVING_CONFIG
+from .pipeline import REFERENCE_RECORD, ScoringPipeline
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def latency_summary(latencies):
+    """Count, mean, p50, p99 and max of latencies given in seconds, reported in milliseconds."""
+    if not len(latencies):
+        return {'count': 0}
+    ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p99 = np.percentile(ms, [50, 99])
+    return {
+        'count': int(len(ms)),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-record predictions into batches.
+
+    Args:
+        score_batch (callable): Maps a list of records to an array of scores
+        max_batch_size (int): Largest batch scored at once
+        max_delay_ms (float): Longest time the first record of a batch waits
+            for more records
+        window (int): Number of recent latencies kept for the percentiles
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_delay_ms=2.0, window=100_000):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """Start the batching loop on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, record):
+        """Score one record; resolves once its batch has been scored."""
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, future))
+        score = await future
+        self.latencies.append(time.perf_counter() - start)
+        return score
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            self.batch_sizes.append(len(batch))
+            try:
+                # Scoring is CPU-bound; run it off the event loop so connections keep being served
+                scores = await loop.run_in_executor(None, self.score_batch, [record for record, _ in batch])
+            except Exception:
+                # Score one by one so a malformed record only fails its own request
+                for record, future in batch:
+                    await self._score_one(loop, record, future)
+                continue
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(float(score))
+
+    async def _score_one(self, loop, record, future):
+        try:
+            score = float((await loop.run_in_executor(None, self.score_batch, [record]))[0])
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result(score)
+
+    def metrics(self):
+        """Latency percentiles of recent requests and the mean batch size."""
+        stats = latency_summary(list(self.latencies))
+        stats['batches'] = len(self.batch_sizes)
+        stats['mean_batch_size'] = round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0
+        return stats
+
+
+class ScoringServer:
+    """Minimal HTTP/1.1 server around a ``ScoringPipeline``, with keep-alive connections.
+
+    Args:
+        pipeline (ScoringPipeline): Pipeline used to score the records
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        max_batch_size (int): Largest micro-batch
+        max_delay_ms (float): Latency budget for filling a micro-batch
+    """
+
+    def __init__(self, pipeline, host=None, port=None, max_batch_size=None, max_delay_ms=None):
+        self.pipeline = pipeline
+        self.host = host or SERVING_CONFIG['host']
+        self.port = port if port is not None else SERVING_CONFIG['port']
+        self.batcher = MicroBatcher(
+            pipeline.score_records,
+            max_batch_size=max_batch_size or SERVING_CONFIG['max_batch_size'],
+            max_delay_ms=max_delay_ms if max_delay_ms is not None else SERVING_CONFIG['max_delay_ms'],
+        )
+        self._server = None
+
+    async def start(self):
+        """Check and warm up the model and start listening; returns the bound port."""
+        self.pipeline.validate()
+        self.pipeline.score_records([REFERENCE_RECORD])
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"🚀 Scoring server listening on http://{self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _route(self, method, path, body):
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': 'Use POST'}
+            try:
+                payload = json.loads(body or b'null')
+            except json.JSONDecodeError as error:
+                return 400, {'error': f"Invalid JSON: {error}"}
+            if isinstance(payload, dict):
+                return 200, {'probability': await self.batcher.submit(payload)}
+            if isinstance(payload, list) and all(isinstance(record, dict) for record in payload):
+                scores = await asyncio.gather(*(self.batcher.submit(record) for record in payload))
+                return 200, {'probabilities': list(scores)}
+            return 400, {'error': 'Expected a JSON object or a list of objects'}
+        if path == '/health':
+            return 200, {'status': 'ok', 'trees': self.pipeline.model.n_trees,
+                         'features': len(self.pipeline.model.feature_names)}
+        if path == '/metrics':
+            return 200, self.batcher.metrics()
+        return 404, {'error': f"Unknown path '{path}'"}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except ValueError as error:
+                    status, payload = 400, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': repr(error)}
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve heart attack risk predictions over HTTP.')
+    parser.add_argument('--model', default=DATA_PATH['lightgbm_model'], help='LightGBM .txt or XGBoost .json model')
+    parser.add_argument('--scaler', help='Fitted FeatureScaler; defaults to the one saved next to the model')
+    parser.add_argument('--host', default=SERVING_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVING_CONFIG['port'])
+    parser.add_argument('--max-batch-size', type=int, default=SERVING_CONFIG['max_batch_size'])
+    parser.add_argument('--max-delay-ms', type=float, default=SERVING_CONFIG['max_delay_ms'])
+    args = parser.parse_args(argv)
+
+    pipeline = ScoringPipeline.load(args.model, args.scaler)
+    server = ScoringServer(pipeline, args.host, args.port, args.max_batch_size, args.max_delay_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
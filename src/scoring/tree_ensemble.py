@@ -0,0 +1,418 @@
+"""Native scoring of the shipped LightGBM and XGBoost tree models.
+
+The LightGBM text dumps and XGBoost JSON models are parsed into one set of
+contiguous NumPy arrays holding every node of every tree. Batches of rows are
+then scored by walking all trees of a chunk level by level, vectorized over
+(row, tree) pairs, so no JVM or training library is needed at scoring time.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# LightGBM treats |x| <= kZeroThreshold as zero for missing_type=Zero
+LIGHTGBM_ZERO = 1e-35
+
+
+class TreeEnsemble:
+    """Flattened tree ensemble evaluated with NumPy.
+
+    Every node of every tree is stored in shared arrays. Leaves point back to
+    themselves, so a batch can be advanced a fixed ``max_depth`` number of steps
+    without tracking which rows already reached a leaf. A split sends a row left
+    when ``x <= threshold``; missing values follow ``nan_left``, LightGBM
+    zero-as-missing splits follow ``default_left`` for zeros, and categorical
+    splits test the row's category code against a bitset.
+
+    Use ``from_lightgbm`` or ``from_xgboost`` to build one.
+
+    Args:
+        feature_names (list): Model input columns, in model order
+        roots (np.ndarray): Root node index of every tree
+        nodes (dict): Node arrays, see ``_NodeBuilder``
+        cat_bits (np.ndarray): Concatenated uint32 category bitsets
+        max_depth (int): Depth of the deepest tree
+        base_score (float): Raw score added to the sum of the leaves
+        sigmoid (float): Scale of the logistic link, or None for raw output
+        categories (dict): Column -> categories whose position is the code the
+            model was trained on; matching columns are encoded before scoring
+        input_dtype: dtype inputs are rounded to before comparison
+        feature_ranges (dict): Column -> (min, max) of the training values, where
+            the model file records them (LightGBM ``feature_infos``)
+    """
+
+    def __init__(self, feature_names, roots, nodes, cat_bits, max_depth, base_score=0.0,
+                 sigmoid=1.0, categories=None, input_dtype=np.float64, feature_ranges=None):
+        self.feature_names = list(feature_names)
+        self.roots = roots
+        self.feature = nodes['feature']
+        self.threshold = nodes['threshold']
+        self.left = nodes['left']
+        self.right = nodes['right']
+        self.nan_left = nodes['nan_left']
+        self.default_left = nodes['default_left']
+        self.zero_missing = nodes['zero_missing']
+        self.is_cat = nodes['is_cat']
+        self.cat_left = nodes['cat_left']
+        self.cat_offset = nodes['cat_offset']
+        self.cat_size = nodes['cat_size']
+        self.value = nodes['value']
+        self.cat_bits = cat_bits
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.sigmoid = sigmoid
+        self.categories = categories or {}
+        self.input_dtype = np.dtype(input_dtype)
+        self.feature_ranges = feature_ranges or {}
+        # (right, left) of every node side by side, so ``children[2 * node + go_left]``
+        # picks the next node with a single gather
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+        self.has_cat = bool(self.is_cat.any())
+        self.has_zero_missing = bool(self.zero_missing.any())
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_lightgbm(cls, path):
+        """Load a LightGBM model saved with ``Booster.save_model`` (text format)."""
+        with open(path) as f:
+            text = f.read()
+        header, _, rest = text.partition('\nTree=')
+        params = _key_values(header)
+        blocks = ('Tree=' + rest).split('end of trees')[0].strip().split('\n\n')
+
+        # Numeric features are listed as [min:max], categorical ones as their codes
+        feature_ranges = {
+            name: tuple(float(v) for v in info[1:-1].split(':'))
+            for name, info in zip(params['feature_names'].split(), params['feature_infos'].split())
+            if info.startswith('[')
+        }
+        categories = {}
+        for line in text.splitlines():
+            if line.startswith('pandas_categorical:'):
+                values = json.loads(line.split(':', 1)[1])
+                feature_names = params['feature_names'].split()
+                infos = params['feature_infos'].split()
+                # pandas_categorical lists the categorical columns in column order
+                cat_cols = [name for name, info in zip(feature_names, infos) if ':' in info and not info.startswith('[')]
+                categories = dict(zip(cat_cols, values or []))
+
+        builder = _NodeBuilder()
+        for block in blocks:
+            if block.strip():
+                builder.add_lightgbm_tree(_key_values(block))
+
+        objective = params.get('objective', '').split()
+        sigmoid = None
+        if objective and objective[0] in ('binary', 'cross_entropy', 'xentropy'):
+            sigmoid = float(next((p.split(':')[1] for p in objective[1:] if p.startswith('sigmoid:')), 1.0))
+        return builder.build(
+            cls, params['feature_names'].split(), sigmoid=sigmoid,
+            categories=categories, input_dtype=np.float64, feature_ranges=feature_ranges
+        )
+
+    @classmethod
+    def from_xgboost(cls, path, categories=None):
+        """Load an XGBoost gbtree model saved with ``save_model`` as JSON.
+
+        Args:
+            path (str): Path to the ``.json`` model
+            categories (dict): Column -> categories in training code order, for
+                categorical columns passed as strings or with other categories.
+                Category columns are otherwise scored by their existing codes.
+        """
+        with open(path) as f:
+            learner = json.load(f)['learner']
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"Unsupported XGBoost booster '{booster['name']}'")
+
+        builder = _NodeBuilder()
+        for tree in booster['model']['trees']:
+            builder.add_xgboost_tree(tree)
+
+        objective = learner['objective']['name']
+        base_score = float(learner['learner_model_param']['base_score'])
+        sigmoid = None
+        if objective in ('binary:logistic', 'reg:logistic'):
+            # base_score is stored as a probability for logistic objectives
+            base_score = float(np.log(base_score / (1 - base_score)))
+            sigmoid = 1.0
+        return builder.build(
+            cls, learner['feature_names'], base_score=base_score, sigmoid=sigmoid,
+            categories=categories, input_dtype=np.float32
+        )
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load a ``.json`` XGBoost model or a LightGBM text model by extension."""
+        if str(path).lower().endswith('.json'):
+            return cls.from_xgboost(path, **kwargs)
+        return cls.from_lightgbm(path)
+
+    def to_matrix(self, X):
+        """Arrange ``X`` into the float matrix the trees are evaluated on.
+
+        DataFrames are reordered to ``feature_names``; columns listed in
+        ``categories`` are encoded to the training codes (unknown values become
+        missing) and other category columns use their codes. Arrays are taken to
+        be in model order already.
+        """
+        if not isinstance(X, pd.DataFrame):
+            return np.asarray(X, dtype=self.input_dtype).astype(np.float64, copy=False)
+
+        missing = [col for col in self.feature_names if col not in X.columns]
+        if missing:
+            raise ValueError(f"Input is missing model features: {missing}")
+        matrix = np.empty((len(X), len(self.feature_names)), dtype=np.float64)
+        for j, col in enumerate(self.feature_names):
+            series = X[col]
+            if col in self.categories:
+                codes = pd.Categorical(series, categories=self.categories[col]).codes
+                matrix[:, j] = np.where(codes < 0, np.nan, codes)
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                matrix[:, j] = np.where(codes < 0, np.nan, codes)
+            else:
+                matrix[:, j] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.input_dtype != np.float64:
+            matrix = matrix.astype(self.input_dtype).astype(np.float64)
+        return matrix
+
+    def _leaves(self, X, roots):
+        """Leaf node reached by every row in every tree of ``roots``, shape (rows, trees)."""
+        n_rows, n_features = X.shape
+        node = np.repeat(roots[None, :], n_rows, axis=0)
+        # Position of each row's first value in the flattened matrix
+        row_start = np.arange(0, n_rows * n_features, n_features)[:, None]
+        flat = X.ravel()
+        for _ in range(self.max_depth):
+            x = flat.take(row_start + self.feature.take(node))
+            go_left = x <= self.threshold.take(node)
+            missing = np.isnan(x)
+            # NaN compares false, i.e. goes right, unless the split sends it left
+            go_left |= missing & self.nan_left.take(node)
+            if self.has_zero_missing:
+                zero = self.zero_missing.take(node) & (np.abs(x) <= LIGHTGBM_ZERO)
+                go_left = np.where(zero, self.default_left.take(node), go_left)
+            if self.has_cat:
+                cat = np.flatnonzero(self.is_cat.take(node) & ~missing)
+                if len(cat):
+                    go_left.flat[cat] = self._category_decision(node.flat[cat], x.flat[cat])
+            node = self.children.take(2 * node + go_left)
+        return node
+
+    def _category_decision(self, node, x):
+        code = x.astype(np.int64)
+        word = code >> 5
+        inside = (code >= 0) & (word < self.cat_size[node])
+        bits = self.cat_bits[np.where(inside, self.cat_offset[node] + word, 0)]
+        in_set = inside & ((bits >> (code & 31).astype(np.uint32)) & 1).astype(bool)
+        return in_set == self.cat_left[node]
+
+    def _raw_chunk(self, X, roots, batch_size):
+        raw = np.zeros(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            leaves = self._leaves(X[start:start + batch_size], roots)
+            raw[start:start + batch_size] = self.value[leaves].sum(axis=1)
+        return raw
+
+    def predict_raw(self, X, batch_size=2048, n_threads=1, trees_per_chunk=None):
+        """Sum of leaf values plus the base score, before the link function.
+
+        Args:
+            X (pd.DataFrame or np.ndarray): Rows to score
+            batch_size (int): Rows evaluated together; bounds the (rows, trees)
+                working arrays
+            n_threads (int): Threads scoring tree chunks concurrently
+            trees_per_chunk (int): Trees per chunk; defaults to splitting the
+                trees evenly over the threads
+
+        Returns:
+            np.ndarray: Raw scores, one per row
+        """
+        X = self.to_matrix(X)
+        if trees_per_chunk is None:
+            trees_per_chunk = -(-self.n_trees // max(n_threads, 1))
+        chunks = [self.roots[i:i + trees_per_chunk] for i in range(0, self.n_trees, trees_per_chunk)]
+        if n_threads > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=n_threads) as pool:
+                parts = list(pool.map(lambda roots: self._raw_chunk(X, roots, batch_size), chunks))
+        else:
+            parts = [self._raw_chunk(X, roots, batch_size) for roots in chunks]
+        return self.base_score + np.sum(parts, axis=0)
+
+    def predict(self, X, **kwargs):
+        """Predicted probability of the positive class (raw score for non-logistic models).
+
+        Accepts the keyword arguments of ``predict_raw``.
+        """
+        raw = self.predict_raw(X, **kwargs)
+        if self.sigmoid is None:
+            return raw
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
+
+
+def _key_values(block):
+    """Parse the ``key=value`` lines of a LightGBM model section."""
+    values = {}
+    for line in block.splitlines():
+        key, sep, value = line.partition('=')
+        if sep:
+            values[key.strip()] = value.strip()
+    return values
+
+
+def _bitset(codes):
+    """uint32 bitset with the bits of ``codes`` set, as LightGBM stores them."""
+    codes = np.asarray(codes, dtype=np.int64)
+    bits = np.zeros(int(codes.max()) // 32 + 1 if len(codes) else 0, dtype=np.uint32)
+    np.bitwise_or.at(bits, codes // 32, (np.uint32(1) << (codes % 32).astype(np.uint32)))
+    return bits
+
+
+class _NodeBuilder:
+    """Accumulate the nodes of several trees into flat arrays.
+
+    Internal nodes come first in each tree, followed by its leaves; child
+    indices are global positions in the flat arrays.
+    """
+
+    FIELDS = {
+        'feature': np.int32, 'threshold': np.float64, 'left': np.int32, 'right': np.int32,
+        'nan_left': bool, 'default_left': bool, 'zero_missing': bool, 'is_cat': bool,
+        'cat_left': bool, 'cat_offset': np.int64, 'cat_size': np.int64, 'value': np.float64,
+    }
+
+    def __init__(self):
+        self.parts = {field: [] for field in self.FIELDS}
+        self.cat_bits = []
+        self.n_cat_words = 0
+        self.roots = []
+        self.max_depth = 0
+        self.n_nodes = 0
+
+    def _add_tree(self, nodes, bitsets, depth):
+        n = len(nodes['feature'])
+        for field in self.FIELDS:
+            self.parts[field].append(np.asarray(nodes[field], dtype=self.FIELDS[field]))
+        self.parts['left'][-1] += self.n_nodes
+        self.parts['right'][-1] += self.n_nodes
+        self.parts['cat_offset'][-1] += self.n_cat_words
+        for bits in bitsets:
+            self.cat_bits.append(bits)
+            self.n_cat_words += len(bits)
+        self.roots.append(self.n_nodes)
+        self.max_depth = max(self.max_depth, depth)
+        self.n_nodes += n
+
+    @staticmethod
+    def _empty(n_internal, n_leaves):
+        n = n_internal + n_leaves
+        nodes = {field: np.zeros(n, dtype=dtype) for field, dtype in _NodeBuilder.FIELDS.items()}
+        # Leaves loop onto themselves so extra steps leave rows in place
+        nodes['left'] = np.arange(n)
+        nodes['right'] = np.arange(n)
+        return nodes
+
+    def add_lightgbm_tree(self, tree):
+        num_leaves = int(tree['num_leaves'])
+        if num_leaves == 1:
+            nodes = self._empty(0, 1)
+            nodes['value'][0] = float(tree['leaf_value'])
+            self._add_tree(nodes, [], 0)
+            return
+
+        n_internal = num_leaves - 1
+        nodes = self._empty(n_internal, num_leaves)
+        split = np.array(tree['split_feature'].split(), dtype=np.int32)
+        threshold = np.array(tree['threshold'].split(), dtype=np.float64)
+        decision = np.array(tree['decision_type'].split(), dtype=np.int32)
+        children = [np.array(tree[key].split(), dtype=np.int32) for key in ('left_child', 'right_child')]
+
+        is_cat = (decision & 1).astype(bool)
+        default_left = (decision & 2).astype(bool)
+        missing_type = (decision >> 2) & 3  # 0 none, 1 zero, 2 nan
+
+        nodes['feature'][:n_internal] = split
+        nodes['threshold'][:n_internal] = threshold
+        # Negative children ~leaf refer to leaves, stored after the internal nodes
+        nodes['left'][:n_internal], nodes['right'][:n_internal] = (
+            np.where(child >= 0, child, n_internal + ~child) for child in children
+        )
+        nodes['default_left'][:n_internal] = default_left
+        nodes['zero_missing'][:n_internal] = (missing_type == 1) & ~is_cat
+        # NaN is the default direction for missing_type nan, otherwise it is
+        # treated as 0.0; categorical splits always send it right
+        nan_as_zero = np.where(missing_type == 1, default_left, 0.0 <= threshold)
+        nodes['nan_left'][:n_internal] = np.where(is_cat, False, np.where(missing_type == 2, default_left, nan_as_zero))
+        nodes['is_cat'][:n_internal] = is_cat
+        nodes['cat_left'][:n_internal] = True
+        nodes['value'][n_internal:] = np.array(tree['leaf_value'].split(), dtype=np.float64)
+
+        bitsets = []
+        if int(tree.get('num_cat', 0)):
+            boundaries = np.array(tree['cat_boundaries'].split(), dtype=np.int64)
+            words = np.array(tree['cat_threshold'].split(), dtype=np.uint64).astype(np.uint32)
+            cat_index = threshold[is_cat].astype(np.int64)
+            nodes['cat_offset'][:n_internal][is_cat] = boundaries[cat_index]
+            nodes['cat_size'][:n_internal][is_cat] = boundaries[cat_index + 1] - boundaries[cat_index]
+            bitsets.append(words)
+
+        self._add_tree(nodes, bitsets, _depth(nodes['left'], nodes['right'], 0))
+
+    def add_xgboost_tree(self, tree):
+        left = np.array(tree['left_children'], dtype=np.int32)
+        right = np.array(tree['right_children'], dtype=np.int32)
+        n = len(left)
+        is_leaf = left == -1
+        nodes = self._empty(0, n)
+
+        condition = np.array(tree['split_conditions'], dtype=np.float32)
+        # XGBoost goes left when x < threshold in float32; x <= the next float32 below is the same test
+        below = np.nextafter(condition, np.float32(-np.inf), dtype=np.float32)
+        nodes['feature'] = np.where(is_leaf, 0, np.array(tree['split_indices'], dtype=np.int32))
+        nodes['threshold'] = np.where(is_leaf, 0.0, below.astype(np.float64))
+        nodes['left'] = np.where(is_leaf, np.arange(n), left)
+        nodes['right'] = np.where(is_leaf, np.arange(n), right)
+        default_left = np.array(tree['default_left'], dtype=bool)
+        nodes['nan_left'] = default_left
+        nodes['default_left'] = default_left
+        nodes['value'] = np.where(is_leaf, condition.astype(np.float64), 0.0)
+
+        # Categories listed for a node go right; anything else goes left
+        bitsets = []
+        offset = 0
+        split_type = np.array(tree.get('split_type', [0] * n))
+        nodes['is_cat'] = (split_type == 1) & ~is_leaf
+        for node, start, size in zip(tree['categories_nodes'], tree['categories_segments'], tree['categories_sizes']):
+            bits = _bitset(tree['categories'][start:start + size])
+            nodes['cat_offset'][node] = offset
+            nodes['cat_size'][node] = len(bits)
+            bitsets.append(bits)
+            offset += len(bits)
+
+        self._add_tree(nodes, bitsets, _depth(nodes['left'], nodes['right'], 0))
+
+    def build(self, cls, feature_names, **kwargs):
+        nodes = {field: np.concatenate(parts) for field, parts in self.parts.items()}
+        cat_bits = np.concatenate(self.cat_bits) if self.cat_bits else np.zeros(1, dtype=np.uint32)
+        return cls(feature_names, np.array(self.roots, dtype=np.int64), nodes, cat_bits.astype(np.uint32),
+                   self.max_depth, **kwargs)
+
+
+def _depth(left, right, root):
+    """Number of splits on the longest root-to-leaf path of one tree."""
+    depth = 0
+    level = np.array([root])
+    while True:
+        children = np.concatenate([left[level], right[level]])
+        children = np.unique(children[children != np.concatenate([level, level])])
+        if not len(children):
+            return depth
+        depth += 1
+        level = children
@@ -0,0 +1,480 @@
+"""Content-addressed cache of pipeline stage outputs and a small DAG runner.
+
+Every stage is fingerprinted from the fingerprints of its inputs, its code and
+its parameters (which carry the relevant ``FEATURE_CONFIG``, ``TRAIN_CONFIG`` and
+``MODEL_CONFIG`` values). The code is the stage function's source plus every
+module of this package it reaches through imports, found by parsing the
+imports (including the lazy ones inside functions) rather than listed by hand,
+so editing any module a stage uses invalidates it. Source files
+such as the raw CSV are fingerprinted by content. A stage whose fingerprint is
+already in the cache is skipped and its stored output used as is, so changing a
+model parameter reruns only the model stage, and editing the encoder reruns
+encoding and everything after it.
+
+Fingerprints chain along the DAG (a stage's key covers its inputs' keys, not
+their bytes), so stages must be deterministic functions of their inputs.
+
+Layout of the cache directory::
+
+    index.sqlite       entries (key, stage, bytes, last use) and source digests
+    <key>/<filename>   output of one stage run
+
+The cache is bounded in size: after each new entry the least recently used
+entries are evicted until the total fits, never evicting an output the current
+run still needs.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import shutil
+import sqlite3
+import textwrap
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from .config import DATA_PATH, FEATURE_CONFIG, MODEL_CONFIG, PIPELINE_CONFIG, TRAIN_CONFIG
+
+
+class Stage(NamedTuple):
+    """One node of the pipeline.
+
+    ``func(inputs, output_path, **params)`` receives the output paths of its
+    dependencies by name and writes its own output to ``output_path``.
+    """
+    name: str
+    func: Callable
+    deps: Tuple[str, ...]
+    params: dict = {}
+    # Extra modules whose source is part of the fingerprint, besides those ``func`` imports
+    code: Tuple[str, ...] = ()
+    filename: str = 'data.parquet'
+    # Where ``run(publish=True)`` copies the output, e.g. a ``DATA_PATH`` entry
+    publish_path: Optional[str] = None
+
+
+def _digest(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def hash_file(path, block_size=1 << 20):
+    """SHA-1 of a file's content, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_PACKAGE_ROOT = Path(__file__).resolve().parent
+
+# Config values reach the fingerprints through the stage parameters, so editing
+# an unrelated setting does not invalidate every stage
+_UNTRACKED = {f"{__package__}.config"}
+
+
+def _module_file(name):
+    """Source file of a module of this package, or None for anything else."""
+    parts = name.split('.')
+    if parts[0] != __package__:
+        return None
+    base = _PACKAGE_ROOT.joinpath(*parts[1:])
+    for path in (base.with_suffix('.py'), base / '__init__.py'):
+        if path.is_file():
+            return path
+    return None
+
+
+def _imports(tree, package):
+    """Modules of this package imported anywhere in ``tree``, relative names resolved against ``package``."""
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name('.' * node.level + (node.module or ''), package)
+            # ``from package import name`` may import the submodule ``package.name``
+            found.add(base)
+            found.update(f"{base}.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value.startswith('.'):
+            # Relative module paths of lazy exports, e.g. ``_LAZY_EXPORTS`` in a package ``__init__``
+            try:
+                found.add(importlib.util.resolve_name(node.value, package))
+            except (ImportError, ValueError):
+                pass
+    return {name for name in found if _module_file(name) is not None}
+
+
+def import_closure(modules):
+    """Modules of this package reachable from ``modules`` through their imports.
+
+    Args:
+        modules (iterable): Dotted module names; relative ones are resolved against this package
+
+    Returns:
+        set: Module names, ``config`` excluded
+    """
+    seen = set()
+    stack = [importlib.util.resolve_name(name, __package__) for name in modules]
+    while stack:
+        name = stack.pop()
+        path = _module_file(name)
+        if name in seen or name in _UNTRACKED or path is None:
+            continue
+        seen.add(name)
+        package = name if path.name == '__init__.py' else name.rpartition('.')[0]
+        stack.extend(_imports(ast.parse(path.read_bytes()), package))
+    return seen
+
+
+def code_fingerprint(func, modules=()):
+    """Hash of the source of ``func`` and of every module of this package it depends on.
+
+    Args:
+        func (callable): Stage function; its own imports are followed
+        modules (iterable): Further modules to include with their imports
+    """
+    source = textwrap.dedent(inspect.getsource(func))
+    package = func.__module__.rpartition('.')[0] or func.__module__
+    roots = _imports(ast.parse(source), package) | set(modules)
+    digest = hashlib.sha1(source.encode())
+    for name in sorted(import_closure(roots)):
+        digest.update(name.encode())
+        digest.update(_module_file(name).read_bytes())
+    return digest.hexdigest()
+
+
+def _size(path):
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(item.stat().st_size for item in path.rglob('*') if item.is_file())
+
+
+class StageCache:
+    """Stage outputs stored under their fingerprint, with LRU eviction by total size.
+
+    Args:
+        directory (str): Cache directory; defaults to ``DATA_PATH['stage_cache']``
+        max_bytes (int): Size limit of all entries; defaults to ``PIPELINE_CONFIG['cache_max_gb']``
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = Path(directory or DATA_PATH['stage_cache'])
+        self.max_bytes = int(max_bytes if max_bytes is not None else PIPELINE_CONFIG['cache_max_gb'] * 2 ** 30)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY, stage TEXT, filename TEXT, bytes INTEGER, created REAL, last_used REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sources ('
+                ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(str(self.directory / 'index.sqlite'), timeout=30)
+
+    def source_key(self, path):
+        """Content fingerprint of an input file, rehashed only when its size or mtime changed."""
+        stat = os.stat(path)
+        resolved = str(Path(path).resolve())
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT digest FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?',
+                (resolved, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            digest = hash_file(path)
+            conn.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)',
+                         (resolved, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def get(self, key):
+        """Output path of ``key``, marking it as used, or None on a miss."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT filename FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            path = self.directory / key / row[0]
+            if not path.exists():
+                # Removed behind the index's back
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE entries SET last_used = ? WHERE key = ?', (time.time(), key))
+        return str(path)
+
+    def put(self, key, stage, filename, produce, keep=()):
+        """Run ``produce(output_path)`` and store its output under ``key``.
+
+        The output is written to a temporary directory and moved into place only
+        when ``produce`` succeeds, so a failed or interrupted stage leaves no entry.
+
+        Args:
+            key (str): Stage fingerprint
+            stage (str): Stage name, kept for ``entries``
+            filename (str): Name of the output file (or directory) inside the entry
+            produce (callable): Writes the output to the path it is given
+            keep (iterable): Keys that must not be evicted to make room
+
+        Returns:
+            str: Path of the stored output
+        """
+        final = self.directory / key
+        tmp = self.directory / f".tmp-{key}-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            produce(str(tmp / filename))
+            shutil.rmtree(final, ignore_errors=True)
+            tmp.replace(final)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, stage, filename, _size(final / filename), now, now))
+        self.evict(keep=set(keep) | {key})
+        return str(final / filename)
+
+    def evict(self, keep=()):
+        """Remove least recently used entries until the cache fits ``max_bytes``.
+
+        Returns:
+            list: Keys that were evicted
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT key, bytes FROM entries ORDER BY last_used').fetchall()
+        total = sum(size for _, size in rows)
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+            evicted.append(key)
+            total -= size
+        if evicted:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in evicted])
+            print(f"🗑️ Evicted {len(evicted)} cached stage output(s)")
+        return evicted
+
+    def entries(self):
+        """The cached entries, most recently used first."""
+        import pandas as pd
+
+        with self._connect() as conn:
+            return pd.read_sql_query('SELECT * FROM entries ORDER BY last_used DESC', conn)
+
+    def clear(self):
+        """Remove every entry and source digest."""
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute('SELECT key FROM entries')]
+            conn.execute('DELETE FROM entries')
+            conn.execute('DELETE FROM sources')
+        for key in keys:
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+
+
+class PipelineRunner:
+    """Run a DAG of stages, skipping those whose fingerprint is cached.
+
+    Args:
+        stages (list): ``Stage`` objects; dependencies may be other stages or sources
+        sources (dict): Source name -> input file path, e.g. ``{'raw': DATA_PATH['raw_data']}``
+        cache (StageCache): Output store; a default ``StageCache`` when omitted
+    """
+
+    def __init__(self, stages, sources, cache=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.sources = dict(sources)
+        self.cache = cache or StageCache()
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages and dep not in self.sources:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown '{dep}'")
+
+    def order(self, targets=None):
+        """Stages needed for ``targets`` (default: all), dependencies first."""
+        ordered, visiting = [], set()
+
+        def visit(name):
+            if name in self.sources or name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return ordered
+
+    def fingerprint(self, stage, input_keys):
+        """Key of ``stage`` given the keys of its inputs."""
+        code = code_fingerprint(stage.func, stage.code)
+        return _digest(stage.name, stage.filename, code, stage.params, [input_keys[dep] for dep in stage.deps])
+
+    def run(self, targets=None, force=(), publish=False):
+        """Bring ``targets`` up to date.
+
+        Args:
+            targets (list): Stage names to produce; defaults to every stage
+            force (iterable): Stage names to rerun even when cached
+            publish (bool): Copy every output with a ``publish_path`` there
+
+        Returns:
+            dict: Stage and source name -> path of its current output
+        """
+        keys = {name: self.cache.source_key(path) for name, path in self.sources.items()}
+        paths = dict(self.sources)
+        order = self.order(targets)
+        for name in order:
+            stage = self.stages[name]
+            key = self.fingerprint(stage, keys)
+            keys[name] = key
+            path = None if name in force else self.cache.get(key)
+            if path is not None:
+                print(f"✅ {name}: cached ({key[:12]})")
+            else:
+                print(f"🚀 {name}: running ({key[:12]})")
+                start = time.perf_counter()
+                inputs = {dep: paths[dep] for dep in stage.deps}
+                path = self.cache.put(
+                    key, name, stage.filename,
+                    lambda output, stage=stage, inputs=inputs: stage.func(inputs, output, **stage.params),
+                    keep={keys[other] for other in order if other in keys}
+                )
+                print(f"⏱️ {name}: {time.perf_counter() - start:.1f} s")
+            paths[name] = path
+            if publish and stage.publish_path:
+                _publish(path, stage.publish_path)
+        # The limit may have been lowered since the outputs in use were stored
+        self.cache.evict(keep=set(keys.values()))
+        return paths
+
+
+def _publish(path, destination):
+    from .data_io import schema_path_for
+
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if Path(path).is_dir():
+        shutil.rmtree(destination, ignore_errors=True)
+        shutil.copytree(path, destination)
+    else:
+        shutil.copyfile(path, destination)
+        if Path(schema_path_for(path)).is_file():
+            shutil.copyfile(schema_path_for(path), schema_path_for(destination))
+    print(f"💾 Published {destination}")
+
+
+def _record_schema(output):
+    """Save the dtypes of a stage's dataset next to it, for ``load_and_preprocess_data(schema_path=...)``."""
+    from .data_io import dataset_schema, schema_path_for, write_schema
+
+    write_schema(dataset_schema(output), schema_path_for(output))
+
+
+def _clean(inputs, output, target_column, missing_row_threshold):
+    from .data_preprocessing.clean_data import clean_data
+
+    clean_data(inputs['raw'], output, target_column=target_column, missing_row_threshold=missing_row_threshold)
+    _record_schema(output)
+
+
+def _encode(inputs, output):
+    from .data_io import read_dataset, write_dataset
+    from .data_preprocessing.encoding import encode_features
+
+    write_dataset(encode_features(read_dataset(inputs['clean'])), output)
+    _record_schema(output)
+
+
+def _engineer(inputs, output, features, degree):
+    from .data_io import read_dataset, write_dataset
+    from .feature_engineering.feature_engineering import build_features
+
+    write_dataset(build_features(read_dataset(inputs['encode']), features, degree, interactions=True), output)
+    _record_schema(output)
+
+
+def _model(inputs, output, target_column, max_runtime_secs, seed, test_size, random_state):
+    from .data_io import schema_path_for
+    from .model_utils import load_and_preprocess_data, save_model_artifacts, train_h2o_model
+
+    df, selected = load_and_preprocess_data(inputs['engineer'], target_column,
+                                            schema_path=schema_path_for(inputs['engineer']))
+    features = [col for col in selected if col != target_column]
+    aml, performance = train_h2o_model(df, target_column, features, max_runtime_secs=max_runtime_secs, seed=seed)
+    save_model_artifacts(aml, features, {**performance, 'test_size': test_size, 'random_state': random_state}, output)
+
+
+def default_stages():
+    """The project pipeline: raw -> clean -> encode -> engineer -> model.
+
+    Parameters are read from the config when this is called, so a changed
+    ``FEATURE_CONFIG`` or ``MODEL_CONFIG`` changes the affected fingerprints.
+    """
+    target = PIPELINE_CONFIG['target_column']
+    return [
+        Stage('clean', _clean, ('raw',),
+              params={'target_column': target, 'missing_row_threshold': PIPELINE_CONFIG['missing_row_threshold']},
+              publish_path=DATA_PATH['cleaned_data']),
+        Stage('encode', _encode, ('clean',)),
+        Stage('engineer', _engineer, ('encode',),
+              params={'features': list(FEATURE_CONFIG['interaction_features']),
+                      'degree': FEATURE_CONFIG['polynomial_degree']},
+              publish_path=DATA_PATH['engineered_data']),
+        Stage('model', _model, ('engineer',),
+              params={'target_column': target, 'max_runtime_secs': MODEL_CONFIG['max_runtime_secs'],
+                      'seed': MODEL_CONFIG['seed'], 'test_size': TRAIN_CONFIG['test_size'],
+                      'random_state': TRAIN_CONFIG['random_state']},
+              filename='model'),
+    ]
+
+
+def run_pipeline(targets=None, raw_path=None, cache_dir=None, force=(), publish=True):
+    """Run the project pipeline through the stage cache.
+
+    Args:
+        targets (list): Stages to produce, e.g. ``['engineer']``; defaults to all
+        raw_path (str): Raw data; defaults to ``DATA_PATH['raw_data']``
+        cache_dir (str): Cache directory; defaults to ``DATA_PATH['stage_cache']``
+        force (iterable): Stages to rerun even when cached
+        publish (bool): Also copy the cleaned and engineered data to their ``DATA_PATH`` locations
+
+    Returns:
+        dict: Stage name -> path of its output
+    """
+    runner = PipelineRunner(default_stages(), {'raw': raw_path or DATA_PATH['raw_data']}, StageCache(cache_dir))
+    return runner.run(targets, force=force, publish=publish)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the pipeline, reusing cached stage outputs.')
+    parser.add_argument('targets', nargs='*', help='Stages to produce (clean, encode, engineer, model); default all')
+    parser.add_argument('--raw', help='Raw data file')
+    parser.add_argument('--cache-dir')
+    parser.add_argument('--force', nargs='*', default=(), help='Stages to rerun even when cached')
+    parser.add_argument('--no-publish', action='store_true', help='Do not copy outputs to DATA_PATH')
+    args = parser.parse_args()
+    for stage_name, output_path in run_pipeline(args.targets or None, args.raw, args.cache_dir,
+                                                args.force, not args.no_publish).items():
+        print(f"{stage_name}: {output_path}")
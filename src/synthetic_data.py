@@ -0,0 +1,253 @@
+"""Synthetic BRFSS-shaped data for reproducible benchmarks.
+
+The raw survey file is not part of the repository, so this module generates
+frames with the same columns and value vocabularies: the base (non-engineered)
+columns of the raw schema, the survey answers of ``ENCODING_SPEC`` as strings,
+plausible body measurements and health-day counts, and a ``HadHeartAttack``
+target drawn from a logistic risk model whose intercept is calibrated to the
+requested positive rate. Frames of any size can be generated in independent
+chunks and written straight to disk, so the 5M-row benchmark never has to sit
+in memory at once.
+"""
+
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import DATA_PATH
+from .data_io import DatasetWriter, read_schema
+from .data_preprocessing.encoding import BINARY_COLS, ENCODING_SPEC
+
+# Benchmark sizes
+SIZES = {'10k': 10_000, '400k': 400_000, '5m': 5_000_000}
+
+TARGET = 'HadHeartAttack'
+
+STATES = [
+    'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado', 'Connecticut', 'Delaware',
+    'District of Columbia', 'Florida', 'Georgia', 'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa',
+    'Kansas', 'Kentucky', 'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan', 'Minnesota',
+    'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada', 'New Hampshire', 'New Jersey',
+    'New Mexico', 'New York', 'North Carolina', 'North Dakota', 'Ohio', 'Oklahoma', 'Oregon',
+    'Pennsylvania', 'Rhode Island', 'South Carolina', 'South Dakota', 'Tennessee', 'Texas', 'Utah',
+    'Vermont', 'Virginia', 'Washington', 'West Virginia', 'Wisconsin', 'Wyoming', 'Guam',
+    'Puerto Rico', 'Virgin Islands'
+]
+RACE_ETHNICITY = {
+    'White only, Non-Hispanic': 0.72, 'Hispanic': 0.10, 'Black only, Non-Hispanic': 0.08,
+    'Other race only, Non-Hispanic': 0.05, 'Multiracial, Non-Hispanic': 0.05,
+}
+
+# Share of 'Yes' answers; conditions marked as age-related scale with the age category
+YES_RATES = {
+    'PhysicalActivities': 0.76, 'HadAngina': 0.06, 'HadStroke': 0.04, 'HadAsthma': 0.15,
+    'HadSkinCancer': 0.08, 'HadCOPD': 0.08, 'HadDepressiveDisorder': 0.21, 'HadKidneyDisease': 0.05,
+    'HadArthritis': 0.34, 'DeafOrHardOfHearing': 0.09, 'BlindOrVisionDifficulty': 0.05,
+    'DifficultyConcentrating': 0.11, 'DifficultyWalking': 0.15, 'DifficultyDressingBathing': 0.04,
+    'DifficultyErrands': 0.07, 'AlcoholDrinkers': 0.53, 'HIVTesting': 0.34, 'FluVaxLast12': 0.53,
+    'PneumoVaxEver': 0.41, 'ChestScan': 0.43, 'HighRiskLastYear': 0.04,
+}
+AGE_RELATED = {
+    'HadAngina', 'HadStroke', 'HadCOPD', 'HadKidneyDisease', 'HadArthritis', 'DeafOrHardOfHearing',
+    'DifficultyWalking', 'PneumoVaxEver', 'ChestScan',
+}
+
+# Log-odds of a heart attack per unit of each encoded feature
+RISK_WEIGHTS = {
+    'AgeCategory': 0.22, 'Sex': 0.55, 'HadAngina': 2.0, 'HadStroke': 0.9, 'HadDiabetes': 0.15,
+    'HadCOPD': 0.45, 'HadKidneyDisease': 0.35, 'ChestScan': 0.7, 'SmokerStatus': 0.15,
+    'DifficultyWalking': 0.35,
+}
+
+
+def base_schema(schema_path: Optional[str] = None) -> Dict[str, str]:
+    """Raw schema without the engineered ``*_interaction`` and ``*_poly`` columns."""
+    schema = read_schema(schema_path or DATA_PATH['raw_schema'])
+    return {
+        col: dtype for col, dtype in schema.items()
+        if not col.endswith(('_interaction', '_poly'))
+    }
+
+
+def _categorical(codes: np.ndarray, categories) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, categories=list(categories))
+
+
+def _answer_column(col: str, values: np.ndarray) -> pd.Categorical:
+    """Strings of the encoded ``values`` of a survey question, inverting ``ENCODING_SPEC[col]``."""
+    mapping = ENCODING_SPEC[col]
+    positions = np.empty(len(mapping), dtype=np.int8)
+    positions[list(mapping.values())] = np.arange(len(mapping))
+    return _categorical(positions[values], mapping)
+
+
+def _answers(rng: np.random.Generator, col: str, n: int, age: np.ndarray) -> np.ndarray:
+    """Encoded values (as in ``encode_features``) of one survey question."""
+    mapping = ENCODING_SPEC[col]
+    if col in BINARY_COLS:
+        rate = YES_RATES.get(col, 0.2)
+        if col in AGE_RELATED:
+            rate = np.clip(rate * (0.3 + 1.4 * age / 12), 0, 0.95)
+        return (rng.random(n) < rate).astype(np.int8)
+    # Ordinal answers: fixed, mildly uneven shares per question
+    shares = np.random.default_rng(sum(map(ord, col))).dirichlet(np.full(len(mapping), 3.0))
+    return rng.choice(len(mapping), size=n, p=shares).astype(np.int8)
+
+
+def _bmi_category(bmi: np.ndarray) -> np.ndarray:
+    """Encoded ``BMI_Category`` of every BMI."""
+    return np.digitize(bmi, [18.5, 25, 30, 40]).astype(np.int8)
+
+
+def _sleep_category(hours: np.ndarray) -> np.ndarray:
+    """Encoded ``SleepHours_Category`` of every sleep duration; the codes are not ordered by duration."""
+    by_duration = np.digitize(hours, [5, 7, 10, 12])  # very short, short, normal, long, very long
+    return np.array([3, 1, 0, 2, 4], dtype=np.int8)[by_duration]
+
+
+class SyntheticBRFSS:
+    """
+    Generator of BRFSS-shaped frames.
+
+    Parameters:
+    - missing_rate (float): Share of missing cells in every feature column.
+    - positive_rate (float): Expected share of ``HadHeartAttack == 1``.
+    - seed (int): Seed; the same seed, chunk size and row count give the same data.
+    - schema_path (str, optional): Raw ``dtype.csv`` giving the columns and their order.
+    """
+
+    def __init__(self, missing_rate: float = 0.05, positive_rate: float = 0.055, seed: int = 42,
+                 schema_path: Optional[str] = None):
+        self.missing_rate = missing_rate
+        self.positive_rate = positive_rate
+        self.seed = seed
+        self.schema = base_schema(schema_path)
+        self._intercept = None
+
+    def _features(self, rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+        """Encoded survey answers plus the continuous measurements, before missing values."""
+        columns = {}
+        age = rng.choice(13, size=n, p=np.linspace(0.6, 1.2, 13) / np.linspace(0.6, 1.2, 13).sum())
+        columns['AgeCategory'] = age
+        male = rng.random(n) < 0.48
+        columns['Sex'] = male.astype(np.int8)
+
+        height = rng.normal(np.where(male, 1.78, 1.63), 0.075)
+        bmi = np.clip(rng.lognormal(np.log(28), 0.2, n), 12, 97)
+        columns['HeightInMeters'] = np.round(height, 2)
+        columns['WeightInKilograms'] = np.round(bmi * height ** 2, 2)
+        columns['BMI'] = np.round(bmi, 2)
+        for col, p_zero in (('PhysicalHealthDays', 0.62), ('MentalHealthDays', 0.58)):
+            days = np.minimum(rng.geometric(0.12, n), 30).astype(np.float64)
+            days[rng.random(n) < 0.06] = 30
+            columns[col] = np.where(rng.random(n) < p_zero, 0.0, days)
+        columns['SleepHours'] = np.clip(np.round(rng.normal(7.0, 1.4, n)), 1, 24)
+
+        for col in ENCODING_SPEC:
+            if col not in columns:
+                columns[col] = _answers(rng, col, n, age)
+        # The categories follow the measurements they summarise
+        columns['BMI_Category'] = _bmi_category(bmi)
+        columns['SleepHours_Category'] = _sleep_category(columns['SleepHours'])
+        columns['State'] = rng.integers(len(STATES), size=n)
+        columns['RaceEthnicityCategory'] = rng.choice(len(RACE_ETHNICITY), size=n, p=list(RACE_ETHNICITY.values()))
+        return columns
+
+    def _logits(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        logits = np.zeros(len(columns['AgeCategory']))
+        for col, weight in RISK_WEIGHTS.items():
+            logits += weight * columns[col]
+        logits += 0.03 * (columns['BMI'] - 28)
+        return logits
+
+    def _calibrate(self) -> float:
+        """Intercept giving ``positive_rate`` on a large calibration sample."""
+        if self._intercept is None:
+            rng = np.random.default_rng([self.seed, 2 ** 31])
+            logits = self._logits(self._features(rng, 200_000))
+            low, high = -30.0, 10.0
+            for _ in range(60):
+                mid = (low + high) / 2
+                if (1 / (1 + np.exp(-(logits + mid)))).mean() > self.positive_rate:
+                    high = mid
+                else:
+                    low = mid
+            self._intercept = (low + high) / 2
+        return self._intercept
+
+    def generate(self, n_rows: int, chunk: int = 0, categorical: bool = True) -> pd.DataFrame:
+        """
+        Generate one frame.
+
+        Parameters:
+        - n_rows (int): Number of rows.
+        - chunk (int): Chunk number; different chunks of the same generator are independent.
+        - categorical (bool): Return string columns as ``category`` (compact) instead of ``object``.
+
+        Returns:
+        - pd.DataFrame: Columns of the raw schema, answers as strings, ``HadHeartAttack`` as 0/1.
+        """
+        rng = np.random.default_rng([self.seed, chunk])
+        columns = self._features(rng, n_rows)
+        probability = 1 / (1 + np.exp(-(self._logits(columns) + self._calibrate())))
+        target = (rng.random(n_rows) < probability).astype(np.int64)
+
+        frame = {}
+        for col in self.schema:
+            if col == TARGET:
+                frame[col] = target
+                continue
+            if col in ENCODING_SPEC:
+                values = _answer_column(col, columns[col])
+            elif col == 'State':
+                values = _categorical(columns[col], STATES)
+            elif col == 'RaceEthnicityCategory':
+                values = _categorical(columns[col], RACE_ETHNICITY)
+            else:
+                values = columns[col].astype(np.float64)
+            if self.missing_rate:
+                missing = rng.random(n_rows) < self.missing_rate
+                if isinstance(values, pd.Categorical):
+                    values = values.copy()
+                    values[missing] = np.nan
+                else:
+                    values = np.where(missing, np.nan, values)
+            frame[col] = values
+
+        df = pd.DataFrame(frame)
+        if not categorical:
+            df = df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+        return df
+
+    def iter_chunks(self, n_rows: int, chunksize: int = 500_000, categorical: bool = True) -> Iterator[pd.DataFrame]:
+        """Yield ``n_rows`` rows as independent chunks of at most ``chunksize`` rows."""
+        for chunk, start in enumerate(range(0, n_rows, chunksize)):
+            yield self.generate(min(chunksize, n_rows - start), chunk=chunk, categorical=categorical)
+
+    def write(self, path: str, n_rows: int, chunksize: int = 500_000) -> None:
+        """Write ``n_rows`` rows to a Parquet or CSV file chunk by chunk."""
+        with DatasetWriter(path) as writer:
+            for chunk in self.iter_chunks(n_rows, chunksize):
+                writer.write(chunk)
+
+
+def make_brfss(size='10k', missing_rate: float = 0.05, positive_rate: float = 0.055, seed: int = 42,
+               categorical: bool = True) -> pd.DataFrame:
+    """
+    Generate a synthetic BRFSS frame in memory.
+
+    Parameters:
+    - size (str or int): A key of ``SIZES`` ('10k', '400k', '5m') or a row count.
+    - missing_rate (float): Share of missing cells in every feature column.
+    - positive_rate (float): Expected share of heart attacks.
+    - seed (int): Seed of the generator.
+    - categorical (bool): Return string columns as ``category`` instead of ``object``.
+
+    Returns:
+    - pd.DataFrame: The generated frame.
+    """
+    n_rows = SIZES[size] if isinstance(size, str) else int(size)
+    generator = SyntheticBRFSS(missing_rate, positive_rate, seed)
+    chunks = list(generator.iter_chunks(n_rows, categorical=categorical))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from src.data_io import DatasetWriter, iter_dataset, read_dataset
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.csv'])
+def test_iter_dataset_chunks_share_file_categories(tmp_path, suffix):
+    path = str(tmp_path / f"data{suffix}")
+    with DatasetWriter(path) as writer:
+        writer.write(pd.DataFrame({'State': pd.Categorical(['NY', 'CA']), 'value': [1, 2]}))
+        writer.write(pd.DataFrame({'State': pd.Categorical(['WA', 'TX']), 'value': [3, 4]}))
+        writer.write(pd.DataFrame({'State': pd.Categorical(['CA']), 'value': [5]}))
+    schema = {'State': 'category'} if suffix == '.csv' else None
+
+    whole = read_dataset(path, schema=schema)
+    chunks = list(iter_dataset(path, 2, dtype=schema))
+
+    assert list(whole['State'].cat.categories) == ['CA', 'NY', 'TX', 'WA']
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert chunk['State'].dtype == whole['State'].dtype
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), whole)
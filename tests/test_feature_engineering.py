@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from src.data_io import DatasetWriter, read_dataset
+from src.feature_engineering.feature_engineering import FeatureEngineer
+
+FEATURES = ['BMI', 'SleepHours']
+
+
+def _chunk(states, bmi, sex):
+    return pd.DataFrame({
+        'State': pd.Categorical(states),
+        'Sex': sex,
+        'BMI': np.asarray(bmi, dtype=np.float32),
+        'SleepHours': np.full(len(states), 7.0, dtype=np.float32),
+    })
+
+
+def test_transform_chunks_widens_categories():
+    chunks = [_chunk(['NY', 'CA'], [20, 25], np.int8([0, 1])), _chunk(['WA', 'TX'], [30, 35], np.int8([1, 0]))]
+
+    out = list(FeatureEngineer(FEATURES, degree=2).transform_chunks(chunks))
+
+    assert list(out[1]['State']) == ['WA', 'TX']
+    assert list(out[1]['State'].cat.categories) == ['CA', 'NY', 'TX', 'WA']
+    assert list(out[0].columns) == list(out[1].columns)
+
+
+def test_transform_chunks_promotes_integers_with_missing_values():
+    chunks = [_chunk(['NY', 'CA'], [20, 25], np.int8([0, 1])),
+              _chunk(['NY', 'CA'], [30, 35], np.float32([1, np.nan]))]
+
+    engineer = FeatureEngineer(FEATURES, degree=2)
+    out = list(engineer.transform_chunks(chunks))
+
+    assert out[1]['Sex'].dtype == np.float32
+    assert np.isnan(out[1]['Sex'].iloc[1])
+    assert engineer.input_dtypes_['Sex'] == np.float32
+    # Chunks after the widening keep the wider dtype
+    assert engineer.transform(chunks[0])['Sex'].dtype == np.float32
+
+
+def test_transform_file_with_chunk_dependent_dtypes(tmp_path):
+    source, target = str(tmp_path / 'encoded.parquet'), str(tmp_path / 'engineered.parquet')
+    with DatasetWriter(source) as writer:
+        writer.write(_chunk(['NY', 'CA'], [20, 25], np.int8([0, 1])))
+        writer.write(_chunk(['WA', 'TX'], [30, 35], np.float32([1, np.nan])))
+
+    FeatureEngineer(FEATURES, degree=2).transform_file(source, target, chunksize=2)
+
+    result = read_dataset(target)
+    assert len(result) == 4
+    assert list(result['State']) == ['NY', 'CA', 'WA', 'TX']
+    assert result['Sex'].isna().sum() == 1
+    np.testing.assert_allclose(result['BMI^2_poly'], [400, 625, 900, 1225])
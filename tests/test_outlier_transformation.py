@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_preprocessing.outlier_transformation import OutlierTransformer, transform_outliers
+
+
+@pytest.mark.parametrize('method', ['winsorization', 'iqr', 'z_score'])
+@pytest.mark.parametrize('values', [[np.nan, np.nan], []], ids=['all-missing', 'empty'])
+def test_capping_without_values_leaves_column_unchanged(method, values):
+    df = pd.DataFrame({'a': np.array(values, dtype=np.float64)})
+
+    result = transform_outliers(df, 'a', method=method)
+
+    pd.testing.assert_frame_equal(result, df)
+    transformer = OutlierTransformer({'a': method}).fit(df)
+    assert transformer.transform_record({'a': 5.0}) == {'a': 5.0}
+
+
+def test_z_score_constant_column_is_unchanged():
+    df = pd.DataFrame({'a': [2.0, 2.0, 2.0]})
+
+    transformer = OutlierTransformer({'a': 'z_score'}).fit(df)
+
+    pd.testing.assert_frame_equal(transformer.transform(df), df)
+    assert transformer.transform_record({'a': 10.0}) == {'a': 10.0}
+
+
+@pytest.mark.parametrize('values', [[np.nan, np.nan], [3.0, 3.0]], ids=['all-missing', 'constant'])
+def test_boxcox_without_variation_raises(values):
+    with pytest.raises(ValueError, match="column 'a'"):
+        transform_outliers(pd.DataFrame({'a': values}), 'a', method='boxcox')